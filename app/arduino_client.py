@@ -4,131 +4,526 @@ Handles serial communication with Arduino Nano for car control.
 """
 
 import os
+import re
+import queue
 import logging
+import itertools
 import serial
 import time
-from typing import Optional
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.device.car_base import CarBase, DANCE_MOVES
 
 logger = logging.getLogger(__name__)
 
 
-class ArduinoClient:
+# Command priorities (lower is sent first)
+PRIORITY_STOP = 0
+PRIORITY_NORMAL = 10
+_PRIORITY_SHUTDOWN = -1
+
+# Framed protocol replies: "ACK <seq> [detail]" / "NAK <seq> [reason]"
+_REPLY_LINE = re.compile(r'^(ACK|NAK)\s+(\d+)\s*(.*)$')
+
+
+class CommandFuture(Future):
+    """
+    Future for one Arduino command.
+
+    Resolves with the Arduino's reply once the command is acknowledged;
+    fails with ConnectionError (not connected), TimeoutError (no ack) or
+    RuntimeError (rejected by the Arduino), and is cancelled if a STOP
+    overtakes it in the queue.
+
+    Attributes:
+        command: Command name ("RUN", "DANCE", "STOP")
+        priority: Queue priority
+        seq: Sequence number on the wire (0 until written)
+        sent_at: time.monotonic() of the write
+        written: True once the command is on the wire
+    """
+
+    def __init__(self, command: str, priority: int):
+        super().__init__()
+        self.command = command
+        self.priority = priority
+        self.seq = 0
+        self.sent_at: Optional[float] = None
+        self.written = False
+        self._settled = threading.Event()
+        self.add_done_callback(lambda _: self._settled.set())
+
+    def mark_written(self) -> None:
+        """Record that the command left the queue and is on the wire."""
+        self.written = True
+        self._settled.set()
+
+    def wait_written(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the command is written (or failed) without waiting for the ack.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if the command was written
+        """
+        self._settled.wait(timeout)
+        return self.written
+
+
+class ArduinoClient(CarBase):
     """
     Serial communication client for Arduino Nano car controller.
+
+    All serial I/O happens on two background threads, so callers never
+    block on the port: a writer takes commands from a priority queue (STOP
+    ahead of everything else) and a reader collects reply lines. Sending
+    returns a CommandFuture right away.
+
+    With ARDUINO_PROTOCOL=framed each command is written as "@<seq> <CMD>"
+    and the Arduino answers "ACK <seq>" (or "NAK <seq> <reason>"); the
+    future resolves on that ack. The legacy protocol writes bare "<CMD>"
+    lines for firmware without acks; the first reply line (or the ack
+    timeout) resolves the oldest outstanding command.
     """
-    
-    def __init__(self):
-        """Initialize Arduino client."""
+
+    def __init__(
+        self,
+        port: Optional[str] = None,
+        baud: Optional[int] = None,
+        protocol: Optional[str] = None,
+        ack_timeout: Optional[float] = None,
+        reset_delay: Optional[float] = None,
+        serial_factory: Optional[Callable[..., serial.Serial]] = None
+    ):
+        """
+        Initialize Arduino client.
+
+        Args:
+            port: Serial port (default from ARDUINO_PORT)
+            baud: Baud rate (default from ARDUINO_BAUD or 9600)
+            protocol: "framed" or "legacy" (default from ARDUINO_PROTOCOL or legacy)
+            ack_timeout: Seconds to wait for an ack (default from ARDUINO_ACK_TIMEOUT or 2.0)
+            reset_delay: Seconds the Arduino needs to boot after the port opens
+                (default from ARDUINO_RESET_DELAY or 2.0)
+            serial_factory: Opens the port (default: serial.Serial)
+        """
+        if protocol is None:
+            protocol = os.getenv("ARDUINO_PROTOCOL", "legacy")
+        if ack_timeout is None:
+            ack_timeout = float(os.getenv("ARDUINO_ACK_TIMEOUT", "2.0"))
+        if reset_delay is None:
+            reset_delay = float(os.getenv("ARDUINO_RESET_DELAY", "2.0"))
+        protocol = protocol.lower()
+        if protocol not in ("framed", "legacy"):
+            raise ValueError(f"Unknown ARDUINO_PROTOCOL: {protocol}")
+
         self.ser: Optional[serial.Serial] = None
-        self.port = os.getenv("ARDUINO_PORT", "/dev/cu.usbserial-14320")
-        self.baud = int(os.getenv("ARDUINO_BAUD", "9600"))
+        self.port = port or os.getenv("ARDUINO_PORT", "/dev/cu.usbserial-14320")
+        self.baud = baud or int(os.getenv("ARDUINO_BAUD", "9600"))
+        self.protocol = protocol
+        self.ack_timeout = ack_timeout
+        self.reset_delay = reset_delay
+        self.reconnect_interval = float(os.getenv("ARDUINO_RECONNECT_S", "5.0"))
         self.connected = False
-    
+        self._serial_factory = serial_factory or serial.Serial
+
+        self._queue: "queue.PriorityQueue[tuple]" = queue.PriorityQueue()
+        self._order = itertools.count()
+        self._seq = itertools.count(1)
+        # Written commands waiting for their ack, oldest first
+        self._pending: "OrderedDict[int, CommandFuture]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Serializes writes so STOP can interleave safely with a running command
+        self._write_lock = threading.Lock()
+        # Set by STOP: dance moves are refused until the next RUN or DANCE
+        self._halted = False
+        self._sent_since_stop = 0
+        self._running = threading.Event()
+        self._stopped = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._next_connect = 0.0
+
+        self._ack_latencies: deque = deque(maxlen=1000)  # seconds, write -> ack
+        self._counts: Dict[str, int] = {"sent": 0, "acked": 0, "timeouts": 0, "failed": 0}
+
+    def start(self) -> None:
+        """
+        Start the serial I/O threads; the port is opened right away in the background.
+
+        Called automatically by the first command, but calling it at startup
+        gets the Arduino's boot delay out of the way before the first turn.
+        """
+        with self._lock:
+            if self._running.is_set():
+                return
+            self._running.set()
+            self._stopped.clear()
+            self._threads = [
+                threading.Thread(target=self._write_loop, name="arduino-writer", daemon=True),
+                threading.Thread(target=self._read_loop, name="arduino-reader", daemon=True),
+            ]
+            for thread in self._threads:
+                thread.start()
+
     def connect(self) -> bool:
         """
-        Connect to Arduino via serial port.
-        
+        Connect to Arduino via serial port (blocks for the Arduino's reset).
+
         Returns:
             bool: True if connected successfully
         """
         try:
             logger.info(f"Connecting to Arduino on {self.port} at {self.baud} baud...")
-            
-            self.ser = serial.Serial(self.port, self.baud, timeout=1)
-            time.sleep(2)  # Allow time for Arduino reset
-            
-            self.connected = True
-            logger.info("Arduino connected successfully")
+
+            # Short read timeout keeps the reader thread responsive
+            ser = self._serial_factory(self.port, self.baud, timeout=0.05)
+            time.sleep(self.reset_delay)  # Allow time for Arduino reset
+
+            with self._lock:
+                self.ser = ser
+                self.connected = True
+            logger.info(f"Arduino connected successfully ({self.protocol} protocol)")
             return True
-        
+
         except serial.SerialException as e:
             logger.warning(f"Arduino not connected: {e}")
-            self.connected = False
-            return False
         except Exception as e:
             logger.error(f"Failed to connect to Arduino: {e}")
-            self.connected = False
-            return False
-    
-    def send_run(self) -> bool:
+
+        self.connected = False
+        self._next_connect = time.monotonic() + self.reconnect_interval
+        return False
+
+    def send(self, command: str, priority: int = PRIORITY_NORMAL) -> CommandFuture:
+        """
+        Queue a command for the Arduino.
+
+        Args:
+            command: Command string to send (e.g., "RUN", "DANCE")
+            priority: Queue priority (lower goes first)
+
+        Returns:
+            CommandFuture: Resolves when the Arduino acknowledges the command;
+                a dance move sent after STOP (and before the next RUN or
+                DANCE) fails right away with RuntimeError
+        """
+        self.start()
+        future = CommandFuture(command, priority)
+        with self._lock:
+            if command in DANCE_MOVES and self._halted:
+                logger.debug(f"{command} refused: car stopped")
+                future.set_exception(RuntimeError(f"{command} refused: car stopped"))
+                return future
+            if command in ("RUN", "DANCE"):
+                self._halted = False
+            if command != "STOP":
+                self._sent_since_stop += 1
+            self._queue.put((priority, next(self._order), future))
+        return future
+
+    def send_run(self) -> CommandFuture:
         """
         Send RUN command to Arduino to start the cafeteria route.
-        
+
         Returns:
-            bool: True if command sent successfully
+            CommandFuture: Resolves when the Arduino acknowledges RUN
         """
-        return self._send_command("RUN")
-    
-    def send_dance(self) -> bool:
+        return self.send("RUN")
+
+    def send_dance(self) -> CommandFuture:
         """
         Send DANCE command to Arduino to start the dance routine.
-        
+
         Returns:
-            bool: True if command sent successfully
+            CommandFuture: Resolves when the Arduino acknowledges DANCE
         """
-        return self._send_command("DANCE")
-    
-    def _send_command(self, command: str) -> bool:
+        return self.send("DANCE")
+
+    def send_stop(self) -> CommandFuture:
         """
-        Send a command to Arduino and read responses.
-        
-        Args:
-            command: Command string to send (e.g., "RUN", "DANCE")
-        
+        Send STOP to Arduino ahead of everything else.
+
+        Commands still waiting in the queue are cancelled, so nothing queued
+        before the stop can start the car again after it. Dance moves are
+        refused from now on until the next RUN or DANCE, so a routine still
+        being cued cannot restart the car either.
+
+        Returns:
+            CommandFuture: Use wait_written() to wait for the write only
+        """
+        with self._lock:
+            self._halted = True
+            self._sent_since_stop = 0
+            dropped = self._drop_queued()
+        if dropped:
+            logger.warning(f"STOP: dropped queued Arduino commands {dropped}")
+        return self.send("STOP", PRIORITY_STOP)
+
+    def commands_since_stop(self) -> int:
+        """
+        Count the commands queued since the last STOP.
+
+        The ESTOP guard uses this to tell a repeated detection of the same
+        stop (nothing sent since) from a new one.
+
         Returns:
-            bool: True if command sent successfully
-        """
-        if not self.connected:
-            # Try to connect if not already connected
-            if not self.connect():
-                logger.warning("Arduino not available - running in simulation mode")
-                return False
-        
+            int: Commands other than STOP queued since the last send_stop()
+        """
+        with self._lock:
+            return self._sent_since_stop
+
+    def _drop_queued(self) -> List[str]:
+        """Cancel queued commands below STOP priority."""
+        keep, dropped = [], []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] <= PRIORITY_STOP:
+                keep.append(item)
+            elif item[2].cancel():
+                dropped.append(item[2].command)
+        for item in keep:
+            self._queue.put(item)
+        return dropped
+
+    # --- I/O threads -----------------------------------------------------
+
+    def _write_loop(self) -> None:
+        """Connect, then write queued commands in priority order."""
+        while self._running.is_set():
+            if not self.connected and time.monotonic() >= self._next_connect:
+                self.connect()
+
+            try:
+                _, _, future = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if future is None:
+                return
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            if not self.connected:
+                logger.warning(f"Arduino not available - {future.command} not sent (simulation mode)")
+                self._fail(future, ConnectionError("Arduino not connected"))
+                continue
+            self._write(future)
+
+    def _write(self, future: CommandFuture) -> None:
+        """Write one command frame and register it for its ack."""
+        with self._lock:
+            future.seq = next(self._seq)
+            # Set before the future is visible to the reader thread; refreshed at the write
+            future.sent_at = time.monotonic()
+            self._pending[future.seq] = future
+
+        if self.protocol == "framed":
+            frame = f"@{future.seq} {future.command}\n"
+        else:
+            frame = f"{future.command}\n"
+
         try:
-            logger.info(f"Sending {command} command to Arduino...")
-            self.ser.write(f"{command}\n".encode())
-            logger.info(f"Sent: {command}")
-            
-            # Read Arduino response
-            start_time = time.time()
-            while time.time() - start_time < 2:  # Read for up to 2 seconds
-                if self.ser.in_waiting:
-                    line = self.ser.readline().decode('utf-8', errors='ignore').strip()
-                    if line:
-                        logger.info(f"Arduino: {line}")
-            
-            return True
-        
+            with self._write_lock:
+                future.sent_at = time.monotonic()
+                self.ser.write(frame.encode())
+                self.ser.flush()
         except Exception as e:
-            logger.error(f"Failed to send {command} command: {e}")
-            return False
-    
+            logger.error(f"Failed to send {future.command} command: {e}")
+            with self._lock:
+                self._pending.pop(future.seq, None)
+            self._fail(future, e)
+            self._drop_connection()
+            return
+
+        future.mark_written()
+        self._counts["sent"] += 1
+        logger.info(f"Sent: {future.command}")
+
+    def _read_loop(self) -> None:
+        """Split incoming bytes into lines and resolve acknowledged commands."""
+        buffer = b""
+        while self._running.is_set():
+            ser = self.ser
+            if not self.connected or ser is None:
+                buffer = b""
+                self._stopped.wait(0.1)
+                continue
+
+            try:
+                data = ser.read(max(1, ser.in_waiting))
+            except Exception as e:
+                if self._running.is_set():
+                    logger.error(f"Arduino read failed: {e}")
+                    self._drop_connection()
+                continue
+
+            if data:
+                buffer += data
+                while b"\n" in buffer:
+                    line, buffer = buffer.split(b"\n", 1)
+                    self._handle_line(line.decode('utf-8', errors='ignore').strip())
+            self._expire(time.monotonic())
+
+    def _handle_line(self, line: str) -> None:
+        """Handle one line from the Arduino."""
+        if not line:
+            return
+
+        match = _REPLY_LINE.match(line) if self.protocol == "framed" else None
+        if match:
+            kind, seq, detail = match.group(1), int(match.group(2)), match.group(3)
+            with self._lock:
+                future = self._pending.pop(seq, None)
+            if future is None:
+                logger.debug(f"Arduino: {kind} for unknown or expired command {seq}")
+                return
+            if kind == "ACK":
+                self._resolve(future, detail or kind)
+            else:
+                logger.warning(f"Arduino rejected {future.command}: {detail}")
+                self._fail(future, RuntimeError(f"Arduino rejected {future.command}: {detail}"))
+            return
+
+        logger.info(f"Arduino: {line}")
+        if self.protocol == "legacy":
+            # No acks: the first reply line answers the oldest command
+            with self._lock:
+                future = self._pending.popitem(last=False)[1] if self._pending else None
+            if future is not None:
+                self._resolve(future, line)
+
+    def _expire(self, now: float) -> None:
+        """Time out commands the Arduino never acknowledged."""
+        with self._lock:
+            expired = [
+                seq for seq, future in self._pending.items()
+                if future.sent_at is not None and now - future.sent_at > self.ack_timeout
+            ]
+            futures = [self._pending.pop(seq) for seq in expired]
+
+        for future in futures:
+            if self.protocol == "legacy":
+                # Quiet legacy firmware: written is all we will ever know
+                future.set_result("")
+            else:
+                logger.warning(f"No ack for {future.command} within {self.ack_timeout}s")
+                self._counts["timeouts"] += 1
+                future.set_exception(TimeoutError(f"No ack for {future.command} within {self.ack_timeout}s"))
+
+    def _resolve(self, future: CommandFuture, reply: str) -> None:
+        if future.sent_at is not None:
+            self._ack_latencies.append(time.monotonic() - future.sent_at)
+        self._counts["acked"] += 1
+        if not future.done():
+            future.set_result(reply)
+
+    def _fail(self, future: CommandFuture, error: Exception) -> None:
+        self._counts["failed"] += 1
+        if not future.done():
+            future.set_exception(error)
+
+    def _drop_connection(self) -> None:
+        """Close a broken port, fail commands waiting for acks and reconnect later."""
+        with self._lock:
+            ser, self.ser = self.ser, None
+            self.connected = False
+            pending = list(self._pending.values())
+            self._pending.clear()
+        self._next_connect = time.monotonic() + self.reconnect_interval
+
+        if ser is not None:
+            try:
+                ser.close()
+            except Exception:
+                pass
+        for future in pending:
+            self._fail(future, ConnectionError("Arduino connection lost"))
+
+    # --- reporting -------------------------------------------------------
+
+    def stats(self) -> dict:
+        """
+        Get command statistics.
+
+        Returns:
+            dict: Commands sent/acked/timed out/failed and ack latency percentiles in ms
+        """
+        stats = dict(self._counts)
+        latencies = np.array(self._ack_latencies) * 1000
+        if len(latencies):
+            stats["ack_p50_ms"] = round(float(np.percentile(latencies, 50)), 2)
+            stats["ack_p95_ms"] = round(float(np.percentile(latencies, 95)), 2)
+            stats["ack_max_ms"] = round(float(latencies.max()), 2)
+        return stats
+
     def disconnect(self) -> None:
-        """Close serial connection to Arduino."""
+        """Stop the I/O threads and close serial connection to Arduino."""
+        if self._running.is_set():
+            self._running.clear()
+            self._stopped.set()
+            self._queue.put((_PRIORITY_SHUTDOWN, next(self._order), None))
+            for thread in self._threads:
+                thread.join(timeout=2)
+            self._threads = []
+
+        # Whatever is left will never be written
+        while True:
+            try:
+                _, _, future = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if future is not None and future.set_running_or_notify_cancel():
+                future.set_exception(ConnectionError("Arduino disconnected"))
+
         if self.ser and self.connected:
+            logger.info(f"Arduino: {self.stats()}")
             try:
                 self.ser.close()
                 logger.info("Arduino disconnected")
             except Exception as e:
                 logger.error(f"Error disconnecting Arduino: {e}")
-            finally:
-                self.connected = False
-                self.ser = None
+
+        with self._lock:
+            self.connected = False
+            self.ser = None
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(ConnectionError("Arduino disconnected"))
 
 
 # Global Arduino client instance
 _arduino_client: Optional[ArduinoClient] = None
+_arduino_client_lock = threading.Lock()
 
 
 def get_arduino_client() -> ArduinoClient:
     """
     Get or create the global Arduino client instance.
-    
+
+    With ARDUINO_SIM=true the client drives the simulated car firmware
+    instead of a serial port.
+
     Returns:
         ArduinoClient: Global client instance
     """
     global _arduino_client
     if _arduino_client is None:
-        _arduino_client = ArduinoClient()
+        with _arduino_client_lock:
+            if _arduino_client is None:
+                if os.getenv("ARDUINO_SIM", "false").lower() == "true":
+                    from app.device.car_sim import SimulatedCar
+                    _arduino_client = SimulatedCar()
+                else:
+                    _arduino_client = ArduinoClient()
     return _arduino_client
-
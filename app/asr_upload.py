@@ -0,0 +1,216 @@
+"""
+ASR Upload
+Shrinks recorded speech before it is sent for transcription: resampling,
+silence trimming and optional compression, with bytes-on-the-wire stats.
+"""
+
+import os
+import math
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from app.audio_codec import encode_audio, OPUS_SAMPLE_RATES
+
+logger = logging.getLogger(__name__)
+
+# Frame length used to find where speech starts and ends
+_TRIM_FRAME_MS = 10
+
+
+@dataclass
+class AsrUpload:
+    """
+    One encoded ASR request body.
+
+    Attributes:
+        data: Encoded audio file contents
+        file_format: Format name sent with the audio ("wav", "flac", "opus")
+        sample_rate: Sample rate of the encoded audio
+        seconds: Duration after trimming
+        source_seconds: Duration as recorded
+        wire_bytes: Size of the base64 payload that goes over the network
+    """
+    data: bytes
+    file_format: str
+    sample_rate: int
+    seconds: float
+    source_seconds: float
+
+    @property
+    def wire_bytes(self) -> int:
+        return 4 * math.ceil(len(self.data) / 3)
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """
+    Band-limited resampling of a whole clip in the frequency domain.
+
+    Unlike linear interpolation, content above the new Nyquist frequency
+    is removed instead of folding back into the speech band.
+
+    Args:
+        samples: int16 mono samples
+        from_rate: Input sample rate
+        to_rate: Output sample rate
+
+    Returns:
+        np.ndarray: int16 samples at to_rate
+    """
+    samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    count = max(1, int(round(len(samples) * to_rate / from_rate)))
+    spectrum = np.fft.rfft(samples.astype(np.float32))
+    resampled = np.fft.irfft(spectrum[:count // 2 + 1], count) * (count / len(samples))
+    return np.clip(np.round(resampled), -32768, 32767).astype(np.int16)
+
+
+def trim_silence(
+    samples: np.ndarray,
+    sample_rate: int,
+    threshold_db: float = 35.0,
+    floor_db: float = -55.0,
+    pad_ms: float = 150.0
+) -> np.ndarray:
+    """
+    Cut silence from both ends of a recording.
+
+    A 10ms frame counts as sound if its RMS level is within threshold_db
+    of the loudest frame and above floor_db (dBFS). pad_ms of audio is
+    kept around the first and last such frame so soft word onsets and
+    endings survive. A recording with no frame above the floor is
+    returned unchanged.
+
+    Args:
+        samples: int16 mono samples
+        sample_rate: Sample rate in Hz
+        threshold_db: Level below the loudest frame treated as silence
+        floor_db: Absolute level below which a frame is always silence
+        pad_ms: Audio kept before the first and after the last loud frame
+
+    Returns:
+        np.ndarray: Trimmed samples (a view of the input)
+    """
+    samples = np.asarray(samples).reshape(-1)
+    frame = max(1, int(sample_rate * _TRIM_FRAME_MS / 1000))
+    count = len(samples) // frame
+    if count == 0:
+        return samples
+
+    frames = samples[:count * frame].reshape(count, frame).astype(np.float32) / 32768.0
+    levels = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+    loud = np.nonzero(levels > max(levels.max() - threshold_db, floor_db))[0]
+    if len(loud) == 0:
+        return samples
+
+    pad = int(sample_rate * pad_ms / 1000)
+    start = max(0, loud[0] * frame - pad)
+    end = min(len(samples), (loud[-1] + 1) * frame + pad)
+    return samples[start:end]
+
+
+class _UploadStats:
+    """Running totals of ASR upload sizes."""
+
+    def __init__(self):
+        self.uploads = 0
+        self.wav_bytes = 0   # what the recording would have cost as plain WAV
+        self.wire_bytes = 0
+        self.source_seconds = 0.0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, upload: AsrUpload, wav_bytes: int) -> None:
+        with self._lock:
+            self.uploads += 1
+            self.wav_bytes += wav_bytes
+            self.wire_bytes += upload.wire_bytes
+            self.source_seconds += upload.source_seconds
+            self.seconds += upload.seconds
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            if self.uploads == 0:
+                return {"uploads": 0}
+            return {
+                "uploads": self.uploads,
+                "wire_kib_per_upload": round(self.wire_bytes / self.uploads / 1024, 1),
+                "saved_pct": round(100 * (1 - self.wire_bytes / (4 * math.ceil(self.wav_bytes / 3) or 1)), 1),
+                "audio_kept_pct": round(100 * self.seconds / (self.source_seconds or 1), 1),
+            }
+
+
+_stats = _UploadStats()
+
+
+def prepare_asr_upload(
+    samples: np.ndarray,
+    sample_rate: int,
+    trim: Optional[bool] = None,
+    upload_rate: Optional[int] = None,
+    file_format: Optional[str] = None
+) -> AsrUpload:
+    """
+    Encode recorded speech for an ASR request.
+
+    Args:
+        samples: int16 mono samples
+        sample_rate: Sample rate of the samples
+        trim: Cut silence at both ends (default from ASR_TRIM_SILENCE or true)
+        upload_rate: Sample rate sent to the endpoint (default from ASR_UPLOAD_SAMPLE_RATE or 16000)
+        file_format: "wav", "flac" or "opus" (default from ASR_UPLOAD_FORMAT or wav)
+
+    Returns:
+        AsrUpload: Encoded audio and its size
+    """
+    if trim is None:
+        trim = os.getenv("ASR_TRIM_SILENCE", "true").lower() == "true"
+    if upload_rate is None:
+        upload_rate = int(os.getenv("ASR_UPLOAD_SAMPLE_RATE", "16000"))
+    if file_format is None:
+        file_format = os.getenv("ASR_UPLOAD_FORMAT", "wav").lower()
+    if file_format == "opus" and upload_rate not in OPUS_SAMPLE_RATES:
+        # Opus only runs at a few rates; use the nearest one above the requested rate
+        upload_rate = min((rate for rate in OPUS_SAMPLE_RATES if rate >= upload_rate), default=48000)
+
+    samples = np.asarray(samples, dtype=np.int16).reshape(-1)
+    source_seconds = len(samples) / sample_rate
+    if trim:
+        samples = trim_silence(
+            samples,
+            sample_rate,
+            threshold_db=float(os.getenv("ASR_TRIM_THRESHOLD_DB", "35")),
+            floor_db=float(os.getenv("ASR_TRIM_FLOOR_DB", "-55")),
+            pad_ms=float(os.getenv("ASR_TRIM_PAD_MS", "150")),
+        )
+    samples = resample(samples, sample_rate, upload_rate)
+
+    upload = AsrUpload(
+        data=encode_audio(samples, upload_rate, file_format),
+        file_format=file_format,
+        sample_rate=upload_rate,
+        seconds=len(samples) / upload_rate,
+        source_seconds=source_seconds,
+    )
+    wav_bytes = 44 + 2 * int(round(source_seconds * sample_rate))
+    _stats.add(upload, wav_bytes)
+    logger.debug(
+        f"ASR upload: {source_seconds:.2f}s -> {upload.seconds:.2f}s at {upload_rate}Hz {file_format}, "
+        f"{wav_bytes / 1024:.1f} KiB WAV -> {upload.wire_bytes / 1024:.1f} KiB on the wire"
+    )
+    return upload
+
+
+def upload_stats() -> dict:
+    """
+    Get ASR upload statistics since startup.
+
+    Returns:
+        dict: Upload count, mean base64 KiB per upload, saving versus a full-rate WAV
+              and the share of recorded audio that was sent
+    """
+    return _stats.snapshot()
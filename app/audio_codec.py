@@ -0,0 +1,137 @@
+"""
+Audio Codec Helpers
+In-memory conversion between NumPy PCM samples and encoded audio bytes.
+"""
+
+import io
+import os
+import time
+import wave
+import logging
+from pathlib import Path
+from typing import Optional, Tuple
+import numpy as np
+import soundfile as sf
+
+logger = logging.getLogger(__name__)
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """
+    Encode 16-bit mono PCM samples as an in-memory WAV file.
+
+    Args:
+        samples: int16 samples, shape (n,) or (n, 1)
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        bytes: Complete WAV file contents
+    """
+    pcm = np.ascontiguousarray(samples, dtype=np.int16).reshape(-1)
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(1)      # Mono
+        wav_file.setsampwidth(2)       # 16-bit
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+
+    return buffer.getvalue()
+
+
+# soundfile (format, subtype) per upload format; WAV is written by encode_wav
+_SOUNDFILE_FORMATS = {
+    "flac": ("FLAC", "PCM_16"),
+    "opus": ("OGG", "OPUS"),
+}
+
+# Sample rates the Opus codec supports
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def encode_audio(samples: np.ndarray, sample_rate: int, file_format: str = "wav") -> bytes:
+    """
+    Encode 16-bit mono PCM samples as an in-memory audio file.
+
+    Args:
+        samples: int16 samples, shape (n,) or (n, 1)
+        sample_rate: Sample rate in Hz
+        file_format: "wav", "flac" (lossless) or "opus" (lossy, in an Ogg container)
+
+    Returns:
+        bytes: Complete file contents
+
+    Raises:
+        ValueError: Unknown format, or a sample rate Opus does not support
+    """
+    if file_format == "wav":
+        return encode_wav(samples, sample_rate)
+    if file_format not in _SOUNDFILE_FORMATS:
+        raise ValueError(f"Unsupported audio format: {file_format}")
+    if file_format == "opus" and sample_rate not in OPUS_SAMPLE_RATES:
+        raise ValueError(f"Opus needs one of {OPUS_SAMPLE_RATES} Hz, got {sample_rate}")
+
+    container, subtype = _SOUNDFILE_FORMATS[file_format]
+    pcm = np.ascontiguousarray(samples, dtype=np.int16).reshape(-1)
+    buffer = io.BytesIO()
+    sf.write(buffer, pcm, sample_rate, format=container, subtype=subtype)
+    return buffer.getvalue()
+
+
+def pcm_to_array(pcm: bytes) -> np.ndarray:
+    """
+    View raw 16-bit little-endian PCM bytes as a NumPy array without copying.
+
+    Args:
+        pcm: Raw PCM bytes (a trailing odd byte is ignored)
+
+    Returns:
+        np.ndarray: Read-only int16 samples backed by the original buffer
+    """
+    usable = len(pcm) - (len(pcm) % 2)
+    return np.frombuffer(memoryview(pcm)[:usable], dtype='<i2')
+
+
+def decode_audio(data: bytes, dtype: str = 'int16') -> Tuple[np.ndarray, int]:
+    """
+    Decode an encoded audio file (WAV, FLAC, OGG, ...) held in memory.
+
+    Args:
+        data: Encoded audio file contents
+        dtype: Output sample type ('int16' or 'float32')
+
+    Returns:
+        Tuple[np.ndarray, int]: Mono samples and sample rate
+    """
+    samples, sample_rate = sf.read(io.BytesIO(data), dtype=dtype, always_2d=True)
+    return samples[:, 0], sample_rate
+
+
+def dump_debug_audio(samples: np.ndarray, sample_rate: int, prefix: str) -> Optional[str]:
+    """
+    Write audio to AUDIO_DEBUG_DUMP_DIR for inspection, if that is set.
+
+    The normal audio path never touches the filesystem; this is an opt-in
+    debugging aid only.
+
+    Args:
+        samples: int16 mono samples
+        sample_rate: Sample rate in Hz
+        prefix: File name prefix (e.g. "mic_", "tts_")
+
+    Returns:
+        str: Path of the written file, or None when dumping is disabled
+    """
+    dump_dir = os.getenv("AUDIO_DEBUG_DUMP_DIR")
+    if not dump_dir:
+        return None
+
+    try:
+        Path(dump_dir).mkdir(parents=True, exist_ok=True)
+        path = Path(dump_dir) / f"{prefix}{time.strftime('%Y%m%d_%H%M%S')}_{int(time.time() * 1000) % 1000:03d}.wav"
+        path.write_bytes(encode_wav(samples, sample_rate))
+        logger.debug(f"Debug audio written to {path}")
+        return str(path)
+    except Exception as e:
+        logger.warning(f"Failed to dump debug audio: {e}")
+        return None
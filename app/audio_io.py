@@ -4,100 +4,378 @@ Handles microphone input and speaker output for voice commands.
 """
 
 import os
-import tempfile
+import time
+import queue
 import logging
+import threading
+from collections import deque
+from typing import Iterable, Iterator, List, Optional, Union
+import numpy as np
 import sounddevice as sd
 import soundfile as sf
 
+from app.audio_codec import dump_debug_audio
+from app.mixer import MixerSource, PRIORITY_MUSIC, PRIORITY_SPEECH, get_mixer
+from app.tracing import bind, mark
+
 logger = logging.getLogger(__name__)
 
 
-def record_ptt(seconds: float = None, sample_rate: int = None) -> str:
+def _vad_enabled() -> bool:
+    """Check whether VAD endpointing is enabled (VAD_ENABLED env var, default true)."""
+    return os.getenv("VAD_ENABLED", "true").lower() == "true"
+
+
+def frame_levels_db(frames: np.ndarray) -> np.ndarray:
+    """
+    Compute the RMS level of PCM frames in dBFS.
+    
+    Args:
+        frames: int16 samples, shape (n,) for one frame or (k, n) for k frames
+    
+    Returns:
+        np.ndarray: Level in dBFS per frame (scalar array for a single frame)
+    """
+    samples = np.asarray(frames, dtype=np.float32) / 32768.0
+    rms = np.sqrt(np.mean(samples * samples, axis=-1))
+    return 20.0 * np.log10(np.maximum(rms, 1e-6))
+
+
+class VadEndpointer:
+    """
+    Energy-based voice activity endpointer.
+    
+    Tracks an adaptive noise floor and classifies each frame as speech when
+    its level is above both the floor plus a margin and an absolute minimum.
+    The floor follows quieter frames at once and creeps up on louder ones,
+    so steady cabin or road noise becomes the floor within a second or two
+    while speech, with its gaps between words, does not. Noise that was
+    taken for speech before the floor caught up is recognized when it
+    "ends" (it never rose above the settled floor) and listening goes on.
+    Frames before speech are kept in a short pre-roll buffer so the first
+    syllable isn't clipped; capture ends after a hangover of non-speech
+    frames, a hard maximum duration, or a timeout with no speech at all.
+    """
+    
+    def __init__(self, sample_rate: int, frame_ms: int = None, threshold_db: float = None,
+                 min_level_db: float = None, preroll_ms: int = None, hangover_ms: int = None,
+                 onset_ms: int = None, max_seconds: float = None, no_speech_timeout: float = None,
+                 floor_rise_db_s: float = None):
+        """
+        Initialize the endpointer.
+        
+        Args:
+            sample_rate: Sample rate in Hz
+            frame_ms: Frame size in ms (default from AUDIO_FRAME_MS or 30)
+            threshold_db: Margin above the noise floor for speech (default from VAD_THRESHOLD_DB or 12)
+            min_level_db: Absolute minimum speech level in dBFS (default from VAD_MIN_LEVEL_DB or -50)
+            preroll_ms: Audio kept from before speech onset (default from VAD_PREROLL_MS or 300)
+            hangover_ms: Silence needed to end the utterance (default from VAD_HANGOVER_MS or 500)
+            onset_ms: Consecutive speech needed to start the utterance (default from VAD_ONSET_MS or 60)
+            max_seconds: Hard limit on total capture (default from VAD_MAX_SECONDS or 8)
+            no_speech_timeout: Give up if no speech starts in time (default from VAD_NO_SPEECH_TIMEOUT or 4)
+            floor_rise_db_s: How fast the noise floor can rise in dB/s (default from VAD_FLOOR_RISE_DB_S or 10)
+        """
+        def env(value, name, default):
+            return float(os.getenv(name, default)) if value is None else float(value)
+        
+        frame_ms = env(frame_ms, "AUDIO_FRAME_MS", "30")
+        self.sample_rate = sample_rate
+        self.threshold_db = env(threshold_db, "VAD_THRESHOLD_DB", "12")
+        self.min_level_db = env(min_level_db, "VAD_MIN_LEVEL_DB", "-50")
+        self.max_seconds = env(max_seconds, "VAD_MAX_SECONDS", "8")
+        self.no_speech_timeout = env(no_speech_timeout, "VAD_NO_SPEECH_TIMEOUT", "4")
+        self.floor_rise_db = env(floor_rise_db_s, "VAD_FLOOR_RISE_DB_S", "10") * frame_ms / 1000
+        
+        self.preroll_frames = max(int(env(preroll_ms, "VAD_PREROLL_MS", "300") / frame_ms), 1)
+        self.hangover_frames = max(int(env(hangover_ms, "VAD_HANGOVER_MS", "500") / frame_ms), 1)
+        self.onset_frames = max(int(env(onset_ms, "VAD_ONSET_MS", "60") / frame_ms), 1)
+        
+        self.noise_floor_db = None
+        self.in_speech = False
+        self.done = False
+        self.speech_detected = False
+        
+        self._preroll: deque = deque(maxlen=max(self.preroll_frames, self.onset_frames))
+        self._onset_count = 0
+        self._silence_count = 0
+        self._samples_seen = 0
+        self._peak_db = float("-inf")  # loudest frame of the current utterance
+    
+    def is_speech(self, level_db: float) -> bool:
+        """
+        Classify a frame level, updating the noise floor.
+        
+        The floor starts just below the minimum speech level rather than at
+        the first frame, which may already be speech when the user talks
+        as soon as PTT opens the stream, and never goes below that. It is
+        a minimum tracker: a quieter frame pulls it down at once, a louder
+        one raises it by at most floor_rise_db. It holds still while an
+        onset is being counted.
+        
+        Args:
+            level_db: Frame level in dBFS
+        
+        Returns:
+            bool: True if the frame looks like speech
+        """
+        lowest = self.min_level_db - self.threshold_db
+        if self.noise_floor_db is None:
+            self.noise_floor_db = lowest
+        
+        speech = level_db > max(self.noise_floor_db + self.threshold_db, self.min_level_db)
+        
+        if self._onset_count == 0:
+            if level_db < self.noise_floor_db:
+                self.noise_floor_db = max(level_db, lowest)
+            else:
+                # Slow rise so speech doesn't become the floor, steady noise does
+                self.noise_floor_db = min(level_db, self.noise_floor_db + self.floor_rise_db)
+        
+        return speech
+    
+    def process(self, frame: np.ndarray) -> List[np.ndarray]:
+        """
+        Feed one frame and get the frames that belong to the utterance.
+        
+        Args:
+            frame: int16 mono frame
+        
+        Returns:
+            List[np.ndarray]: Frames to keep (pre-roll is flushed at speech onset)
+        """
+        if self.done:
+            return []
+        
+        self._samples_seen += len(frame)
+        elapsed = self._samples_seen / self.sample_rate
+        level_db = float(frame_levels_db(frame))
+        speech = self.is_speech(level_db)
+        output: List[np.ndarray] = []
+        
+        if not self.in_speech:
+            self._preroll.append(frame)
+            self._onset_count = self._onset_count + 1 if speech else 0
+            self._peak_db = max(self._peak_db, level_db) if speech else float("-inf")
+            
+            if self._onset_count >= self.onset_frames:
+                logger.debug(f"VAD: speech started at {elapsed:.2f}s")
+                self.in_speech = True
+                self.speech_detected = True
+                self._onset_count = 0
+                output.extend(self._preroll)
+                self._preroll.clear()
+            elif elapsed >= self.no_speech_timeout:
+                logger.info(f"VAD: no speech within {self.no_speech_timeout}s")
+                self.done = True
+        else:
+            output.append(frame)
+            self._silence_count = 0 if speech else self._silence_count + 1
+            self._peak_db = max(self._peak_db, level_db)
+            
+            if self._silence_count >= self.hangover_frames:
+                if self._peak_db < self.noise_floor_db + self.threshold_db:
+                    # Nothing stood out from the floor it has settled on: the
+                    # "speech" was noise heard before the floor caught up
+                    logger.debug(f"VAD: onset at {elapsed:.2f}s was background noise, still listening")
+                    self.in_speech = False
+                    self.speech_detected = False
+                    self._silence_count = 0
+                    self._peak_db = float("-inf")
+                else:
+                    logger.debug(f"VAD: speech ended at {elapsed:.2f}s")
+                    self.done = True
+        
+        if not self.done and elapsed >= self.max_seconds:
+            logger.info(f"VAD: reached maximum capture of {self.max_seconds}s")
+            self.done = True
+        
+        return output
+
+
+def record_ptt(seconds: float = None, sample_rate: int = None, vad: bool = None) -> np.ndarray:
     """
-    Record audio via push-to-talk (PTT) and save to a temporary WAV file.
+    Record audio via push-to-talk (PTT) into memory.
     
     Records audio from the default microphone in mono format with 16-bit PCM encoding.
-    The recording is saved to a temporary file that persists until manually deleted.
+    With VAD enabled, recording stops as soon as the user stops speaking
+    (up to VAD_MAX_SECONDS); otherwise it records for a fixed duration.
+    Nothing is written to disk unless AUDIO_DEBUG_DUMP_DIR is set.
     
     Args:
-        seconds: Duration to record in seconds (default from PTT_SECONDS env var or 2.5)
+        seconds: Duration to record in seconds (default from PTT_SECONDS env var or 2.5,
+                 or the maximum duration when VAD is enabled)
         sample_rate: Sample rate in Hz (default from AUDIO_SAMPLE_RATE env var or 24000)
+        vad: Stop at end of speech (default from VAD_ENABLED env var or True)
     
     Returns:
-        str: Path to the saved WAV file
+        np.ndarray: int16 mono samples at sample_rate
     
     Raises:
-        Exception: If recording fails
+        Exception: If recording fails or no speech is detected
     """
-    # Get configuration from environment or use defaults
-    if seconds is None:
-        seconds = float(os.getenv("PTT_SECONDS", "2.5"))
+    if vad is None:
+        vad = _vad_enabled()
     
     if sample_rate is None:
         sample_rate = int(os.getenv("AUDIO_SAMPLE_RATE", "24000"))
     
-    logger.info(f"Recording {seconds}s of audio at {sample_rate}Hz...")
-    
     try:
-        # Record audio (mono, blocking call)
-        # dtype='int16' gives us 16-bit PCM directly
-        audio_data = sd.rec(
-            int(seconds * sample_rate),
-            samplerate=sample_rate,
-            channels=1,
-            dtype='int16',
-            blocking=True
-        )
-        
-        logger.debug("Recording complete, waiting for device...")
-        sd.wait()  # Ensure recording is complete
-        
-        # Create temporary WAV file
-        # delete=False keeps the file after the handle closes
-        temp_file = tempfile.NamedTemporaryFile(
-            suffix='.wav',
-            prefix='ai_car_',
-            delete=False
-        )
-        temp_path = temp_file.name
-        temp_file.close()  # Close handle so soundfile can write
-        
-        # Write audio data to WAV file with proper format
-        # subtype='PCM_16' ensures 16-bit PCM encoding
-        sf.write(
-            temp_path,
-            audio_data,
-            sample_rate,
-            subtype='PCM_16'
-        )
-        
-        logger.info(f"Audio saved to {temp_path}")
-        return temp_path
+        if vad:
+            frames = list(stream_microphone(seconds=seconds, sample_rate=sample_rate, vad=True))
+            if not frames:
+                raise RuntimeError("No speech detected")
+            audio_data = np.concatenate(frames)
+            logger.info(f"Recorded {len(audio_data) / sample_rate:.2f}s of speech")
+        else:
+            # Get configuration from environment or use defaults
+            if seconds is None:
+                seconds = float(os.getenv("PTT_SECONDS", "2.5"))
+            
+            logger.info(f"Recording {seconds}s of audio at {sample_rate}Hz...")
+            
+            # Record audio (mono, blocking call)
+            # dtype='int16' gives us 16-bit PCM directly
+            audio_data = sd.rec(
+                int(seconds * sample_rate),
+                samplerate=sample_rate,
+                channels=1,
+                dtype='int16',
+                blocking=True
+            )
+            
+            logger.debug("Recording complete, waiting for device...")
+            sd.wait()  # Ensure recording is complete
+            audio_data = audio_data[:, 0]
+        
+        dump_debug_audio(audio_data, sample_rate, "ai_car_")
+        return audio_data
     
     except Exception as e:
         logger.error(f"Audio recording failed: {e}")
         raise
 
 
-def play_audio(wav_path: str) -> None:
+def stream_microphone(seconds: float = None, sample_rate: int = None, frame_ms: int = None,
+                      vad: bool = None) -> Iterator[np.ndarray]:
     """
-    Play audio from a WAV file.
+    Stream microphone audio as a generator of small PCM frames.
     
-    Uses sounddevice for simple, cross-platform playback.
-    Blocks until playback is complete.
+    Frames are yielded as soon as the audio device delivers them, so a
+    consumer (e.g. streaming ASR) can start working while the user is
+    still talking. With VAD enabled, only the utterance (plus pre-roll) is
+    yielded and the stream ends as soon as speech ends.
     
     Args:
-        wav_path: Path to WAV file to play
+        seconds: Maximum duration to capture in seconds (default from VAD_MAX_SECONDS
+                 or 8 with VAD, otherwise PTT_SECONDS or 2.5)
+        sample_rate: Sample rate in Hz (default from AUDIO_SAMPLE_RATE env var or 24000)
+        frame_ms: Frame size in milliseconds (default from AUDIO_FRAME_MS env var or 30)
+        vad: Stop at end of speech (default from VAD_ENABLED env var or True)
+    
+    Yields:
+        np.ndarray: int16 mono frames of shape (frame_samples,)
+    """
+    if vad is None:
+        vad = _vad_enabled()
+    
+    if seconds is None:
+        if vad:
+            seconds = float(os.getenv("VAD_MAX_SECONDS", "8"))
+        else:
+            seconds = float(os.getenv("PTT_SECONDS", "2.5"))
+    
+    if sample_rate is None:
+        sample_rate = int(os.getenv("AUDIO_SAMPLE_RATE", "24000"))
+    
+    if frame_ms is None:
+        frame_ms = int(os.getenv("AUDIO_FRAME_MS", "30"))
+    
+    frame_samples = int(sample_rate * frame_ms / 1000)
+    total_samples = int(seconds * sample_rate)
+    frames: "queue.Queue[np.ndarray]" = queue.Queue()
+    endpointer = VadEndpointer(sample_rate, frame_ms=frame_ms, max_seconds=seconds) if vad else None
+    
+    def callback(indata, frame_count, time_info, status):
+        if status:
+            logger.debug(f"Input stream status: {status}")
+        frames.put(indata[:, 0].copy())
+    
+    logger.info(f"Streaming up to {seconds}s of audio at {sample_rate}Hz (VAD {'on' if vad else 'off'})...")
+    
+    captured = 0
+    with sd.InputStream(
+        samplerate=sample_rate,
+        channels=1,
+        dtype='int16',
+        blocksize=frame_samples,
+        callback=callback
+    ):
+        while captured < total_samples:
+            frame = frames.get(timeout=1.0)
+            frame = frame[:total_samples - captured]
+            captured += len(frame)
+            
+            if endpointer is None:
+                yield frame
+                continue
+            
+            for speech_frame in endpointer.process(frame):
+                yield speech_frame
+            
+            if endpointer.done:
+                break
+    
+    logger.debug(f"Audio stream closed after {captured / sample_rate:.2f}s")
+
+
+def _to_mono(audio: np.ndarray) -> np.ndarray:
+    """Downmix multi-channel audio (as returned by soundfile) to mono."""
+    audio = np.asarray(audio)
+    return audio.mean(axis=1) if audio.ndim > 1 else audio
+
+
+def _wait_for_source(source: MixerSource, cancel: Optional[threading.Event] = None) -> None:
+    """
+    Block until a mixer source has played out, cancelling it if `cancel` is set.
+    
+    Args:
+        source: Source to wait for
+        cancel: Event that stops playback early when set
+    """
+    while not source.wait(0.05):
+        if cancel is not None and cancel.is_set():
+            source.cancel()
+    if source.first_audio_at is not None:
+        mark("first_audio", since="capture", at=source.first_audio_at)
+
+
+def play_audio(audio: Union[np.ndarray, str], sample_rate: int = 24000) -> None:
+    """
+    Play in-memory PCM audio (or, for debugging, a WAV file).
+    
+    The samples are queued on a speech source of the shared mixer, so
+    there is no device open per utterance and music or radio underneath
+    is ducked while it plays. Blocks until playback is complete.
+    
+    Args:
+        audio: int16/float samples, or a path to a WAV file
+        sample_rate: Sample rate of the samples (Boson TTS outputs 24kHz)
     """
     try:
-        logger.info(f"Playing audio from {wav_path}")
-        
-        # Read WAV file
-        audio_data, sample_rate = sf.read(wav_path)
+        if isinstance(audio, str):
+            logger.info(f"Playing audio from {audio}")
+            audio_data, sample_rate = sf.read(audio, dtype='float32')
+        else:
+            logger.info(f"Playing {len(audio) / sample_rate:.2f}s of audio")
+            audio_data = audio
         
-        # Play audio (blocking)
-        sd.play(audio_data, sample_rate, blocking=True)
-        sd.wait()
+        source = get_mixer().source("speech", PRIORITY_SPEECH)
+        try:
+            source.write(_to_mono(audio_data), sample_rate)
+        finally:
+            source.close()
+        _wait_for_source(source)
         
         logger.debug("Audio playback complete")
     
@@ -106,28 +384,143 @@ def play_audio(wav_path: str) -> None:
         raise
 
 
-def play_local_audio(file_path: str) -> None:
+def stop_playback() -> None:
+    """
+    Interrupt speech and music playback in progress.
+    
+    Cancels every interruptible mixer source (play_audio, play_stream,
+    play_local_audio); the radio keeps streaming.
+    """
+    try:
+        get_mixer().stop_playback()
+    except Exception as e:
+        logger.debug(f"Stopping playback failed: {e}")
+
+
+def play_stream(
+    chunks: Iterable[np.ndarray],
+    sample_rate: int = 24000,
+    prefill_ms: int = None,
+    cancel: Optional[threading.Event] = None
+) -> None:
+    """
+    Play a stream of PCM chunks as they arrive.
+    
+    Chunks are pulled from the iterable on a producer thread into a mixer
+    speech source, which starts playing as soon as the prefill is
+    reached. Blocks until everything has been played.
+    
+    Args:
+        chunks: Iterable of int16 mono chunks (e.g. boson_api.tts_stream)
+        sample_rate: Sample rate of the chunks
+        prefill_ms: Audio to buffer before starting (default from TTS_PREFILL_MS or 120)
+        cancel: Event that stops playback early when set
+    """
+    if cancel is None:
+        cancel = threading.Event()
+    if prefill_ms is None:
+        prefill_ms = int(os.getenv("TTS_PREFILL_MS", "120"))
+    
+    start = time.monotonic()
+    mixer = get_mixer()
+    source = mixer.source("speech", PRIORITY_SPEECH, prefill=int(mixer.sample_rate * prefill_ms / 1000))
+    errors = []
+    
+    def produce():
+        try:
+            for chunk in chunks:
+                if cancel.is_set() or not source.write(chunk, sample_rate):
+                    break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            source.close()
+    
+    producer = threading.Thread(target=bind(produce), daemon=True)
+    producer.start()
+    
+    try:
+        _wait_for_source(source, cancel)
+        producer.join()
+        if errors:
+            raise errors[0]
+        
+        if cancel.is_set():
+            logger.info("Streaming playback cancelled")
+        elif source.first_audio_at is None:
+            logger.warning("Audio stream produced no samples")
+        else:
+            logger.info(
+                f"Streamed playback: first audio after {(source.first_audio_at - start) * 1000:.0f}ms, "
+                f"{source.underruns} underruns"
+            )
+    
+    except Exception as e:
+        logger.error(f"Streaming playback failed: {e}")
+        raise
+
+
+def music_source() -> MixerSource:
+    """
+    Create a music source for play_local_audio without starting it.
+    
+    Lets the caller follow the song's playback (start event, audio clock)
+    while play_local_audio feeds it.
+    
+    Returns:
+        MixerSource: Unstarted music source at the mixer rate
+    """
+    prefill_ms = int(os.getenv("LOCAL_AUDIO_PREFILL_MS", "200"))
+    mixer = get_mixer()
+    return MixerSource("music", PRIORITY_MUSIC, mixer.sample_rate, prefill=int(mixer.sample_rate * prefill_ms / 1000))
+
+
+def play_local_audio(
+    file_path: str,
+    max_seconds: Optional[float] = None,
+    source: Optional[MixerSource] = None
+) -> None:
     """
     Play a local audio file (MP3, WAV, etc.).
     
-    Supports various formats via soundfile.
-    Blocks until playback is complete.
+    Supports various formats via soundfile. The file is decoded block by
+    block as float32 into a music source of the shared mixer (replacing
+    any music already playing), so sound starts after the first blocks
+    instead of after decoding the whole file, and memory stays at the
+    size of the ring buffer. Blocks until playback is complete.
     
     Args:
         file_path: Path to audio file to play
+        max_seconds: Stop after this many seconds (default: play the whole file)
+        source: Source from music_source() to play into (default: a new one)
     """
+    block_ms = int(os.getenv("LOCAL_AUDIO_BLOCK_MS", "100"))
+    if source is None:
+        source = music_source()
+    
     try:
         logger.info(f"Playing local audio: {file_path}")
         
-        # Read audio file (soundfile supports many formats)
-        audio_data, sample_rate = sf.read(file_path)
+        with sf.SoundFile(file_path) as song:
+            frames = -1 if max_seconds is None else int(max_seconds * song.samplerate)
+            get_mixer().add(source, preempt=True)
+            try:
+                blocks = song.blocks(
+                    blocksize=int(song.samplerate * block_ms / 1000), frames=frames, dtype='float32'
+                )
+                for block in blocks:
+                    if not source.write(_to_mono(block), song.samplerate):
+                        break
+            finally:
+                source.close()
         
-        # Play audio (blocking)
-        sd.play(audio_data, sample_rate, blocking=True)
-        sd.wait()
+        _wait_for_source(source)
         
         logger.info("Audio playback complete")
     
     except Exception as e:
+        # Nothing will play: release anyone waiting on the source
+        source.cancel()
+        source.done.set()
         logger.error(f"Local audio playback failed: {e}")
         raise
@@ -1,76 +1,285 @@
 """
 Boson API Integration
-Handles communication with the Boson AI service for ASR and TTS.
+Handles communication with the Boson AI service for ASR and TTS, and picks
+the ASR backend (Boson, on-device commands, or both).
 """
 
 import os
+import re
+import time
 import base64
 import logging
-import tempfile
-import wave
-import openai
-from tenacity import retry, stop_after_attempt, wait_exponential
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+import numpy as np
+
+from app.asr_upload import prepare_asr_upload
+from app.audio_codec import decode_audio, pcm_to_array, dump_debug_audio
+from app.boson_client import get_boson_client
+from app.call_policy import get_call_policy, turn_deadline
+from app.tts_cache import get_tts_cache
+from app.tracing import bind, span
 
 logger = logging.getLogger(__name__)
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10)
-)
-def asr_transcribe(wav_path: str) -> str:
+# Boson TTS returns 16-bit mono PCM at 24kHz
+TTS_SAMPLE_RATE = 24000
+TTS_MODEL = "higgs-audio-generation-Hackathon"
+
+
+@dataclass
+class AsrResult:
+    """
+    A transcript and how sure the recognizer is of it.
+
+    Attributes:
+        text: Transcribed text ("" if nothing was recognized)
+        confidence: 0..1 (Boson transcripts count as 1.0)
+        backend: Name of the backend that produced the text
+    """
+    text: str
+    confidence: float
+    backend: str
+
+
+class AsrBackend(ABC):
+    """
+    Speech recognizer behind asr_transcribe.
+
+    Backends take in-memory int16 mono PCM and must be safe to call from
+    worker threads.
+    """
+
+    name = "asr"
+
+    @abstractmethod
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> AsrResult:
+        """
+        Transcribe one recorded utterance.
+
+        Args:
+            audio: int16 mono samples
+            sample_rate: Sample rate of the samples
+
+        Returns:
+            AsrResult: Transcript and confidence
+        """
+
+    def transcribe_window(self, audio: np.ndarray, sample_rate: int) -> AsrResult:
+        """
+        Transcribe one window of a streamed utterance (see StreamingTranscriber).
+
+        Args:
+            audio: int16 mono samples
+            sample_rate: Sample rate of the samples
+
+        Returns:
+            AsrResult: Transcript and confidence
+        """
+        return self.transcribe(audio, sample_rate)
+
+    def stats(self) -> dict:
+        """Backend-specific counters."""
+        return {}
+
+
+class BosonAsrBackend(AsrBackend):
+    """Boson's higgs-audio-understanding model (open vocabulary, needs the network)."""
+
+    name = "boson"
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> AsrResult:
+        upload = prepare_asr_upload(audio, sample_rate)
+        logger.info(
+            f"Transcribing {upload.source_seconds:.2f}s of audio "
+            f"({upload.seconds:.2f}s {upload.file_format}, {upload.wire_bytes / 1024:.1f} KiB upload)"
+        )
+        return AsrResult(asr_transcribe_bytes(upload.data, upload.file_format), 1.0, self.name)
+
+    def transcribe_window(self, audio: np.ndarray, sample_rate: int) -> AsrResult:
+        # Windows are not trimmed: silence inside the stream keeps the overlap aligned
+        upload = prepare_asr_upload(audio, sample_rate, trim=False)
+        logger.debug(f"Transcribing ASR window ({upload.seconds:.2f}s, {upload.wire_bytes / 1024:.1f} KiB upload)")
+        return AsrResult(asr_transcribe_bytes(upload.data, upload.file_format), 1.0, self.name)
+
+
+class HybridAsrBackend(AsrBackend):
+    """
+    Local recognizer first, Boson only when the local result is not confident.
+
+    Short commands from the grammar ("pause", "stop the car") are answered
+    on the device without a network round trip; everything else, and any
+    command the local recognizer is unsure of, goes to the remote backend.
+    """
+
+    name = "hybrid"
+
+    def __init__(self, local: AsrBackend, remote: AsrBackend, min_confidence: Optional[float] = None):
+        """
+        Initialize the hybrid backend.
+
+        Args:
+            local: On-device recognizer
+            remote: Fallback recognizer
+            min_confidence: Local confidence needed to skip the remote call
+                            (default from ASR_LOCAL_MIN_CONFIDENCE or 0.2)
+        """
+        if min_confidence is None:
+            min_confidence = float(os.getenv("ASR_LOCAL_MIN_CONFIDENCE", "0.2"))
+        self.local = local
+        self.remote = remote
+        self.min_confidence = min_confidence
+        self.local_hits = 0
+        self.remote_calls = 0
+        self._lock = threading.Lock()
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> AsrResult:
+        return self._transcribe(audio, sample_rate, window=False)
+
+    def transcribe_window(self, audio: np.ndarray, sample_rate: int) -> AsrResult:
+        return self._transcribe(audio, sample_rate, window=True)
+
+    def _transcribe(self, audio: np.ndarray, sample_rate: int, window: bool) -> AsrResult:
+        """Try the local recognizer, then the remote one (window: use the remote's window path)."""
+        with span("asr_local"):
+            try:
+                result = self.local.transcribe(audio, sample_rate)
+            except Exception as e:
+                logger.error(f"Local ASR failed: {e}")
+                result = AsrResult("", 0.0, self.local.name)
+
+        if result.text and result.confidence >= self.min_confidence:
+            with self._lock:
+                self.local_hits += 1
+            logger.info(f"Local transcript: '{result.text}' (confidence {result.confidence:.2f})")
+            return result
+
+        logger.debug(f"Local ASR not confident ({result.confidence:.2f}), asking {self.remote.name}")
+        with self._lock:
+            self.remote_calls += 1
+        if window:
+            return self.remote.transcribe_window(audio, sample_rate)
+        return self.remote.transcribe(audio, sample_rate)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"local": self.local_hits, "remote": self.remote_calls, **self.local.stats()}
+
+
+# Global ASR backend instance
+_asr_backend: Optional[AsrBackend] = None
+_asr_backend_lock = threading.Lock()
+
+
+def _create_asr_backend() -> AsrBackend:
+    """Build the backend named by ASR_BACKEND (boson, local or hybrid)."""
+    templates = os.getenv("ASR_LOCAL_TEMPLATES", "")
+    kind = os.getenv("ASR_BACKEND", "hybrid" if templates else "boson").lower()
+    if kind == "boson":
+        return BosonAsrBackend()
+
+    from app.local_asr import LocalCommandRecognizer
+
+    local = LocalCommandRecognizer.from_directory(templates)
+    if local is None:
+        logger.warning(f"No local ASR templates in '{templates}', using Boson for every turn")
+        return BosonAsrBackend()
+    if kind == "local":
+        return local
+    return HybridAsrBackend(local, BosonAsrBackend())
+
+
+def get_asr_backend() -> AsrBackend:
     """
-    Transcribe a WAV file using Boson's higgs-audio-understanding model.
+    Get or create the global ASR backend.
+
+    Returns:
+        AsrBackend: Backend chosen by ASR_BACKEND (default: hybrid when
+        ASR_LOCAL_TEMPLATES is set, else boson)
+    """
+    global _asr_backend
+    if _asr_backend is None:
+        with _asr_backend_lock:
+            if _asr_backend is None:
+                _asr_backend = _create_asr_backend()
+                logger.info(f"ASR backend: {_asr_backend.name}")
+    return _asr_backend
+
+
+def asr_transcribe(audio: Union[np.ndarray, str], sample_rate: int = None) -> str:
+    """
+    Transcribe recorded audio with the configured ASR backend.
+    
+    Audio is normally passed as an in-memory PCM array. With the default
+    Boson backend it is trimmed, resampled and encoded in memory for upload
+    (see app.asr_upload); a file path is still accepted for debugging and
+    sent to Boson as-is.
+    
+    Args:
+        audio: int16 mono samples, or a path to an audio file
+        sample_rate: Sample rate of the samples (default from AUDIO_SAMPLE_RATE env var or 24000)
+    
+    Returns:
+        str: Transcribed text from the audio
+    """
+    if isinstance(audio, str):
+        logger.info(f"Transcribing audio from {audio}")
+        with open(audio, "rb") as audio_file:
+            return asr_transcribe_bytes(audio_file.read(), audio.split(".")[-1])
+    
+    if sample_rate is None:
+        sample_rate = int(os.getenv("AUDIO_SAMPLE_RATE", "24000"))
+    
+    return get_asr_backend().transcribe(audio, sample_rate).text
+
+
+def asr_transcribe_bytes(audio_bytes: bytes, file_format: str = "wav") -> str:
+    """
+    Transcribe encoded audio held in memory.
     
     Args:
-        wav_path: Path to WAV file (24kHz, mono, 16-bit PCM recommended)
+        audio_bytes: Encoded audio file contents (e.g. a complete WAV file)
+        file_format: Audio format ("wav", "flac", "opus", ...)
     
     Returns:
         str: Transcribed text from the audio
     """
     try:
-        # Get API credentials
-        api_key = os.getenv("BOSON_API_KEY")
-        if not api_key:
-            raise ValueError("BOSON_API_KEY environment variable not set")
-        
-        base_url = os.getenv("BOSON_BASE_URL", "https://hackathon.boson.ai/v1")
-        
-        # Create client (using exact pattern from Boson docs)
-        client = openai.Client(
-            api_key=api_key,
-            base_url=base_url
-        )
+        # Shared pooled client (reuses the warm TLS connection)
+        boson = get_boson_client()
+        client = boson.endpoint("asr")
+        policy = get_call_policy("asr", boson.read_timeout("asr"))
         
         # Encode audio to base64
-        with open(wav_path, "rb") as audio_file:
-            audio_base64 = base64.b64encode(audio_file.read()).decode("utf-8")
-        
-        file_format = wav_path.split(".")[-1]
-        
-        logger.info(f"Transcribing audio from {wav_path}")
+        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
         
         # Call Boson ASR (exact pattern from Boson docs)
-        response = client.chat.completions.create(
-            model="higgs-audio-understanding-Hackathon",
-            messages=[
-                {"role": "system", "content": "Transcribe this audio for me."},
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "input_audio",
-                            "input_audio": {
-                                "data": audio_base64,
-                                "format": file_format,
+        with span("asr_request", bytes=len(audio_bytes), wire_bytes=len(audio_base64)):
+            response = policy.call(lambda timeout: client.chat.completions.create(
+                model="higgs-audio-understanding-Hackathon",
+                messages=[
+                    {"role": "system", "content": "Transcribe this audio for me."},
+                    {
+                        "role": "user",
+                        "content": [
+                            {
+                                "type": "input_audio",
+                                "input_audio": {
+                                    "data": audio_base64,
+                                    "format": file_format,
+                                },
                             },
-                        },
-                    ],
-                },
-            ],
-            max_completion_tokens=256,
-            temperature=0.0,
-        )
+                        ],
+                    },
+                ],
+                max_completion_tokens=256,
+                temperature=0.0,
+                timeout=timeout,
+            ))
         
         # Extract transcript
         transcript = response.choices[0].message.content.strip()
@@ -83,85 +292,363 @@ def asr_transcribe(wav_path: str) -> str:
         raise
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10)
-)
-def tts_speak(text: str, voice: str = None) -> str:
+def merge_transcripts(parts: List[str], max_overlap_words: int = 4) -> str:
     """
-    Convert text to speech using Boson's higgs-audio-generation model.
+    Join transcripts of overlapping audio windows into one transcript.
     
-    Returns PCM audio data wrapped in a WAV file.
-    Uses the simple /audio/speech endpoint as recommended.
+    Consecutive windows share a short stretch of audio, so the words at the
+    end of one part are usually repeated at the start of the next. The
+    longest such repeat (compared case- and punctuation-insensitively) is
+    dropped from the later part.
     
     Args:
-        text: Text to convert to speech
-        voice: Voice to use (default from TTS_VOICE env var or "belinda")
+        parts: Window transcripts in capture order
+        max_overlap_words: Longest word run to consider as overlap
     
     Returns:
-        str: Path to generated WAV file
+        str: Merged transcript
     """
-    try:
-        # Get API credentials
-        api_key = os.getenv("BOSON_API_KEY")
-        if not api_key:
-            raise ValueError("BOSON_API_KEY environment variable not set")
+    def norm(word: str) -> str:
+        return re.sub(r"[^\w']", "", word.lower())
+    
+    merged: List[str] = []
+    for part in parts:
+        words = part.split()
+        if not words:
+            continue
         
-        base_url = os.getenv("BOSON_BASE_URL", "https://hackathon.boson.ai/v1")
+        overlap = 0
+        for k in range(min(max_overlap_words, len(merged), len(words)), 0, -1):
+            if [norm(w) for w in merged[-k:]] == [norm(w) for w in words[:k]]:
+                overlap = k
+                break
         
-        # Get voice from parameter or environment
-        if voice is None:
-            voice = os.getenv("TTS_VOICE", "belinda")
+        merged.extend(words[overlap:])
+    
+    return " ".join(merged)
+
+
+class StreamingTranscriber:
+    """
+    Incremental ASR over a live stream of PCM frames.
+    
+    Audio is cut into fixed windows with a small overlap. Each window is
+    sent to the ASR backend as soon as it is complete, while capture
+    continues, so when the user stops talking only the final partial window
+    is left to transcribe. With the hybrid backend a short command fits in
+    one window and is still recognized on the device.
+    """
+    
+    def __init__(self, sample_rate: int = None, window_seconds: float = None,
+                 overlap_seconds: float = None,
+                 on_partial: Optional[Callable[[str], None]] = None,
+                 backend: Optional[AsrBackend] = None):
+        """
+        Initialize the streaming transcriber.
         
-        # Create client
-        client = openai.Client(
-            api_key=api_key,
-            base_url=base_url
-        )
+        Args:
+            sample_rate: Sample rate of incoming frames (default from AUDIO_SAMPLE_RATE or 24000)
+            window_seconds: Window length (default from ASR_WINDOW_SECONDS or 1.5)
+            overlap_seconds: Overlap between windows (default from ASR_OVERLAP_SECONDS or 0.3)
+            on_partial: Optional callback receiving each window transcript as it arrives
+            backend: Recognizer for the windows (default: get_asr_backend())
+        """
+        if sample_rate is None:
+            sample_rate = int(os.getenv("AUDIO_SAMPLE_RATE", "24000"))
+        if window_seconds is None:
+            window_seconds = float(os.getenv("ASR_WINDOW_SECONDS", "1.5"))
+        if overlap_seconds is None:
+            overlap_seconds = float(os.getenv("ASR_OVERLAP_SECONDS", "0.3"))
         
-        logger.info(f"Generating speech: '{text[:50]}...' (voice: {voice})")
+        self.sample_rate = sample_rate
+        self.window_samples = int(window_seconds * sample_rate)
+        self.overlap_samples = min(int(overlap_seconds * sample_rate), self.window_samples // 2)
+        self.on_partial = on_partial
+        self.backend = backend or get_asr_backend()
         
-        # Call Boson TTS (using /audio/speech endpoint)
-        response = client.audio.speech.create(
-            model="higgs-audio-generation-Hackathon",
-            voice=voice,
-            input=text,
-            response_format="pcm"
+        self._buffer = np.zeros(0, dtype=np.int16)
+        self._new_samples = 0  # samples in buffer not yet covered by a submitted window
+        self._futures: List[Future] = []
+        self._executor = ThreadPoolExecutor(
+            max_workers=int(os.getenv("ASR_STREAM_WORKERS", "2")),
+            thread_name_prefix="asr-stream"
         )
+    
+    def feed(self, frame: np.ndarray) -> None:
+        """
+        Add captured PCM to the stream, submitting any completed windows.
         
-        # Get PCM data
-        pcm_data = response.content
+        Args:
+            frame: int16 mono samples
+        """
+        self._buffer = np.concatenate([self._buffer, frame.reshape(-1)])
+        self._new_samples += len(frame)
         
-        # Create temporary WAV file
-        temp_file = tempfile.NamedTemporaryFile(
-            suffix='.wav',
-            prefix='tts_',
-            delete=False
-        )
-        temp_path = temp_file.name
-        temp_file.close()
+        while len(self._buffer) >= self.window_samples:
+            self._submit(self._buffer[:self.window_samples])
+            self._buffer = self._buffer[self.window_samples - self.overlap_samples:]
+            self._new_samples = len(self._buffer) - self.overlap_samples
+    
+    def finish(self) -> str:
+        """
+        Flush the final window and wait for all transcripts.
         
-        # Wrap PCM into WAV format (1 channel, 16-bit, 24kHz as per Boson specs)
-        with wave.open(temp_path, 'wb') as wav_file:
-            wav_file.setnchannels(1)      # Mono
-            wav_file.setsampwidth(2)       # 16-bit
-            wav_file.setframerate(24000)   # 24kHz
-            wav_file.writeframes(pcm_data)
+        Returns:
+            str: Merged transcript of the whole stream
+        """
+        try:
+            if self._new_samples > 0:
+                self._submit(self._buffer)
+            
+            parts = [future.result() for future in self._futures]
+        finally:
+            self._executor.shutdown(wait=False)
         
-        logger.info(f"TTS audio saved to {temp_path}")
+        transcript = merge_transcripts(parts)
+        logger.info(f"Streaming transcript ({len(parts)} windows): '{transcript}'")
+        return transcript
+    
+    def _submit(self, samples: np.ndarray) -> None:
+        """Queue a window for transcription."""
+        logger.debug(f"Submitting ASR window {len(self._futures)} ({len(samples) / self.sample_rate:.2f}s)")
+        self._futures.append(self._executor.submit(bind(self._transcribe_window), samples))
+    
+    def _transcribe_window(self, samples: np.ndarray) -> str:
+        """Transcribe one window and report it as a partial result."""
+        text = self.backend.transcribe_window(samples, self.sample_rate).text
+        if self.on_partial is not None and text:
+            try:
+                self.on_partial(text)
+            except Exception as e:
+                logger.error(f"Partial transcript callback failed: {e}")
+        return text
+
+
+def asr_transcribe_stream(frames: Iterable[np.ndarray], sample_rate: int = None,
+                          on_partial: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Transcribe a live stream of PCM frames while they are being captured.
+    
+    Args:
+        frames: Iterable of int16 mono frames (e.g. from audio_io.stream_microphone)
+        sample_rate: Sample rate of the frames (default from AUDIO_SAMPLE_RATE or 24000)
+        on_partial: Optional callback receiving each window transcript as it arrives
+    
+    Returns:
+        str: Transcribed text from the audio
+    """
+    transcriber = StreamingTranscriber(sample_rate=sample_rate, on_partial=on_partial)
+    for frame in frames:
+        transcriber.feed(frame)
+    return transcriber.finish()
+
+
+def tts_speak(text: str, voice: str = None) -> np.ndarray:
+    """
+    Convert text to speech using Boson's higgs-audio-generation model.
+    
+    Returns the PCM audio in memory (16-bit mono at TTS_SAMPLE_RATE).
+    Uses the simple /audio/speech endpoint as recommended. Results are
+    served from the on-disk TTS cache when the same text was spoken before.
+    
+    Args:
+        text: Text to convert to speech
+        voice: Voice to use (default from TTS_VOICE env var or "belinda")
+    
+    Returns:
+        np.ndarray: int16 samples (memory-mapped on a cache hit)
+    """
+    # Get voice from parameter or environment
+    if voice is None:
+        voice = os.getenv("TTS_VOICE", "belinda")
+    
+    cache = get_tts_cache()
+    if cache is not None:
+        cached = cache.get(text, voice, TTS_MODEL)
+        if cached is not None:
+            logger.info(f"TTS cache hit: '{text[:50]}...' ({len(cached) / TTS_SAMPLE_RATE:.2f}s)")
+            return cached
+    
+    audio = _synthesize_speech(text, voice)
+    
+    if cache is not None:
+        cache.put(text, voice, TTS_MODEL, audio)
+    
+    return audio
+
+
+def _synthesize_speech(text: str, voice: str) -> np.ndarray:
+    """
+    Call the /audio/speech endpoint and return the PCM audio.
+    
+    Args:
+        text: Text to convert to speech
+        voice: Voice to use
+    
+    Returns:
+        np.ndarray: int16 samples viewing the response body (no copy)
+    """
+    try:
+        # Shared pooled client
+        boson = get_boson_client()
+        client = boson.endpoint("tts")
+        policy = get_call_policy("tts", boson.read_timeout("tts"))
         
-        return temp_path
+        logger.info(f"Generating speech: '{text[:50]}...' (voice: {voice})")
+        
+        # Call Boson TTS (using /audio/speech endpoint)
+        with span("tts_request", chars=len(text)):
+            response = policy.call(lambda timeout: client.audio.speech.create(
+                model=TTS_MODEL,
+                voice=voice,
+                input=text,
+                response_format="pcm",
+                timeout=timeout
+            ))
+        
+        # View PCM data (1 channel, 16-bit, 24kHz as per Boson specs) without copying
+        audio = pcm_to_array(response.content)
+        
+        logger.info(f"TTS audio received: {len(audio) / TTS_SAMPLE_RATE:.2f}s")
+        dump_debug_audio(audio, TTS_SAMPLE_RATE, "tts_")
+        
+        return audio
     
     except Exception as e:
         logger.error(f"TTS generation failed: {str(e)[:100]}")
         raise
 
 
-@retry(
-    stop=stop_after_attempt(3),
-    wait=wait_exponential(multiplier=1, min=2, max=10)
-)
-def tts_speak_custom_voice(text: str, reference_audio_path: str = None, reference_transcript: str = None) -> str:
+def prewarm_tts_cache(texts: Iterable[str], voice: str = None) -> int:
+    """
+    Synthesize fixed responses ahead of time so they play from the cache.
+    
+    Args:
+        texts: Response strings to synthesize
+        voice: Voice to use (default from TTS_VOICE env var or "belinda")
+    
+    Returns:
+        int: Number of responses newly synthesized
+    """
+    cache = get_tts_cache()
+    if cache is None:
+        return 0
+    
+    if voice is None:
+        voice = os.getenv("TTS_VOICE", "belinda")
+    
+    synthesized = 0
+    for text in dict.fromkeys(texts):
+        if cache.contains(text, voice, TTS_MODEL):
+            continue
+        try:
+            cache.put(text, voice, TTS_MODEL, _synthesize_speech(text, voice))
+            synthesized += 1
+        except Exception as e:
+            logger.warning(f"TTS pre-warm failed for '{text[:50]}': {str(e)[:100]}")
+    
+    logger.info(f"TTS cache pre-warmed: {synthesized} new, {cache.stats()['entries']} total entries")
+    return synthesized
+
+
+def _open_speech_stream(text: str, voice: str):
+    """
+    Start a streaming /audio/speech request.
+    
+    Only opening the request is retried; once audio has started flowing
+    a failure can't be retried without replaying what was already heard.
+    Opening is never hedged, since the losing stream would have to be
+    torn down mid-flight.
+    
+    Returns:
+        Tuple of (context manager, streamed response)
+    """
+    boson = get_boson_client()
+    client = boson.endpoint("tts")
+    policy = get_call_policy("tts_stream", boson.read_timeout("tts"), hedge=False)
+    
+    def open_stream(timeout: float):
+        manager = client.audio.speech.with_streaming_response.create(
+            model=TTS_MODEL,
+            voice=voice,
+            input=text,
+            response_format="pcm",
+            timeout=timeout
+        )
+        return manager, manager.__enter__()
+    
+    return policy.call(open_stream)
+
+
+def tts_stream(text: str, voice: str = None, chunk_bytes: int = None) -> Iterator[np.ndarray]:
+    """
+    Stream speech from Boson's /audio/speech endpoint as it is generated.
+    
+    The HTTP body is read incrementally and yielded as PCM chunks, so
+    playback can start on the first chunk instead of the whole utterance.
+    Cached responses are yielded straight from the TTS cache, and a fully
+    streamed response is added to it.
+    
+    Args:
+        text: Text to convert to speech
+        voice: Voice to use (default from TTS_VOICE env var or "belinda")
+        chunk_bytes: Read size for the HTTP body (default from TTS_CHUNK_BYTES or 4800, i.e. 100ms)
+    
+    Yields:
+        np.ndarray: int16 mono chunks at TTS_SAMPLE_RATE
+    """
+    if voice is None:
+        voice = os.getenv("TTS_VOICE", "belinda")
+    
+    if chunk_bytes is None:
+        chunk_bytes = int(os.getenv("TTS_CHUNK_BYTES", "4800"))
+    
+    cache = get_tts_cache()
+    if cache is not None:
+        cached = cache.get(text, voice, TTS_MODEL)
+        if cached is not None:
+            logger.info(f"TTS cache hit: '{text[:50]}...' ({len(cached) / TTS_SAMPLE_RATE:.2f}s)")
+            step = chunk_bytes // 2
+            for offset in range(0, len(cached), step):
+                yield cached[offset:offset + step]
+            return
+    
+    logger.info(f"Streaming speech: '{text[:50]}...' (voice: {voice})")
+    
+    try:
+        # Time to response headers; the body is timed by playback
+        with span("tts_request", chars=len(text), streaming=True):
+            manager, response = _open_speech_stream(text, voice)
+    except Exception as e:
+        logger.error(f"TTS stream failed: {str(e)[:100]}")
+        raise
+    
+    total_bytes = 0
+    carry = b""
+    received: List[np.ndarray] = []
+    try:
+        for chunk in response.iter_bytes(chunk_bytes):
+            total_bytes += len(chunk)
+            
+            # Keep sample alignment across chunk boundaries
+            data = carry + chunk
+            usable = len(data) - (len(data) % 2)
+            carry = data[usable:]
+            
+            if usable:
+                samples = pcm_to_array(data[:usable])
+                received.append(samples)
+                yield samples
+    finally:
+        manager.__exit__(None, None, None)
+    
+    logger.info(f"TTS stream complete: {total_bytes / 2 / TTS_SAMPLE_RATE:.2f}s")
+    
+    if cache is not None and received:
+        cache.put(text, voice, TTS_MODEL, np.concatenate(received))
+
+
+def tts_speak_custom_voice(text: str, reference_audio_path: str = None, reference_transcript: str = None) -> np.ndarray:
     """
     Convert text to speech using custom voice cloning.
     
@@ -174,26 +661,18 @@ def tts_speak_custom_voice(text: str, reference_audio_path: str = None, referenc
         reference_transcript: Transcript of reference audio (optional, uses default if not provided)
     
     Returns:
-        str: Path to generated WAV file
+        np.ndarray: int16 samples at TTS_SAMPLE_RATE
     """
     try:
-        # Get API credentials
-        api_key = os.getenv("BOSON_API_KEY")
-        if not api_key:
-            raise ValueError("BOSON_API_KEY environment variable not set")
-        
-        base_url = os.getenv("BOSON_BASE_URL", "https://hackathon.boson.ai/v1")
-        
         # Use default reference if not provided
         # For MVP, we'll use a simple friendly voice profile
         if reference_transcript is None:
             reference_transcript = "[SPEAKER1] Hello! I'm your AI car assistant. I'm here to help you with navigation and entertainment."
         
-        # Create client
-        client = openai.Client(
-            api_key=api_key,
-            base_url=base_url
-        )
+        # Shared pooled client
+        boson = get_boson_client()
+        client = boson.endpoint("tts")
+        policy = get_call_policy("tts_custom", boson.read_timeout("tts"))
         
         logger.info(f"Generating custom voice speech: '{text[:50]}...'")
         
@@ -228,7 +707,7 @@ Audio is recorded from inside a car cabin with minimal background noise.
         messages.append({"role": "user", "content": f"[SPEAKER1] {text}"})
         
         # Call Boson custom voice TTS
-        response = client.chat.completions.create(
+        response = policy.call(lambda timeout: client.chat.completions.create(
             model="higgs-audio-generation-Hackathon",
             messages=messages,
             modalities=["text", "audio"],
@@ -237,29 +716,29 @@ Audio is recorded from inside a car cabin with minimal background noise.
             top_p=0.95,
             stream=False,
             stop=["<|eot_id|>", "<|end_of_text|>", "<|audio_eos|>"],
-            extra_body={"top_k": 50}
-        )
+            extra_body={"top_k": 50},
+            timeout=timeout
+        ))
         
         # Get audio data
         audio_b64 = response.choices[0].message.audio.data
         audio_data = base64.b64decode(audio_b64)
         
-        # Save to temporary WAV file
-        temp_file = tempfile.NamedTemporaryFile(
-            suffix='.wav',
-            prefix='tts_custom_',
-            delete=False
-        )
-        temp_path = temp_file.name
-        temp_file.write(audio_data)
-        temp_file.close()
+        # Decode the returned WAV in memory
+        audio, sample_rate = decode_audio(audio_data)
+        if sample_rate != TTS_SAMPLE_RATE:
+            raise ValueError(f"Unexpected custom voice sample rate: {sample_rate}Hz")
         
-        logger.info(f"Custom voice TTS audio saved to {temp_path}")
+        logger.info(f"Custom voice TTS audio received: {len(audio) / sample_rate:.2f}s")
+        dump_debug_audio(audio, sample_rate, "tts_custom_")
         
-        return temp_path
+        return audio
     
     except Exception as e:
         logger.error(f"Custom voice TTS failed: {str(e)[:100]}")
-        # Fallback to simple TTS
+        # Fall back to simple TTS only while the turn's budget allows another request
+        deadline = turn_deadline()
+        if deadline is not None and time.monotonic() >= deadline:
+            raise
         logger.info("Falling back to simple TTS")
         return tts_speak(text)
@@ -0,0 +1,238 @@
+"""
+Boson Client
+Shared, long-lived HTTP client for all Boson API calls (ASR, TTS and chat).
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Dict, Optional
+
+import httpx
+import openai
+
+logger = logging.getLogger(__name__)
+
+
+# Default per-endpoint read timeouts in seconds
+DEFAULT_TIMEOUTS = {
+    "asr": 15.0,
+    "tts": 30.0,
+    "chat": 20.0,
+    "warmup": 5.0,
+}
+
+
+class BosonClient:
+    """
+    Pooled OpenAI-compatible client shared by every Boson endpoint.
+
+    Keeps one HTTP connection pool alive for the lifetime of the process so
+    ASR, TTS and chat requests reuse the same TLS connections instead of
+    paying for a fresh handshake on every call.
+    """
+
+    def __init__(self):
+        """Initialize the shared client from environment configuration."""
+        api_key = os.getenv("BOSON_API_KEY")
+        if not api_key:
+            raise ValueError("BOSON_API_KEY environment variable not set")
+
+        self.base_url = os.getenv("BOSON_BASE_URL", "https://hackathon.boson.ai/v1")
+        self.connect_timeout = float(os.getenv("BOSON_CONNECT_TIMEOUT", "5.0"))
+        self.keepalive_interval = float(os.getenv("BOSON_KEEPALIVE_INTERVAL", "0"))
+
+        limits = httpx.Limits(
+            max_connections=int(os.getenv("BOSON_POOL_MAX_CONNECTIONS", "8")),
+            max_keepalive_connections=int(os.getenv("BOSON_POOL_MAX_KEEPALIVE", "4")),
+            keepalive_expiry=float(os.getenv("BOSON_KEEPALIVE_EXPIRY", "120")),
+        )
+
+        # Connection reuse counters (updated from httpx hooks, possibly from many threads)
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._connections_opened = 0
+        self._tls_handshakes = 0
+
+        self._http_client = httpx.Client(
+            limits=limits,
+            timeout=httpx.Timeout(DEFAULT_TIMEOUTS["chat"], connect=self.connect_timeout),
+            event_hooks={
+                "request": [self._on_request],
+                "response": [self._on_response],
+            },
+        )
+
+        # Retries are handled per endpoint by app.call_policy, so disable the SDK's own
+        self._client = openai.Client(
+            api_key=api_key,
+            base_url=self.base_url,
+            http_client=self._http_client,
+            max_retries=0,
+        )
+
+        self._endpoints: Dict[str, openai.Client] = {}
+        self._keepalive_stop = threading.Event()
+        self._keepalive_thread: Optional[threading.Thread] = None
+
+        logger.info(
+            f"Boson client ready ({self.base_url}, pool={limits.max_connections}, "
+            f"keepalive={limits.max_keepalive_connections}/{limits.keepalive_expiry}s)"
+        )
+
+    def endpoint(self, name: str) -> openai.Client:
+        """
+        Get the shared client configured with the timeout for an endpoint.
+
+        Every endpoint view shares the same underlying connection pool.
+
+        Args:
+            name: Endpoint name ("asr", "tts", "chat", "warmup")
+
+        Returns:
+            openai.Client: Client with per-endpoint timeout applied
+        """
+        client = self._endpoints.get(name)
+        if client is None:
+            client = self._client.with_options(
+                timeout=httpx.Timeout(self.read_timeout(name), connect=self.connect_timeout)
+            )
+            self._endpoints[name] = client
+        return client
+
+    def read_timeout(self, name: str) -> float:
+        """
+        Get the configured read timeout of an endpoint.
+
+        Args:
+            name: Endpoint name ("asr", "tts", "chat", "warmup")
+
+        Returns:
+            float: Seconds (from BOSON_TIMEOUT_<NAME> or DEFAULT_TIMEOUTS)
+        """
+        env_name = f"BOSON_TIMEOUT_{name.upper()}"
+        return float(os.getenv(env_name, str(DEFAULT_TIMEOUTS.get(name, 20.0))))
+
+    def warm_up(self) -> bool:
+        """
+        Open a connection to the Boson endpoint ahead of the first voice turn.
+
+        Any HTTP response (even an error status) means the TCP and TLS
+        handshakes are done and the connection is parked in the pool.
+
+        Returns:
+            bool: True if the endpoint was reachable
+        """
+        start = time.monotonic()
+        try:
+            self.endpoint("warmup").models.list()
+        except openai.APIStatusError as e:
+            logger.debug(f"Warm-up returned HTTP {e.status_code} (connection still warmed)")
+        except Exception as e:
+            logger.warning(f"Boson warm-up failed: {str(e)[:100]}")
+            return False
+
+        logger.info(f"Boson connection warmed up in {(time.monotonic() - start) * 1000:.0f}ms")
+
+        if self.keepalive_interval > 0 and self._keepalive_thread is None:
+            self._keepalive_thread = threading.Thread(target=self._keepalive_loop, daemon=True)
+            self._keepalive_thread.start()
+
+        return True
+
+    def _keepalive_loop(self) -> None:
+        """Periodically touch the endpoint so idle connections are not dropped."""
+        while not self._keepalive_stop.wait(self.keepalive_interval):
+            try:
+                self.endpoint("warmup").models.list()
+            except openai.APIStatusError:
+                pass
+            except Exception as e:
+                logger.debug(f"Boson keep-alive ping failed: {str(e)[:100]}")
+
+    def _on_request(self, request: httpx.Request) -> None:
+        """httpx request hook: attach a connection trace to the request."""
+        request.extensions["trace"] = self._trace
+
+    def _trace(self, event_name: str, info: dict) -> None:
+        """httpcore trace callback: count new connections and TLS handshakes."""
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._connections_opened += 1
+        elif event_name == "connection.start_tls.complete":
+            with self._lock:
+                self._tls_handshakes += 1
+
+    def _on_response(self, response: httpx.Response) -> None:
+        """httpx response hook: count completed requests."""
+        with self._lock:
+            self._requests += 1
+            requests, opened = self._requests, self._connections_opened
+        logger.debug(
+            f"Boson HTTP {response.request.method} {response.request.url.path}: "
+            f"{requests} requests over {opened} connections"
+        )
+
+    def stats(self) -> dict:
+        """
+        Get connection reuse statistics.
+
+        Returns:
+            dict: Request count, new connections, TLS handshakes and reused requests
+        """
+        with self._lock:
+            requests = self._requests
+            opened = self._connections_opened
+            handshakes = self._tls_handshakes
+        return {
+            "requests": requests,
+            "connections_opened": opened,
+            "tls_handshakes": handshakes,
+            "reused": max(requests - opened, 0),
+        }
+
+    def log_stats(self) -> None:
+        """Log connection reuse statistics."""
+        stats = self.stats()
+        logger.info(
+            f"Boson HTTP: {stats['requests']} requests, "
+            f"{stats['connections_opened']} connections opened "
+            f"({stats['tls_handshakes']} TLS handshakes), "
+            f"{stats['reused']} requests reused a pooled connection"
+        )
+
+    def close(self) -> None:
+        """Stop keep-alive pings, log reuse statistics and close the pool."""
+        self._keepalive_stop.set()
+        self.log_stats()
+        self._http_client.close()
+
+
+# Global Boson client instance
+_boson_client: Optional[BosonClient] = None
+_boson_client_lock = threading.Lock()
+
+
+def get_boson_client() -> BosonClient:
+    """
+    Get or create the global Boson client instance.
+
+    Returns:
+        BosonClient: Global client instance
+    """
+    global _boson_client
+    if _boson_client is None:
+        with _boson_client_lock:
+            if _boson_client is None:
+                _boson_client = BosonClient()
+    return _boson_client
+
+
+def close_boson_client() -> None:
+    """Close the global Boson client if it was created."""
+    global _boson_client
+    with _boson_client_lock:
+        if _boson_client is not None:
+            _boson_client.close()
+            _boson_client = None
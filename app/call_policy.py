@@ -0,0 +1,351 @@
+"""
+Call Policy
+Deadline-aware retries, hedged requests and circuit breaking for Boson calls.
+"""
+
+import os
+import time
+import random
+import logging
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Optional, TypeVar
+
+import httpx
+import numpy as np
+import openai
+
+from app.tracing import bind, current_trace
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Latencies needed before the p95 is trusted as a hedge delay
+_HEDGE_MIN_SAMPLES = 20
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised without calling the endpoint while its circuit breaker is open."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Whether a failed call may succeed if repeated.
+
+    Connection failures, timeouts, rate limiting and 5xx responses are
+    transient; other 4xx responses and local errors are not.
+
+    Args:
+        error: Exception raised by the call
+
+    Returns:
+        bool: True if retrying makes sense
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500 or error.status_code in (408, 409, 429)
+    return isinstance(error, (openai.APIConnectionError, httpx.TransportError, ConnectionError, TimeoutError))
+
+
+def turn_deadline() -> Optional[float]:
+    """time.monotonic() by which the current turn should be answered, if it has a budget."""
+    trace = current_trace()
+    return trace.deadline if trace is not None else None
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast while an endpoint is down.
+
+    Opens after `failure_threshold` consecutive transient failures. After
+    `reset_s` one trial call is let through (half-open): success closes
+    the circuit, failure opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, reset_s: float):
+        """
+        Initialize a closed breaker.
+
+        Args:
+            name: Endpoint name for logs
+            failure_threshold: Consecutive failures that open the circuit
+            reset_s: Seconds to stay open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_s = reset_s
+        self.opened = 0  # times the circuit opened
+
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """'closed', 'open' or 'half-open'."""
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            return "half-open" if self._trial else "open"
+
+    def allow(self) -> bool:
+        """
+        Check whether a call may go out (claims the trial call when half-open).
+
+        Returns:
+            bool: False while the circuit is open
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial or time.monotonic() - self._opened_at < self.reset_s:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self) -> None:
+        """The endpoint answered: close the circuit."""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Boson {self.name} endpoint is back, circuit closed")
+            self._failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self) -> None:
+        """A transient failure: open the circuit once the threshold is reached."""
+        with self._lock:
+            self._failures += 1
+            if self._trial or (self._opened_at is None and self._failures >= self.failure_threshold):
+                if not self._trial:
+                    self.opened += 1
+                    logger.warning(
+                        f"Boson {self.name} endpoint failing ({self._failures} in a row), "
+                        f"circuit open for {self.reset_s:g}s"
+                    )
+                self._opened_at = time.monotonic()
+                self._trial = False
+
+
+class CallPolicy:
+    """
+    How calls to one Boson endpoint are retried, hedged and cut off.
+
+    - Retries back off with full jitter (BOSON_RETRY_BASE_MS doubling up
+      to BOSON_RETRY_MAX_MS) and only happen if the backoff plus a typical
+      response still fits in the current turn's budget; each attempt's
+      timeout is capped at what is left of it.
+    - With hedging on, a second identical request goes out when the first
+      has taken longer than this endpoint's recent p95, and whichever
+      answers first wins.
+    - A circuit breaker fails calls immediately while the endpoint is down.
+
+    The wrapped function receives the attempt's timeout in seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        timeout: float,
+        hedge: Optional[bool] = None,
+        max_attempts: Optional[int] = None,
+        breaker: Optional[CircuitBreaker] = None
+    ):
+        """
+        Initialize the policy.
+
+        Args:
+            name: Endpoint name ("asr", "tts", "chat", ...)
+            timeout: Per-attempt timeout when the turn has no budget left to enforce
+            hedge: Hedge slow requests (default: name listed in BOSON_HEDGE)
+            max_attempts: Attempts per call (default from BOSON_MAX_ATTEMPTS or 3)
+            breaker: Circuit breaker (default from BOSON_BREAKER_FAILURES / BOSON_BREAKER_RESET_S)
+        """
+        if hedge is None:
+            hedge = name in [n.strip() for n in os.getenv("BOSON_HEDGE", "").split(",")]
+        if max_attempts is None:
+            max_attempts = int(os.getenv("BOSON_MAX_ATTEMPTS", "3"))
+        if breaker is None:
+            breaker = CircuitBreaker(
+                name,
+                failure_threshold=int(os.getenv("BOSON_BREAKER_FAILURES", "5")),
+                reset_s=float(os.getenv("BOSON_BREAKER_RESET_S", "15")),
+            )
+
+        self.name = name
+        self.timeout = timeout
+        self.hedge = hedge
+        self.max_attempts = max_attempts
+        self.breaker = breaker
+        self.backoff_base = float(os.getenv("BOSON_RETRY_BASE_MS", "200")) / 1000
+        self.backoff_max = float(os.getenv("BOSON_RETRY_MAX_MS", "1000")) / 1000
+
+        self._latencies: deque = deque(maxlen=200)
+        self._counts = {"calls": 0, "retries": 0, "hedged": 0, "hedge_wins": 0, "failed": 0, "rejected": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._counts[key] += 1
+
+    def _percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            if len(self._latencies) < _HEDGE_MIN_SAMPLES:
+                return None
+            return float(np.percentile(self._latencies, q))
+
+    def call(self, func: Callable[[float], T]) -> T:
+        """
+        Run a request under this policy.
+
+        Args:
+            func: Makes the request; takes the attempt timeout in seconds
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            CircuitOpenError: The endpoint is known to be down
+            Exception: The last error once retrying is pointless or out of budget
+        """
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"Boson {self.name} endpoint unavailable (circuit open)")
+        self._count("calls")
+
+        deadline = turn_deadline()
+        attempt = 1
+        while True:
+            timeout = self.timeout
+            if deadline is not None and deadline > time.monotonic():
+                timeout = min(timeout, deadline - time.monotonic())
+
+            start = time.monotonic()
+            try:
+                result = self._attempt(func, timeout, deadline)
+            except Exception as e:
+                if not is_retryable(e):
+                    # The endpoint answered, it just didn't like the request
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+                if not self._may_retry(attempt, delay, deadline):
+                    self._count("failed")
+                    raise
+                logger.warning(
+                    f"Boson {self.name} attempt {attempt} failed ({str(e)[:80]}), "
+                    f"retrying in {delay * 1000:.0f}ms"
+                )
+                self._count("retries")
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            self.breaker.record_success()
+            with self._lock:
+                self._latencies.append(time.monotonic() - start)
+            return result
+
+    def _may_retry(self, attempt: int, delay: float, deadline: Optional[float]) -> bool:
+        """Whether another attempt is allowed and still fits the turn's budget."""
+        if attempt >= self.max_attempts or not self.breaker.allow():
+            return False
+        if deadline is None:
+            return True
+        typical = self._percentile(50) or 0.0
+        if time.monotonic() + delay + typical > deadline:
+            logger.warning(f"Boson {self.name}: no retry, it would exceed the turn's latency budget")
+            return False
+        return True
+
+    def _attempt(self, func: Callable[[float], T], timeout: float, deadline: Optional[float]) -> T:
+        """One attempt, hedged with a second request if it runs past the p95."""
+        hedge_after = self._percentile(95) if self.hedge else None
+        if hedge_after is None or hedge_after >= timeout:
+            return func(timeout)
+
+        executor = _get_executor()
+        primary = executor.submit(bind(func), timeout)
+        done, _ = wait([primary], timeout=hedge_after)
+        if done or (deadline is not None and time.monotonic() >= deadline):
+            return primary.result()
+
+        self._count("hedged")
+        hedge = executor.submit(bind(func), max(0.1, timeout - hedge_after))
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count("hedge_wins")
+                    return future.result()
+                error = future.exception()
+        raise error
+
+    def stats(self) -> dict:
+        """
+        Get call statistics.
+
+        Returns:
+            dict: Calls, retries, hedges, failures, breaker state and latency percentiles in ms
+        """
+        with self._lock:
+            stats = dict(self._counts)
+            latencies = np.array(self._latencies) * 1000
+        stats["breaker"] = self.breaker.state
+        stats["breaker_opened"] = self.breaker.opened
+        if len(latencies):
+            stats["p50_ms"] = round(float(np.percentile(latencies, 50)), 1)
+            stats["p95_ms"] = round(float(np.percentile(latencies, 95)), 1)
+        return stats
+
+
+# Shared pool for hedged requests
+_executor: Optional[ThreadPoolExecutor] = None
+
+# One policy per endpoint
+_policies: Dict[str, CallPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _policies_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="boson-hedge")
+    return _executor
+
+
+def get_call_policy(name: str, timeout: float, hedge: Optional[bool] = None) -> CallPolicy:
+    """
+    Get or create the call policy of an endpoint.
+
+    Args:
+        name: Endpoint name ("asr", "tts", "chat", ...)
+        timeout: Per-attempt timeout used when the policy is created
+        hedge: Hedge slow requests (default: name listed in BOSON_HEDGE)
+
+    Returns:
+        CallPolicy: Shared policy for the endpoint
+    """
+    policy = _policies.get(name)
+    if policy is None:
+        with _policies_lock:
+            policy = _policies.get(name)
+            if policy is None:
+                policy = _policies[name] = CallPolicy(name, timeout, hedge=hedge)
+    return policy
+
+
+def log_call_stats() -> None:
+    """Log retry/hedge/breaker statistics of every endpoint used."""
+    for name, policy in sorted(_policies.items()):
+        logger.info(f"Boson {name} calls: {policy.stats()}")
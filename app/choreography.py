@@ -0,0 +1,366 @@
+"""
+Choreography
+Beat tracking for the dance song and beat-timed motion cues for the car.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+from app.arduino_client import PRIORITY_NORMAL
+from app.device.car_base import CarBase, DANCE_MOVES
+from app.mixer import MixerSource
+
+logger = logging.getLogger(__name__)
+
+
+# Two bars of 4/4: sway, step, spin
+DEFAULT_ROUTINE = "LEFT,RIGHT,LEFT,RIGHT,FORWARD,BACK,SPIN,SPIN"
+
+# Onset analysis frame (at the file's sample rate)
+_N_FFT = 2048
+_HOP = 512
+_FRAMES_PER_BLOCK = 256
+
+
+@dataclass
+class BeatMap:
+    """
+    Beat grid of a song.
+
+    Attributes:
+        tempo_bpm: Estimated tempo
+        beats: Beat times in seconds from the start of the file
+    """
+    tempo_bpm: float
+    beats: np.ndarray
+
+    def to_dict(self) -> dict:
+        return {"tempo_bpm": self.tempo_bpm, "beats": [round(float(b), 5) for b in self.beats]}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BeatMap":
+        return cls(float(data["tempo_bpm"]), np.asarray(data["beats"], dtype=np.float64))
+
+
+def _band_edges(sample_rate: int, bands: int = 24, low_hz: float = 30.0, high_hz: float = 16000.0) -> np.ndarray:
+    """First FFT bin of each log-spaced band (duplicates from the narrow low bands dropped)."""
+    high_hz = min(high_hz, sample_rate / 2)
+    edges = np.geomspace(low_hz, high_hz, bands + 1)[:-1] * _N_FFT / sample_rate
+    return np.unique(np.maximum(np.round(edges).astype(int), 1))
+
+
+def onset_envelope(path: str) -> Tuple[np.ndarray, float]:
+    """
+    Spectral-flux onset strength of an audio file, decoded block by block.
+
+    Each block is framed with a strided view and transformed in one FFT
+    call. The magnitudes are pooled into log-spaced bands so each octave
+    counts equally (otherwise broadband hi-hats outvote the few bins of a
+    kick drum), and the flux is the summed positive change of the log band
+    energies between consecutive frames.
+
+    Args:
+        path: Audio file
+
+    Returns:
+        tuple: (onset strength per frame, frames per second)
+    """
+    window = np.hanning(_N_FFT).astype(np.float32)
+    previous = None
+    parts = []
+
+    with sf.SoundFile(path) as song:
+        sample_rate = song.samplerate
+        bands = _band_edges(sample_rate)
+        blocks = song.blocks(
+            blocksize=_HOP * _FRAMES_PER_BLOCK + _N_FFT - _HOP, overlap=_N_FFT - _HOP, dtype='float32'
+        )
+        for block in blocks:
+            mono = block.mean(axis=1) if block.ndim > 1 else block
+            if len(mono) < _N_FFT:
+                break
+            frames = np.lib.stride_tricks.sliding_window_view(mono, _N_FFT)[::_HOP]
+            magnitude = np.abs(np.fft.rfft(frames * window, axis=1))
+            energy = np.add.reduceat(magnitude, bands, axis=1) / np.diff(np.append(bands, magnitude.shape[1]))
+            spectrum = np.log1p(100.0 * energy)
+            if previous is None:
+                flux = np.concatenate([[0.0], np.maximum(np.diff(spectrum, axis=0), 0).sum(axis=1)])
+            else:
+                flux = np.maximum(np.diff(np.vstack([previous, spectrum]), axis=0), 0).sum(axis=1)
+            previous = spectrum[-1:]
+            parts.append(flux)
+
+    envelope = np.concatenate(parts) if parts else np.zeros(0)
+    return envelope.astype(np.float64), sample_rate / _HOP
+
+
+def estimate_beats(
+    envelope: np.ndarray,
+    frame_rate: float,
+    min_bpm: float = 60.0,
+    max_bpm: float = 180.0,
+    offset_s: float = 0.0
+) -> BeatMap:
+    """
+    Fit a constant-tempo beat grid to an onset envelope.
+
+    The tempo is the autocorrelation peak (weighted toward ~120 BPM to
+    avoid half/double-tempo picks, refined to a fraction of a frame) and
+    the phase is the grid offset that collects the most onset strength.
+
+    Args:
+        envelope: Onset strength per frame
+        frame_rate: Frames per second
+        min_bpm: Slowest tempo considered
+        max_bpm: Fastest tempo considered
+        offset_s: Time of frame 0 in seconds
+
+    Returns:
+        BeatMap: Tempo and beat times
+    """
+    min_lag = int(frame_rate * 60 / max_bpm)
+    max_lag = int(np.ceil(frame_rate * 60 / min_bpm))
+    if len(envelope) < 2 * max_lag:
+        return BeatMap(0.0, np.zeros(0))
+
+    # Remove the slowly varying loudness so only onsets remain
+    width = max(1, int(frame_rate))
+    local_mean = np.convolve(envelope, np.ones(width) / width, mode='same')
+    onsets = np.maximum(envelope - local_mean, 0.0)
+
+    # Smoothing spreads each onset over neighbouring frames, so a period that
+    # falls between two lags still shows up as one autocorrelation peak
+    smoothed = np.convolve(onsets, np.array([1.0, 2.0, 3.0, 2.0, 1.0]) / 9.0, mode='same')
+    size = 1 << int(np.ceil(np.log2(2 * len(smoothed))))
+    spectrum = np.fft.rfft(smoothed, size)
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum), size)[:max_lag + 2]
+
+    lags = np.arange(min_lag, max_lag + 1)
+    bpm = 60.0 * frame_rate / lags
+    prior = np.exp(-0.5 * (np.log2(bpm / 120.0) / 1.0) ** 2)
+    best = lags[np.argmax(autocorr[lags] * prior)]
+
+    # Parabolic interpolation around the peak for a sub-frame period
+    left, center, right = autocorr[best - 1], autocorr[best], autocorr[best + 1]
+    denominator = left - 2 * center + right
+    period = best + (0.5 * (left - right) / denominator if denominator < 0 else 0.0)
+
+    count = int((len(onsets) - 1) / period) + 1
+    phases = np.arange(int(np.ceil(period)))
+    grid = np.round(phases[:, None] + np.arange(count)[None, :] * period).astype(int)
+    scores = onsets[np.minimum(grid, len(onsets) - 1)].sum(axis=1)
+    phase = phases[np.argmax(scores)]
+
+    # Snap each grid beat to the strongest onset nearby and refit the grid
+    # by weighted least squares: an error of a fraction of a frame in the
+    # period would otherwise add up over a whole song. Each pass tightens
+    # the fit, so later beats fall inside the snapping window as well.
+    beat_index = np.arange(count)
+    reach = max(1, int(period * 0.15))
+    offsets = np.arange(-reach, reach + 1)
+    for _ in range(3):
+        positions = np.round(phase + beat_index * period).astype(int)
+        window = np.clip(positions[:, None] + offsets[None, :], 0, len(onsets) - 1)
+        peaks = window[beat_index, np.argmax(onsets[window], axis=1)]
+        weights = onsets[peaks]
+        if np.count_nonzero(weights) < 2:
+            break
+        period, phase = np.polyfit(beat_index, peaks, 1, w=np.sqrt(weights))
+
+    beats = (phase + beat_index * period) / frame_rate
+    beats = beats[(beats >= 0) & (beats * frame_rate < len(onsets))] + offset_s
+    return BeatMap(float(60.0 * frame_rate / period), beats)
+
+
+def analyze_beats(path: str) -> BeatMap:
+    """
+    Track the beats of an audio file.
+
+    Args:
+        path: Audio file
+
+    Returns:
+        BeatMap: Tempo and beat times
+    """
+    start = time.perf_counter()
+    envelope, frame_rate = onset_envelope(path)
+    # A frame's flux jumps as soon as an onset enters the newest hop of its window
+    beats = estimate_beats(envelope, frame_rate, offset_s=(_N_FFT - _HOP) / (frame_rate * _HOP))
+    logger.info(
+        f"Beat analysis of {Path(path).name}: {beats.tempo_bpm:.1f} BPM, {len(beats.beats)} beats "
+        f"in {(time.perf_counter() - start) * 1000:.0f}ms"
+    )
+    return beats
+
+
+def load_beats(path: str, cache_dir: Optional[str] = None) -> BeatMap:
+    """
+    Beat map of a file, analyzed once and cached on disk.
+
+    The cache key covers the file's path, size and modification time, so
+    replacing the song invalidates its entry.
+
+    Args:
+        path: Audio file
+        cache_dir: Cache directory (default from BEATS_CACHE_DIR or ~/.cache/beemerai/beats)
+
+    Returns:
+        BeatMap: Tempo and beat times
+    """
+    if cache_dir is None:
+        cache_dir = os.getenv("BEATS_CACHE_DIR", str(Path.home() / ".cache" / "beemerai" / "beats"))
+
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    key = hashlib.sha256(f"{resolved}\0{stat.st_size}\0{stat.st_mtime_ns}".encode()).hexdigest()
+    entry = Path(cache_dir).expanduser() / f"{key}.json"
+
+    try:
+        with open(entry) as f:
+            return BeatMap.from_dict(json.load(f))
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable beat cache entry {entry}: {e}")
+
+    beats = analyze_beats(str(resolved))
+    try:
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        tmp = entry.with_suffix(".tmp")
+        with open(tmp, 'w') as f:
+            json.dump(beats.to_dict(), f)
+        os.replace(tmp, entry)
+    except OSError as e:
+        logger.warning(f"Could not cache beats for {path}: {e}")
+    return beats
+
+
+class Choreographer:
+    """
+    Sends one motion command per beat, timed against the music's playback clock.
+
+    Cue times come from the mixer source's device timestamps, re-read
+    while waiting for each beat, so the car follows the audio clock (and
+    any underrun) rather than a fixed delay from when the song started.
+    Each command is sent `lead_ms` early to cover the serial write and
+    the firmware's reaction.
+    """
+
+    def __init__(
+        self,
+        car: CarBase,
+        routine: Optional[List[str]] = None,
+        lead_ms: Optional[float] = None
+    ):
+        """
+        Initialize the choreographer.
+
+        Args:
+            car: Car to cue
+            routine: Moves cycled over the beats (default from DANCE_ROUTINE)
+            lead_ms: How early to send each cue (default from DANCE_CUE_LEAD_MS or 15)
+        """
+        if routine is None:
+            routine = [m.strip().upper() for m in os.getenv("DANCE_ROUTINE", DEFAULT_ROUTINE).split(",") if m.strip()]
+        if lead_ms is None:
+            lead_ms = float(os.getenv("DANCE_CUE_LEAD_MS", "15"))
+
+        unknown = [move for move in routine if move not in DANCE_MOVES]
+        if unknown or not routine:
+            raise ValueError(f"Dance routine needs moves from {DANCE_MOVES}, got {routine}")
+
+        self.car = car
+        self.routine = routine
+        self.lead_s = lead_ms / 1000
+
+    def perform(
+        self,
+        source: MixerSource,
+        beats: BeatMap,
+        cancel: Optional[threading.Event] = None,
+        max_seconds: Optional[float] = None
+    ) -> dict:
+        """
+        Cue the beats of a playing song until it ends or is cancelled.
+
+        Blocks the calling thread. Beats that can no longer be cued before
+        half a beat has passed are skipped.
+
+        Args:
+            source: Mixer source playing the song
+            beats: Beat map of the song
+            cancel: Event that stops the routine early when set
+            max_seconds: Ignore beats after this point in the song
+
+        Returns:
+            dict: Cues sent/skipped, cue timing error and audio clock drift in ms
+        """
+        if cancel is None:
+            cancel = threading.Event()
+        stats = {"sent": 0, "skipped": 0}
+
+        def stopped() -> bool:
+            return cancel.is_set() or source.cancelled.is_set() or source.done.is_set()
+
+        while not source.playback_started.wait(0.05):
+            if stopped():
+                return stats
+        anchor_frame, anchor_time = source.clock
+
+        late_s = 30.0 / beats.tempo_bpm if beats.tempo_bpm else 0.25
+        cues = []
+        drifts = []
+        for index, beat in enumerate(beats.beats):
+            if max_seconds is not None and beat >= max_seconds:
+                break
+            frame = int(round(beat * source.sample_rate))
+
+            # Re-read the audio clock while waiting: it absorbs underruns and clock drift
+            while True:
+                if stopped():
+                    return self._summarize(stats, cues, drifts)
+                due = source.time_of(frame) - self.lead_s
+                remaining = due - time.monotonic()
+                if remaining <= 0:
+                    break
+                cancel.wait(min(remaining, 0.05))
+
+            if -remaining > late_s:
+                stats["skipped"] += 1
+                continue
+
+            future = self.car.send(self.routine[index % len(self.routine)], PRIORITY_NORMAL)
+            if future.done() and not future.cancelled() and future.exception() is not None:
+                # Refused (the car was stopped): the routine is over
+                logger.info(f"Choreography ended: {future.exception()}")
+                break
+            cues.append((future, due))
+            stats["sent"] += 1
+            predicted = anchor_time + (frame - anchor_frame) / source.sample_rate
+            drifts.append(source.time_of(frame) - predicted)
+
+        return self._summarize(stats, cues, drifts)
+
+    def _summarize(self, stats: dict, cues: list, drifts: list) -> dict:
+        errors = [
+            future.sent_at - due for future, due in cues
+            if getattr(future, "sent_at", None) is not None
+        ]
+        if errors:
+            errors_ms = np.abs(np.array(errors)) * 1000
+            stats["cue_error_p50_ms"] = round(float(np.percentile(errors_ms, 50)), 2)
+            stats["cue_error_max_ms"] = round(float(errors_ms.max()), 2)
+        if drifts:
+            stats["drift_max_ms"] = round(float(np.abs(np.array(drifts)).max() * 1000), 2)
+        logger.info(f"Choreography: {stats}")
+        return stats
@@ -9,25 +9,38 @@ from app.arduino_client import get_arduino_client
 logger = logging.getLogger(__name__)
 
 
+# Fixed spoken response (pre-synthesized into the TTS cache at startup)
+MESSAGE = "Let me show you my moves!"
+RESPONSES = (MESSAGE,)
+
+
 def handle(intent, car):
     """
     Handle dance intent - make the car perform a dance routine.
     
     Sends DANCE command to Arduino and plays dance song.
+    An optional "duration" slot (seconds) limits how long the song plays.
     
     Args:
         intent: Intent object
         car: Car device interface (unused)
     """
+    duration = intent.slots.get("duration")
+    
     logger.info(f"💃 Dance command activated!")
+    if isinstance(duration, (int, float)):
+        logger.info(f"   Dancing for {duration:g} seconds")
+    else:
+        duration = None
     logger.info(f"   Will send DANCE signal to Arduino after TTS")
     logger.info(f"   Will play dance song from DANCE_SONG env variable")
     
     return {
         "status": "acknowledged",
         "action": "dance",
-        "message": "Let me show you my moves!",
+        "message": MESSAGE,
         "send_arduino_dance": True,  # Signal to send DANCE to Arduino
-        "play_dance_song": True  # Signal to play dance music
+        "play_dance_song": True,  # Signal to play dance music
+        "dance_duration": duration  # Seconds of music to play (None = whole song)
     }
 
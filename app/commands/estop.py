@@ -4,29 +4,37 @@ Handles emergency stop requests.
 """
 
 import logging
+from app.safety import get_estop_guard
 
 logger = logging.getLogger(__name__)
 
 
+# Fixed spoken response (pre-synthesized into the TTS cache at startup)
+MESSAGE = "Emergency stop activated"
+RESPONSES = (MESSAGE,)
+
+
 def handle(intent, car):
     """
     Handle emergency stop intent - immediately halt all movement.
     
-    This is the highest priority safety command.
-    Phase 6 will call car.estop() to actually stop the car.
+    This is the highest priority safety command. Sends STOP through the
+    ESTOP guard, which also silences audio; if the keyword spotter or a
+    partial transcript already stopped the car, this is a no-op.
     
     Args:
         intent: Intent object
         car: Car device interface (Phase 6)
     """
     logger.warning(f"🛑 EMERGENCY STOP activated!")
-    logger.warning(f"   Status: All movement halted")
-    logger.warning(f"   Action: car.estop() will be called in Phase 6")
     
-    # Phase 6 will use: car.estop()
+    if get_estop_guard().trigger("intent"):
+        logger.warning(f"   Status: All movement halted")
+    else:
+        logger.warning(f"   Status: Already stopped by the fast path")
     
     return {
         "status": "acknowledged",
         "action": "estop",
-        "message": "Emergency stop activated"
+        "message": MESSAGE
     }
@@ -5,15 +5,27 @@ Handles navigation requests to destinations.
 
 import logging
 from app.arduino_client import get_arduino_client
+from app.intents.gazetteer import load_routes
 
 logger = logging.getLogger(__name__)
 
 
+# Destinations with a known route (from demo/routes.py)
+ROUTES = load_routes()
+KNOWN_DESTINATIONS = tuple(ROUTES)
+
+# Spoken responses (known destinations are pre-synthesized into the TTS cache)
+MESSAGE = "Heading to the {destination}"
+UNKNOWN_DESTINATION_MESSAGE = "Sorry, I don't know how to get to {destination}"
+RESPONSES = tuple(MESSAGE.format(destination=d) for d in KNOWN_DESTINATIONS)
+
+
 def handle(intent, car):
     """
     Handle navigation intent - drive to a destination.
     
-    For MVP, we only support "cafeteria" destination.
+    Destinations come from demo/routes.py; the rules resolve spoken
+    aliases to the canonical destination name.
     Sends RUN command to Arduino to execute the route.
     
     Args:
@@ -24,22 +36,22 @@ def handle(intent, car):
     
     logger.info(f"🚗 Navigation command: Going to {destination}")
     
-    if destination == "cafeteria":
-        logger.info(f"   Route: Start → Cafeteria")
+    if destination in KNOWN_DESTINATIONS:
+        logger.info(f"   Route: Start → {destination.title()} ({ROUTES[destination].get('command', 'RUN')})")
         logger.info(f"   Will send RUN command to Arduino after TTS")
         
         return {
             "status": "acknowledged",
             "destination": destination,
-            "message": f"Heading to the {destination}",
+            "message": MESSAGE.format(destination=destination),
             "send_arduino_run": True  # Signal to send RUN after TTS
         }
     else:
         logger.warning(f"   Unknown destination: {destination}")
-        logger.info(f"   Available destinations: cafeteria")
+        logger.info(f"   Available destinations: {', '.join(KNOWN_DESTINATIONS)}")
         
         return {
             "status": "error",
             "destination": destination,
-            "message": f"Sorry, I don't know how to get to {destination}"
+            "message": UNKNOWN_DESTINATION_MESSAGE.format(destination=destination)
         }
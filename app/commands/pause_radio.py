@@ -9,12 +9,18 @@ from app.radio_player import get_radio_player
 logger = logging.getLogger(__name__)
 
 
+# Fixed spoken response (pre-synthesized into the TTS cache at startup)
+MESSAGE = "Radio paused."
+RESPONSES = (MESSAGE,)
+
+
 def handle(intent, car):
     """
     Handle pause radio intent - stop radio playback.
     
-    Note: Radio is already paused by main.py when PTT is activated.
-    This handler just acknowledges the pause and prevents auto-resume.
+    Note: The radio is already muted by the pipeline when PTT is activated.
+    This handler just acknowledges the pause; the pipeline then stops the
+    stream instead of restoring it.
     
     Args:
         intent: Intent object
@@ -26,6 +32,6 @@ def handle(intent, car):
     return {
         "status": "acknowledged",
         "action": "pause_radio",
-        "message": "Radio paused."
+        "message": MESSAGE
     }
 
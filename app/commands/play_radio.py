@@ -9,6 +9,11 @@ from app.radio_player import get_radio_player
 logger = logging.getLogger(__name__)
 
 
+# Fixed spoken response (pre-synthesized into the TTS cache at startup)
+MESSAGE = "Tuning in to 92.5 FM. Enjoy the music!"
+RESPONSES = (MESSAGE,)
+
+
 def handle(intent, car):
     """
     Handle play radio intent - start live radio streaming.
@@ -26,5 +31,5 @@ def handle(intent, car):
         "status": "acknowledged",
         "action": "play_radio",
         "start_radio": True,  # Signal to start radio AFTER TTS
-        "message": "Tuning in to 92.5 FM. Enjoy the music!"
+        "message": MESSAGE
     }
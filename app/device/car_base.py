@@ -1,2 +1,62 @@
-# Car Base Interface
-# Base class for car hardware communication
+"""
+Car Base Interface
+Base class for car hardware communication.
+"""
+
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+
+
+# Motion commands the firmware accepts while dancing (one per cued beat)
+DANCE_MOVES = ("LEFT", "RIGHT", "FORWARD", "BACK", "SPIN")
+
+
+class CarBase(ABC):
+    """
+    Interface the voice pipeline and ESTOP guard use to drive the car.
+
+    Every command is asynchronous: it returns a Future that resolves when
+    the car acknowledges it, so callers never block on the hardware.
+    STOP must overtake (and cancel) commands that are still queued.
+    """
+
+    @abstractmethod
+    def start(self) -> None:
+        """Connect to the car in the background."""
+
+    @abstractmethod
+    def send(self, command: str, priority: int) -> Future:
+        """
+        Queue a command for the car.
+
+        Args:
+            command: Command name ("RUN", "DANCE", "STOP", or a dance move)
+            priority: Queue priority (lower goes first)
+
+        Returns:
+            Future: Resolves with the car's reply
+        """
+
+    @abstractmethod
+    def send_run(self) -> Future:
+        """Start the cafeteria route."""
+
+    @abstractmethod
+    def send_dance(self) -> Future:
+        """Start the dance routine."""
+
+    @abstractmethod
+    def send_stop(self) -> Future:
+        """Stop the car ahead of everything else."""
+
+    @abstractmethod
+    def commands_since_stop(self) -> int:
+        """Commands queued since the last STOP (0: the car has not been told to move)."""
+
+    @abstractmethod
+    def stats(self) -> dict:
+        """Command counts and ack latency."""
+
+    @abstractmethod
+    def disconnect(self) -> None:
+        """Stop sending and release the connection."""
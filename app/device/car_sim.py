@@ -1,2 +1,258 @@
-# Car Simulator
-# Simulated car interface for testing and development
+"""
+Car Simulator
+Simulated car firmware behind an in-process serial port, for testing and development.
+"""
+
+import os
+import re
+import heapq
+import random
+import logging
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from app.arduino_client import ArduinoClient
+from app.device.car_base import DANCE_MOVES
+
+logger = logging.getLogger(__name__)
+
+
+# "@<seq> <CMD>" in the framed protocol, bare "<CMD>" in the legacy one
+_COMMAND_LINE = re.compile(r'^(?:@(\d+)\s+)?([A-Z]+)$')
+
+# Serial framing: start bit + 8 data bits + stop bit
+_BITS_PER_BYTE = 10
+
+
+class SimulatedFirmware:
+    """
+    Loopback serial port running a model of the car's firmware.
+
+    Implements the subset of serial.Serial that ArduinoClient uses
+    (write/flush/read/in_waiting/close) and answers RUN/DANCE/STOP and
+    the dance moves in either protocol: framed commands ("@<seq> RUN") get "ACK <seq> <state>",
+    unknown ones "NAK <seq> unknown command"; legacy commands get one
+    status line ("RUN started").
+
+    Timing follows the real link: every byte takes 10 bits at the baud
+    rate and queues behind earlier bytes in the same direction, and the
+    firmware handles one command at a time, spending `process_s`
+    (+/- `jitter_s`) on each. The car's motion state (idle, running,
+    dancing) is tracked so a STOP can be checked.
+    """
+
+    def __init__(
+        self,
+        port: str = "sim",
+        baudrate: int = 9600,
+        timeout: Optional[float] = None,
+        process_s: Optional[float] = None,
+        jitter_s: Optional[float] = None,
+        route_s: Optional[float] = None,
+        dance_s: Optional[float] = None,
+        move_s: Optional[float] = None,
+        seed: Optional[int] = None
+    ):
+        """
+        Initialize the simulated firmware (same leading arguments as serial.Serial).
+
+        Args:
+            port: Port name (only logged)
+            baudrate: Simulated link speed
+            timeout: read() timeout in seconds (None blocks)
+            process_s: Firmware time per command (default from CAR_SIM_PROCESS_S or 0.002)
+            jitter_s: Uniform jitter on process_s (default from CAR_SIM_JITTER_S or 0.001)
+            route_s: How long RUN drives (default from CAR_SIM_ROUTE_S or 5.0)
+            dance_s: How long DANCE lasts (default from CAR_SIM_DANCE_S or 8.0)
+            move_s: How long a dance move keeps the car dancing (default from CAR_SIM_MOVE_S or 0.5)
+            seed: Random seed for the jitter
+        """
+        if process_s is None:
+            process_s = float(os.getenv("CAR_SIM_PROCESS_S", "0.002"))
+        if jitter_s is None:
+            jitter_s = float(os.getenv("CAR_SIM_JITTER_S", "0.001"))
+        if route_s is None:
+            route_s = float(os.getenv("CAR_SIM_ROUTE_S", "5.0"))
+        if dance_s is None:
+            dance_s = float(os.getenv("CAR_SIM_DANCE_S", "8.0"))
+        if move_s is None:
+            move_s = float(os.getenv("CAR_SIM_MOVE_S", "0.5"))
+
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.process_s = process_s
+        self.jitter_s = jitter_s
+        self.durations = {"RUN": route_s, "DANCE": dance_s}
+        self.durations.update({move: move_s for move in DANCE_MOVES})
+        self.is_open = True
+
+        self.received: List[str] = []  # command lines in arrival order
+        self._rng = random.Random(seed)
+        self._rx = b""  # partial command line from the host
+        self._tx: List[Tuple[float, int, bytes]] = []  # (ready at, order, reply) heap
+        self._tx_count = 0
+        self._busy_until = 0.0  # firmware handles one command at a time
+        self._rx_free = 0.0  # each direction of the link carries one byte at a time
+        self._tx_free = 0.0
+        self._state = "IDLE"
+        self._state_until = 0.0
+        self._cond = threading.Condition()
+
+        logger.info(f"Simulated car on {port} at {baudrate} baud")
+
+    def _byte_time(self, count: int) -> float:
+        return count * _BITS_PER_BYTE / self.baudrate
+
+    @property
+    def state(self) -> str:
+        """Current motion state: IDLE, RUNNING or DANCING."""
+        with self._cond:
+            return self._current_state(time.monotonic())
+
+    def _current_state(self, now: float) -> str:
+        if self._state != "IDLE" and now >= self._state_until:
+            self._state = "IDLE"
+        return self._state
+
+    # --- serial.Serial subset ---------------------------------------------
+
+    def write(self, data: bytes) -> int:
+        """Receive bytes from the host; each complete line is one command."""
+        if not self.is_open:
+            raise OSError("Simulated port is closed")
+
+        now = time.monotonic()
+        with self._cond:
+            # Bytes queue behind whatever is still being clocked out
+            self._rx_free = max(now, self._rx_free) + self._byte_time(len(data))
+            self._rx += data
+            while b"\n" in self._rx:
+                line, self._rx = self._rx.split(b"\n", 1)
+                arrived = self._rx_free - self._byte_time(len(self._rx))
+                self._handle(line.decode('utf-8', errors='ignore').strip(), arrived)
+            self._cond.notify_all()
+        return len(data)
+
+    def flush(self) -> None:
+        """Nothing is buffered on the host side."""
+
+    @property
+    def in_waiting(self) -> int:
+        """Bytes of replies that have finished arriving."""
+        with self._cond:
+            return sum(len(reply) for _, _, reply in self._ready(time.monotonic()))
+
+    def read(self, size: int = 1) -> bytes:
+        """
+        Read up to `size` bytes of replies, waiting up to `timeout` for the first one.
+
+        Args:
+            size: Maximum bytes to return
+
+        Returns:
+            bytes: Reply bytes (empty on timeout)
+        """
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._cond:
+            while self.is_open:
+                now = time.monotonic()
+                if self._tx and self._tx[0][0] <= now:
+                    return self._take(now, size)
+                wait = self._tx[0][0] - now if self._tx else None
+                if deadline is not None:
+                    if now >= deadline:
+                        return b""
+                    wait = deadline - now if wait is None else min(wait, deadline - now)
+                self._cond.wait(wait)
+        return b""
+
+    def close(self) -> None:
+        """Close the port; pending replies are lost."""
+        with self._cond:
+            self.is_open = False
+            self._tx = []
+            self._cond.notify_all()
+
+    # --- firmware model -----------------------------------------------------
+
+    def _handle(self, line: str, arrived: float) -> None:
+        """Run one command line and schedule its reply."""
+        if not line:
+            return
+        self.received.append(line)
+
+        match = _COMMAND_LINE.match(line)
+        seq, command = (match.group(1), match.group(2)) if match else (None, line)
+
+        start = max(arrived, self._busy_until)
+        done = start + max(0.0, self.process_s + self._rng.uniform(-self.jitter_s, self.jitter_s))
+        self._busy_until = done
+
+        known = command in self.durations or command == "STOP"
+        if known:
+            self._current_state(done)
+            if command == "STOP":
+                self._state = "IDLE"
+            elif command in DANCE_MOVES and self._state == "DANCING":
+                # A move during the routine extends it, never cuts it short
+                self._state_until = max(self._state_until, done + self.durations[command])
+            else:
+                self._state = "RUNNING" if command == "RUN" else "DANCING"
+                self._state_until = done + self.durations[command]
+
+        if seq is not None:
+            reply = f"ACK {seq} {self._state}" if known else f"NAK {seq} unknown command"
+        else:
+            reply = f"{command} {'started' if command != 'STOP' else 'done'}" if known else f"ERR {command}"
+
+        payload = f"{reply}\n".encode()
+        self._tx_free = max(done, self._tx_free) + self._byte_time(len(payload))
+        heapq.heappush(self._tx, (self._tx_free, self._tx_count, payload))
+        self._tx_count += 1
+
+    def _ready(self, now: float) -> List[Tuple[float, int, bytes]]:
+        return [item for item in self._tx if item[0] <= now]
+
+    def _take(self, now: float, size: int) -> bytes:
+        out = b""
+        while self._tx and self._tx[0][0] <= now and len(out) < size:
+            ready_at, order, reply = heapq.heappop(self._tx)
+            room = size - len(out)
+            out += reply[:room]
+            if len(reply) > room:
+                heapq.heappush(self._tx, (ready_at, order, reply[room:]))
+        return out
+
+
+class SimulatedCar(ArduinoClient):
+    """
+    ArduinoClient talking to SimulatedFirmware instead of a serial port.
+
+    The whole command channel (queue, I/O threads, acks, timeouts) is the
+    production code; only the wire is simulated.
+    """
+
+    def __init__(self, protocol: Optional[str] = None, baud: Optional[int] = None, **firmware):
+        """
+        Initialize the simulated car.
+
+        Args:
+            protocol: "framed" or "legacy" (default from ARDUINO_PROTOCOL or framed)
+            baud: Simulated baud rate (default from ARDUINO_BAUD or 9600)
+            **firmware: Timing options for SimulatedFirmware
+        """
+        self.firmware: Optional[SimulatedFirmware] = None
+
+        def open_port(port, baudrate, timeout=None):
+            self.firmware = SimulatedFirmware(port, baudrate, timeout=timeout, **firmware)
+            return self.firmware
+
+        super().__init__(
+            port="sim",
+            baud=baud,
+            protocol=protocol or os.getenv("ARDUINO_PROTOCOL", "framed"),
+            reset_delay=0.0,
+            serial_factory=open_port
+        )
@@ -3,9 +3,13 @@ Command Dispatcher
 Routes intents to their command handlers and executes them.
 """
 
+import os
 import logging
+from typing import List
 from app.intents import Intent
-from app.intents.fallback_llm import chat_with_car
+from app.intents.fallback_llm import (
+    chat_with_car, stream_chat_with_car, iter_sentences, resolve_with_llm, stream_resolve_with_llm, ERROR_RESPONSE
+)
 from app.commands import navigate, play_radio, pause_radio, dance, estop
 
 logger = logging.getLogger(__name__)
@@ -20,6 +24,29 @@ INTENT_HANDLERS = {
     "ESTOP": estop.handle,
 }
 
+# Intents the LLM can call as tools for utterances the rules missed
+TOOL_INTENTS = (*INTENT_HANDLERS, "HELP")
+
+# Fixed dispatcher responses
+HELP_MESSAGE = "I can drive to the cafeteria, play the radio, or chat with you. What would you like?"
+CONVERSATION_ERROR_MESSAGE = "Sorry, I'm having trouble thinking right now."
+UNKNOWN_MESSAGE = "Sorry, I didn't get that. Say help to hear what I can do."
+
+
+def static_responses() -> List[str]:
+    """
+    Collect every fixed response the handlers can speak.
+    
+    Used to pre-warm the TTS cache at startup so these play instantly.
+    
+    Returns:
+        List[str]: Response strings
+    """
+    responses = [HELP_MESSAGE, CONVERSATION_ERROR_MESSAGE, UNKNOWN_MESSAGE, ERROR_RESPONSE]
+    for module in (navigate, play_radio, pause_radio, dance, estop):
+        responses.extend(module.RESPONSES)
+    return responses
+
 
 def dispatch(intent: Intent, car=None) -> dict:
     """
@@ -42,7 +69,7 @@ def dispatch(intent: Intent, car=None) -> dict:
     
     # Handle UNKNOWN intent
     if intent_name == "UNKNOWN":
-        return handle_unknown(intent)
+        return handle_unknown(intent, car)
     
     # Get the handler for this intent
     handler = INTENT_HANDLERS.get(intent_name)
@@ -83,25 +110,52 @@ def handle_help() -> dict:
     
     return {
         "status": "acknowledged",
-        "message": "I can drive to the cafeteria, play the radio, or chat with you. What would you like?"
+        "message": HELP_MESSAGE
     }
 
 
-def handle_unknown(intent: Intent) -> dict:
+def handle_unknown(intent: Intent, car=None) -> dict:
     """
-    Handle UNKNOWN intent - have a conversation with the car.
+    Handle UNKNOWN intent - let the LLM find a command or have a conversation.
     
     Uses LLM to generate natural conversational responses.
     Uses simple TTS (not custom voice) for reliability.
+    This is the last intent tier; with USE_LLM_FALLBACK=false the car
+    just says it didn't understand.
+    
+    With LLM_FUNCTION_CALLING enabled (default), the command handlers are
+    offered to the LLM as tools in the same request as the chat (see
+    resolve_unknown); otherwise the LLM can only chat.
+    
+    With CHAT_STREAMING enabled, the reply is returned as a lazy stream of
+    sentences ("reply_stream") so main can speak the first sentence while
+    the rest is still being generated.
     
     Args:
         intent: Intent object with raw text
+        car: Car device interface, passed on to a resolved command's handler
     
     Returns:
-        dict: Conversation response
+        dict: Conversation response, or the result of the resolved command
     """
     logger.info(f"💬 Conversational input: '{intent.raw_text}'")
     
+    if os.getenv("USE_LLM_FALLBACK", "true").lower() != "true":
+        return {
+            "status": "unknown",
+            "message": UNKNOWN_MESSAGE
+        }
+    
+    if os.getenv("LLM_FUNCTION_CALLING", "true").lower() == "true":
+        return resolve_unknown(intent, car)
+    
+    if os.getenv("CHAT_STREAMING", "true").lower() == "true":
+        return {
+            "status": "conversation",
+            "message": "",
+            "reply_stream": iter_sentences(stream_chat_with_car(intent.raw_text))
+        }
+    
     # Use LLM to generate a natural response
     try:
         car_response = chat_with_car(intent.raw_text)
@@ -115,5 +169,55 @@ def handle_unknown(intent: Intent) -> dict:
         logger.error(f"Conversation failed: {e}")
         return {
             "status": "error",
-            "message": "Sorry, I'm having trouble thinking right now."
+            "message": CONVERSATION_ERROR_MESSAGE
         }
+
+
+def resolve_unknown(intent: Intent, car=None) -> dict:
+    """
+    Resolve an unmatched utterance with one LLM function-calling request.
+    
+    If the LLM calls a command tool, its intent is dispatched like a
+    matched one and returned as "resolved_intent". The handler's fixed
+    message is spoken (it is already in the TTS cache); the LLM's text is
+    only used if the handler has none. Without a tool call, the LLM's text
+    is the conversational reply.
+    
+    Args:
+        intent: UNKNOWN intent with raw text
+        car: Car device interface, passed on to the handler
+    
+    Returns:
+        dict: Handler result or conversation response
+    """
+    if os.getenv("CHAT_STREAMING", "true").lower() == "true":
+        resolution = stream_resolve_with_llm(intent.raw_text, TOOL_INTENTS)
+    else:
+        resolution = resolve_with_llm(intent.raw_text, TOOL_INTENTS)
+    
+    if resolution.intent is not None:
+        logger.info(f"   LLM picked command: {resolution.intent}")
+        result = dict(dispatch(resolution.intent, car))
+        result["resolved_intent"] = resolution.intent
+        if not result.get("message"):
+            result["message"] = resolution.reply
+        return result
+    
+    if resolution.reply_deltas is not None:
+        return {
+            "status": "conversation",
+            "message": "",
+            "reply_stream": iter_sentences(resolution.reply_deltas)
+        }
+    
+    if resolution.reply:
+        logger.info(f"   Car says: '{resolution.reply}'")
+        return {
+            "status": "conversation",
+            "message": resolution.reply
+        }
+    
+    return {
+        "status": "unknown",
+        "message": UNKNOWN_MESSAGE
+    }
@@ -4,7 +4,8 @@ Handles natural language understanding and intent recognition.
 """
 
 from app.intents.types import Intent, IntentName
-from app.intents.rules import match_intent, get_rule_engine
+from app.intents.rules import get_rule_engine
+from app.intents.router import match_intent
 from app.intents.registry import get_registry
 
 __all__ = [
@@ -0,0 +1,259 @@
+"""
+Intent Classifier
+Nearest-neighbour intent classification over example utterance vectors,
+for paraphrased commands the regex rules miss.
+"""
+
+import os
+import re
+import zlib
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.intents.rules import RuleEngine, get_rule_engine, normalize_text
+from app.intents.slots import SlotType, convert_slot
+from app.intents.types import Intent
+
+logger = logging.getLogger(__name__)
+
+
+# Hashed feature space of the sentence vectors
+VECTOR_DIM = 4096
+
+# Softmax temperature over per-intent similarities (lower = sharper)
+_TEMPERATURE = 0.1
+
+
+def sentence_features(text: str) -> Dict[int, float]:
+    """
+    Hashed bag of words, word bigrams and character trigrams.
+
+    Character trigrams make near-misses from ASR ("paws the music") land
+    close to the intended words; bigrams keep some word order.
+
+    Args:
+        text: Utterance (normalized inside)
+
+    Returns:
+        Dict of feature index -> count
+    """
+    words = normalize_text(text).split()
+    grams = [f"w:{w}" for w in words]
+    grams += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+    for word in words:
+        padded = f" {word} "
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+
+    features: Dict[int, float] = {}
+    for gram in grams:
+        index = zlib.crc32(gram.encode()) % VECTOR_DIM
+        features[index] = features.get(index, 0.0) + 1.0
+    return features
+
+
+class IntentClassifier:
+    """
+    Nearest-neighbour intent classifier over TF-IDF sentence vectors.
+
+    Every example utterance is an L2-normalized vector in a matrix built
+    once. A query is hashed into the same space and compared with every
+    example by cosine similarity, touching only the query's non-zero
+    features, so a lookup takes tens of microseconds.
+
+    The confidence is the best example similarity of the winning intent,
+    scaled by its softmax share against the other intents: an utterance
+    close to one intent scores high, one that is far from everything or
+    halfway between two intents scores low.
+    """
+
+    def __init__(
+        self,
+        examples: Dict[str, List[str]],
+        slot_types: Optional[Dict[str, Dict[str, SlotType]]] = None,
+        required_slots: Optional[Dict[str, List[str]]] = None
+    ):
+        """
+        Build the example matrix.
+
+        Args:
+            examples: Intent name -> example utterances
+            slot_types: Intent name -> slot name -> type, to fill slots from the text
+            required_slots: Intent name -> slots without which the intent is not returned
+        """
+        self.slot_types = slot_types or {}
+        self.required_slots = required_slots or {}
+
+        rows = [(intent, text) for intent, texts in examples.items() for text in texts if normalize_text(text)]
+        if not rows:
+            raise ValueError("IntentClassifier needs at least one example")
+        self.labels = np.array([intent for intent, _ in rows])
+        self.texts = [text for _, text in rows]
+
+        counts = np.zeros((len(rows), VECTOR_DIM), dtype=np.float32)
+        for i, (_, text) in enumerate(rows):
+            for index, count in sentence_features(text).items():
+                counts[i, index] = count
+
+        # Features shared by many examples ("the", "me") say little about the intent
+        document_frequency = np.count_nonzero(counts, axis=0)
+        self.idf = (np.log((1 + len(rows)) / (1 + document_frequency)) + 1).astype(np.float32)
+        vectors = counts * self.idf
+        vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+        # Stored feature-major: a query gathers a few contiguous rows instead of strided columns
+        self._by_feature = np.ascontiguousarray(vectors.T)
+        # Rows are grouped by intent, so per-intent maxima are one reduceat
+        self.intents = list(dict.fromkeys(self.labels))
+        self._intent_starts = np.array([np.argmax(self.labels == intent) for intent in self.intents])
+
+        self._slot_patterns = {
+            intent: [
+                (name, slot_type, re.compile(rf"\b(?:{slot_type.pattern})", re.IGNORECASE))
+                for name, slot_type in types.items() if slot_type is not None
+            ]
+            for intent, types in self.slot_types.items()
+        }
+
+        logger.info(f"Intent classifier: {len(rows)} examples over {len(self.intents)} intents")
+
+    @classmethod
+    def from_rules(cls, engine: Optional[RuleEngine] = None) -> "IntentClassifier":
+        """
+        Build the classifier from rules.yaml.
+
+        Examples are each rule's `examples` plus the command phrases its
+        patterns expand to; `required_slots` and slot types come from the
+        same rule.
+
+        Args:
+            engine: Rule engine to read the rules from (default: global engine)
+
+        Returns:
+            IntentClassifier
+        """
+        from app.intents.grammar import command_grammar
+
+        engine = engine or get_rule_engine()
+        examples: Dict[str, List[str]] = {}
+        for rule in engine.rules:
+            examples.setdefault(rule.get('name'), []).extend(rule.get('examples', []))
+        for phrase, intent in command_grammar(engine).items():
+            examples.setdefault(intent, []).append(phrase)
+
+        return cls(
+            examples,
+            slot_types={name: engine.slot_types_for(name) for name in examples},
+            required_slots={rule.get('name'): rule.get('required_slots', []) for rule in engine.rules},
+        )
+
+    def _vector(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Non-zero (indices, values) of the normalized query vector."""
+        features = sentence_features(text)
+        indices = np.fromiter(features.keys(), dtype=np.int64, count=len(features))
+        values = np.fromiter(features.values(), dtype=np.float32, count=len(features)) * self.idf[indices]
+        return indices, values / max(float(np.linalg.norm(values)), 1e-9)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """
+        Cosine similarity of the closest example of every intent.
+
+        Args:
+            text: Utterance
+
+        Returns:
+            Dict of intent name -> similarity (0..1)
+        """
+        indices, values = self._vector(text)
+        if len(indices) == 0:
+            return {intent: 0.0 for intent in self.intents}
+        similarities = values @ self._by_feature[indices]
+        best = np.maximum.reduceat(similarities, self._intent_starts)
+        return dict(zip(self.intents, best.tolist()))
+
+    def classify(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        Closest intent and how confident the match is.
+
+        Args:
+            text: Utterance
+
+        Returns:
+            Tuple of (intent name or None, confidence 0..1)
+        """
+        scores = self.scores(text)
+        names = list(scores)
+        similarities = np.array([scores[name] for name in names])
+        best = int(np.argmax(similarities))
+        if similarities[best] <= 0:
+            return None, 0.0
+        weights = np.exp((similarities - similarities[best]) / _TEMPERATURE)
+        share = weights[best] / weights.sum()
+        return names[best], float(similarities[best] * share)
+
+    def extract_slots(self, intent: str, text: str) -> Dict[str, object]:
+        """
+        Fill an intent's slots by searching the text for each slot type.
+
+        Args:
+            intent: Intent name
+            text: Utterance
+
+        Returns:
+            Dict of slot values found
+        """
+        normalized = normalize_text(text)
+        slots = {}
+        for name, slot_type, pattern in self._slot_patterns.get(intent, []):
+            match = pattern.search(normalized)
+            if match:
+                slots[name] = convert_slot(slot_type, match.group(0))
+        return slots
+
+    def match(self, text: str, min_confidence: float) -> Optional[Intent]:
+        """
+        Classify an utterance into an Intent if the match is confident enough.
+
+        Args:
+            text: Utterance
+            min_confidence: Confidence below which None is returned
+
+        Returns:
+            Intent with slots, or None (unsure, or a required slot is missing)
+        """
+        name, confidence = self.classify(text)
+        if name is None or confidence < min_confidence:
+            logger.debug(f"Classifier unsure: '{text}' -> {name} ({confidence:.2f})")
+            return None
+
+        slots = self.extract_slots(name, text)
+        missing = [slot for slot in self.required_slots.get(name, []) if slot not in slots]
+        if missing:
+            logger.debug(f"Classifier: '{text}' looks like {name} but has no {', '.join(missing)}")
+            return None
+
+        logger.info(f"Classified intent: {name} (confidence {confidence:.2f})")
+        return Intent(name=name, slots=slots, confidence=round(confidence, 3), raw_text=text)
+
+
+# Global classifier instance
+_classifier: Optional[IntentClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_intent_classifier() -> Optional[IntentClassifier]:
+    """
+    Get or create the global intent classifier.
+
+    Returns:
+        IntentClassifier built from rules.yaml, or None if disabled via INTENT_CLASSIFIER
+    """
+    global _classifier
+    if os.getenv("INTENT_CLASSIFIER", "true").lower() != "true":
+        return None
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = IntentClassifier.from_rules()
+    return _classifier
@@ -1,15 +1,60 @@
 """
 Fallback LLM Handler
-Uses Boson's LLM for conversational responses when no command is matched.
+Uses Boson's LLM to resolve commands the rules missed (function calling)
+and for conversational responses when no command is matched.
 """
 
-import os
+import re
+import json
 import logging
-import openai
+import threading
+from dataclasses import dataclass
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.boson_client import get_boson_client
+from app.call_policy import get_call_policy
+from app.intents.rules import RuleEngine, get_rule_engine
+from app.intents.slots import convert_slot
+from app.intents.types import Intent
+from app.tracing import span
 
 logger = logging.getLogger(__name__)
 
 
+# Spoken when the LLM can't be reached
+ERROR_RESPONSE = "Sorry, I'm having trouble thinking right now. Could you try again?"
+
+CHAT_MODEL = "Qwen3-32B-non-thinking-Hackathon"
+
+# System prompt - define car's personality
+SYSTEM_PROMPT = """You are an intelligent AI assistant built into a car. 
+You are helpful, friendly, and concise. Keep responses brief (1-2 sentences max).
+You can drive to the cafeteria, play the radio, and have conversations.
+Be conversational and natural, like a helpful companion on a drive."""
+
+# Added to the system prompt when the car's commands are offered as tools
+TOOLS_PROMPT = SYSTEM_PROMPT + """
+If the user wants something one of your tools does, call that tool right away, before writing any text.
+Otherwise just answer briefly; never describe a tool call instead of making it."""
+
+# The model gives no score for a tool call: trusted over an unsure
+# classifier, below a full rule match
+TOOL_CALL_CONFIDENCE = 0.8
+
+# JSON schemas of slot types that aren't plain strings (destinations get an enum)
+_SLOT_SCHEMAS = {
+    "duration": {"type": "number", "description": "Duration in seconds"},
+    "number": {"type": "number"},
+}
+
+# Sentence end: terminal punctuation (plus closing quotes/brackets) followed by whitespace
+_SENTENCE_END = re.compile(r'[.!?…]+["\')\]]*\s+')
+
+# Words ending in "." that don't end a sentence
+_ABBREVIATIONS = {"mr.", "mrs.", "ms.", "dr.", "st.", "vs.", "e.g.", "i.e.", "etc.", "approx."}
+
+
 def chat_with_car(user_message: str) -> str:
     """
     Have a conversation with the car using Boson's LLM.
@@ -24,42 +69,29 @@ def chat_with_car(user_message: str) -> str:
         str: Car's response text
     """
     try:
-        # Get API credentials
-        api_key = os.getenv("BOSON_API_KEY")
-        if not api_key:
-            raise ValueError("BOSON_API_KEY environment variable not set")
-        
-        base_url = os.getenv("BOSON_BASE_URL", "https://hackathon.boson.ai/v1")
-        
-        # Create client
-        client = openai.Client(
-            api_key=api_key,
-            base_url=base_url
-        )
-        
-        # System prompt - define car's personality
-        system_prompt = """You are an intelligent AI assistant built into a car. 
-You are helpful, friendly, and concise. Keep responses brief (1-2 sentences max).
-You can drive to the cafeteria, play the radio, and have conversations.
-Be conversational and natural, like a helpful companion on a drive."""
+        # Shared pooled client
+        boson = get_boson_client()
+        client = boson.endpoint("chat")
+        policy = get_call_policy("chat", boson.read_timeout("chat"))
         
         logger.info(f"LLM chat: '{user_message[:50]}...'")
         
         # Use Qwen3-32B-non-thinking for fast responses without thinking tags
-        response = client.chat.completions.create(
-            model="Qwen3-32B-non-thinking-Hackathon",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            max_tokens=128,
-            temperature=0.7
-        )
+        with span("llm"):
+            response = policy.call(lambda timeout: client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message}
+                ],
+                max_tokens=128,
+                temperature=0.7,
+                timeout=timeout
+            ))
         
         car_response = response.choices[0].message.content.strip()
         
         # Clean up any remaining <think> tags if they somehow appear
-        import re
         car_response = re.sub(r'<think>.*?</think>', '', car_response, flags=re.DOTALL).strip()
         
         logger.info(f"LLM response: '{car_response}'")
@@ -68,4 +100,385 @@ Be conversational and natural, like a helpful companion on a drive."""
     
     except Exception as e:
         logger.error(f"LLM chat failed: {str(e)[:100]}")
-        return "Sorry, I'm having trouble thinking right now. Could you try again?"
+        return ERROR_RESPONSE
+
+
+def stream_chat_with_car(user_message: str) -> Iterator[str]:
+    """
+    Stream the car's conversational reply token by token.
+    
+    Args:
+        user_message: User's message to the car
+    
+    Yields:
+        str: Text deltas as the model generates them
+    """
+    produced = False
+    try:
+        # Shared pooled client
+        boson = get_boson_client()
+        client = boson.endpoint("chat")
+        # Only opening the stream is retried (never hedged)
+        policy = get_call_policy("chat_stream", boson.read_timeout("chat"), hedge=False)
+        
+        logger.info(f"LLM chat (streaming): '{user_message[:50]}...'")
+        
+        # Spans the whole generation, which runs while earlier sentences play
+        with span("llm", streaming=True):
+            stream = policy.call(lambda timeout: client.chat.completions.create(
+                model=CHAT_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": user_message}
+                ],
+                max_tokens=128,
+                temperature=0.7,
+                stream=True,
+                timeout=timeout
+            ))
+            
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    produced = True
+                    yield delta
+    
+    except Exception as e:
+        logger.error(f"LLM chat failed: {str(e)[:100]}")
+        if not produced:
+            yield ERROR_RESPONSE
+
+
+def iter_sentences(deltas: Iterable[str]) -> Iterator[str]:
+    """
+    Split a stream of text deltas into sentences as soon as each one ends.
+    
+    <think> blocks are dropped. A sentence is only cut once the
+    punctuation is followed by whitespace, so "3.5" or a sentence still
+    being generated is never split early.
+    
+    Args:
+        deltas: Text fragments in generation order
+    
+    Yields:
+        str: Complete sentences (the remainder is flushed at the end)
+    """
+    buffer = ""
+    for delta in deltas:
+        buffer += delta
+        
+        # Drop finished think blocks; hold output while one is still open
+        buffer = re.sub(r'<think>.*?</think>', '', buffer, flags=re.DOTALL)
+        if "<think>" in buffer:
+            continue
+        
+        start = 0
+        for match in _SENTENCE_END.finditer(buffer):
+            candidate = buffer[start:match.end()].strip()
+            last_word = candidate.split()[-1].lower() if candidate else ""
+            if last_word in _ABBREVIATIONS:
+                continue
+            if candidate:
+                yield candidate
+            start = match.end()
+        buffer = buffer[start:]
+    
+    remainder = re.sub(r'<think>.*?(</think>|$)', '', buffer, flags=re.DOTALL).strip()
+    if remainder:
+        yield remainder
+
+
+@dataclass
+class LlmResolution:
+    """
+    What the LLM made of an utterance that no rule or classifier matched.
+    
+    Attributes:
+        intent: Command the model called as a tool, or None for conversation
+        reply: Spoken reply text (empty when streamed)
+        reply_deltas: Spoken reply as text deltas, when streaming a conversation
+    """
+    intent: Optional[Intent] = None
+    reply: str = ""
+    reply_deltas: Optional[Iterator[str]] = None
+
+
+# Marks the first tool call fragment in a resolve stream
+_TOOL_CALL_STARTED = object()
+
+# Tool schemas per offered intent list, built once
+_tool_schemas: Dict[Tuple[str, ...], List[dict]] = {}
+_tool_schemas_lock = threading.Lock()
+
+
+def tool_schemas(intent_names: Iterable[str]) -> List[dict]:
+    """
+    Get the OpenAI tool definitions of command intents.
+    
+    Built once per intent list and then reused as-is, so every request
+    sends a byte-identical system prompt and tool list that the server
+    can keep in its prompt cache.
+    
+    Args:
+        intent_names: Intents to offer, in order
+    
+    Returns:
+        List of tool definitions (shared; do not modify)
+    """
+    key = tuple(intent_names)
+    schemas = _tool_schemas.get(key)
+    if schemas is None:
+        with _tool_schemas_lock:
+            schemas = _tool_schemas.get(key)
+            if schemas is None:
+                schemas = _tool_schemas[key] = build_tool_schemas(key, get_rule_engine())
+    return schemas
+
+
+def build_tool_schemas(intent_names: Iterable[str], engine: RuleEngine) -> List[dict]:
+    """
+    Describe command intents as tools from their rules.
+    
+    Each intent becomes a function named after it in lower case, with its
+    rules.yaml description and its slots as parameters: destinations are
+    an enum of the known places, durations a number of seconds.
+    
+    Args:
+        intent_names: Intents to describe
+        engine: Rule engine with the rules and slot types
+    
+    Returns:
+        List of tool definitions
+    """
+    rules = {rule.get('name'): rule for rule in engine.rules}
+    schemas = []
+    for name in intent_names:
+        rule = rules.get(name, {})
+        properties = {}
+        for slot, slot_type in engine.slot_types_for(name).items():
+            if slot_type is not None and slot_type.name == "destination":
+                properties[slot] = {"type": "string", "enum": engine.destinations.names()}
+            else:
+                properties[slot] = dict(_SLOT_SCHEMAS.get(getattr(slot_type, "name", None), {"type": "string"}))
+        
+        schemas.append({
+            "type": "function",
+            "function": {
+                "name": name.lower(),
+                "description": rule.get('description') or name.replace("_", " ").lower(),
+                "parameters": {
+                    "type": "object",
+                    "properties": properties,
+                    "required": [slot for slot in rule.get('required_slots', []) if slot in properties],
+                },
+            },
+        })
+    return schemas
+
+
+def parse_tool_call(
+    name: str,
+    arguments: str,
+    user_message: str,
+    intent_names: Iterable[str],
+    engine: Optional[RuleEngine] = None
+) -> Optional[Intent]:
+    """
+    Turn a tool call into an Intent with typed slots.
+    
+    String arguments go through the same slot converters as rule
+    captures ("the cafeteria" -> "cafeteria", "two minutes" -> 120.0).
+    
+    Args:
+        name: Tool name the model called
+        arguments: JSON arguments of the call
+        user_message: Utterance the call answers
+        intent_names: Intents that were offered
+        engine: Rule engine with the slot types (default: global engine)
+    
+    Returns:
+        Intent, or None (unknown tool, bad arguments or a required slot missing)
+    """
+    engine = engine or get_rule_engine()
+    intent_name = (name or "").upper()
+    if intent_name not in intent_names:
+        logger.warning(f"LLM called unknown tool '{name}'")
+        return None
+    
+    try:
+        args = json.loads(arguments or "{}")
+    except ValueError:
+        args = None
+    if not isinstance(args, dict):
+        logger.warning(f"LLM tool call {name} has bad arguments: {str(arguments)[:100]}")
+        return None
+    
+    slot_types = engine.slot_types_for(intent_name)
+    slots = {}
+    for slot, value in args.items():
+        if slot not in slot_types or value is None or value == "":
+            continue
+        slots[slot] = convert_slot(slot_types[slot], value) if isinstance(value, str) else value
+    
+    required = next((rule.get('required_slots', []) for rule in engine.rules if rule.get('name') == intent_name), [])
+    missing = [slot for slot in required if slot not in slots]
+    if missing:
+        logger.warning(f"LLM tool call {name} has no {', '.join(missing)}")
+        return None
+    
+    return Intent(name=intent_name, slots=slots, confidence=TOOL_CALL_CONFIDENCE, raw_text=user_message)
+
+
+def _create_with_tools(client, user_message: str, tools: List[dict], timeout: float, stream: bool = False):
+    """One chat completion offering the commands as tools."""
+    return client.chat.completions.create(
+        model=CHAT_MODEL,
+        messages=[
+            {"role": "system", "content": TOOLS_PROMPT},
+            {"role": "user", "content": user_message}
+        ],
+        tools=tools,
+        tool_choice="auto",
+        max_tokens=128,
+        temperature=0.7,
+        stream=stream,
+        timeout=timeout
+    )
+
+
+def resolve_with_llm(user_message: str, intent_names: Iterable[str]) -> LlmResolution:
+    """
+    Ask the LLM for a command or a reply in a single request.
+    
+    The command intents are offered as tools. If the model calls one, the
+    call becomes an Intent; either way its text is the spoken reply, so an
+    utterance the rules missed costs one round-trip.
+    
+    Args:
+        user_message: User's message to the car
+        intent_names: Command intents to offer as tools
+    
+    Returns:
+        LlmResolution with the intent (if any) and reply text
+    """
+    intent_names = tuple(intent_names)
+    try:
+        # Shared pooled client
+        boson = get_boson_client()
+        client = boson.endpoint("chat")
+        policy = get_call_policy("chat", boson.read_timeout("chat"))
+        tools = tool_schemas(intent_names)
+        
+        logger.info(f"LLM resolve: '{user_message[:50]}...'")
+        
+        with span("llm", tools=len(tools)):
+            response = policy.call(lambda timeout: _create_with_tools(client, user_message, tools, timeout))
+        
+        message = response.choices[0].message
+        reply = re.sub(r'<think>.*?</think>', '', message.content or "", flags=re.DOTALL).strip()
+        intent = None
+        for call in message.tool_calls or []:
+            intent = parse_tool_call(call.function.name, call.function.arguments, user_message, intent_names)
+            if intent is not None:
+                break
+        
+        logger.info(f"LLM resolved: {intent.name if intent else 'no command'}, says '{reply}'")
+        return LlmResolution(intent=intent, reply=reply)
+    
+    except Exception as e:
+        logger.error(f"LLM resolve failed: {str(e)[:100]}")
+        return LlmResolution(reply=ERROR_RESPONSE)
+
+
+def stream_resolve_with_llm(user_message: str, intent_names: Iterable[str]) -> LlmResolution:
+    """
+    Like resolve_with_llm, but a conversational reply is streamed.
+    
+    Returns as soon as the model commits: a tool call (read to the end of
+    the stream, which is short) or the first text, which is then streamed
+    on as reply_deltas. The prompt asks for tool calls before any text; a
+    tool call after the reply has started to stream is logged and ignored.
+    
+    Args:
+        user_message: User's message to the car
+        intent_names: Command intents to offer as tools
+    
+    Returns:
+        LlmResolution with the intent, or with reply_deltas to speak
+    """
+    events = _stream_with_tools(user_message, tuple(intent_names))
+    for event in events:
+        if event is _TOOL_CALL_STARTED:
+            rest = list(events)
+            intent = next((e for e in rest if isinstance(e, Intent)), None)
+            reply = "".join(e for e in rest if isinstance(e, str))
+            return LlmResolution(intent=intent, reply=reply.strip())
+        if isinstance(event, str) and event.strip():
+            return LlmResolution(reply_deltas=_text_only(chain([event], events)))
+    return LlmResolution()
+
+
+def _stream_with_tools(user_message: str, intent_names: Tuple[str, ...]) -> Iterator[object]:
+    """
+    Stream a tool-offering completion.
+    
+    Yields:
+        str text deltas as they arrive, _TOOL_CALL_STARTED at the first tool
+        call fragment, and the Intent of the first valid tool call (if any)
+        once the stream ends
+    """
+    produced = False
+    try:
+        # Shared pooled client
+        boson = get_boson_client()
+        client = boson.endpoint("chat")
+        # Only opening the stream is retried (never hedged)
+        policy = get_call_policy("chat_stream", boson.read_timeout("chat"), hedge=False)
+        tools = tool_schemas(intent_names)
+        
+        logger.info(f"LLM resolve (streaming): '{user_message[:50]}...'")
+        
+        with span("llm", streaming=True, tools=len(tools)):
+            stream = policy.call(lambda timeout: _create_with_tools(client, user_message, tools, timeout, stream=True))
+            
+            # Tool call fragments by index: [name, arguments]
+            calls: Dict[int, List[str]] = {}
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                for fragment in delta.tool_calls or []:
+                    if not calls:
+                        yield _TOOL_CALL_STARTED
+                    call = calls.setdefault(fragment.index, ["", ""])
+                    if fragment.function is not None:
+                        call[0] += fragment.function.name or ""
+                        call[1] += fragment.function.arguments or ""
+                if delta.content:
+                    produced = True
+                    yield delta.content
+        
+        for name, arguments in (calls[index] for index in sorted(calls)):
+            intent = parse_tool_call(name, arguments, user_message, intent_names)
+            if intent is not None:
+                logger.info(f"LLM resolved: {intent.name}")
+                yield intent
+                break
+    
+    except Exception as e:
+        logger.error(f"LLM resolve failed: {str(e)[:100]}")
+        if not produced:
+            yield ERROR_RESPONSE
+
+
+def _text_only(events: Iterable[object]) -> Iterator[str]:
+    """Text deltas of a resolve stream whose spoken reply has already started."""
+    for event in events:
+        if event is _TOOL_CALL_STARTED:
+            continue
+        if isinstance(event, Intent):
+            logger.warning(f"LLM called {event.name} after starting its reply, ignoring the call")
+        else:
+            yield event
@@ -0,0 +1,206 @@
+"""
+Gazetteer
+Indexes known place names for slot extraction and normalizes captured values.
+"""
+
+import re
+import logging
+import importlib.util
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Trie key marking the end of an alias (holds the canonical name)
+_END = ""
+
+# Leading articles ignored when looking up a captured phrase
+_ARTICLES = ("the ", "a ", "an ")
+
+
+class Gazetteer:
+    """
+    Lookup table of canonical entities and the phrases that name them.
+
+    Aliases are indexed twice: a hash index for normalizing a captured
+    phrase in O(1), and a token trie that is compiled into a regex
+    fragment with shared prefixes factored out. The fragment is embedded
+    into the intent rules, so recognizing any of the aliases stays part of
+    the single matching pass.
+    """
+
+    def __init__(self, entries: Dict[str, Iterable[str]]):
+        """
+        Build the indexes.
+
+        Args:
+            entries: Canonical name -> aliases (the canonical name is always an alias)
+        """
+        self._index: Dict[str, str] = {}
+        self._trie: dict = {}
+
+        for canonical, aliases in entries.items():
+            for alias in [canonical, *aliases]:
+                self.add(alias, canonical)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+        Normalize a phrase for lookup (case, whitespace, leading article).
+
+        Args:
+            text: Phrase as spoken or captured
+
+        Returns:
+            str: Normalized phrase
+        """
+        text = " ".join(text.lower().split())
+        for article in _ARTICLES:
+            if text.startswith(article):
+                return text[len(article):]
+        return text
+
+    def add(self, alias: str, canonical: str) -> None:
+        """
+        Index a single alias.
+
+        Args:
+            alias: Phrase that names the entity
+            canonical: Canonical entity name
+        """
+        key = self.normalize(alias)
+        if not key:
+            return
+
+        existing = self._index.get(key)
+        if existing is not None and existing != canonical:
+            logger.warning(f"Alias '{key}' already names '{existing}', ignoring it for '{canonical}'")
+            return
+        self._index[key] = canonical
+
+        node = self._trie
+        for token in key.split(" "):
+            node = node.setdefault(token, {})
+        node[_END] = canonical
+
+    def lookup(self, text: str) -> Optional[str]:
+        """
+        Resolve a phrase to its canonical name.
+
+        Args:
+            text: Phrase to resolve
+
+        Returns:
+            str: Canonical name, or None if the phrase is not known
+        """
+        return self._index.get(self.normalize(text))
+
+    def find(self, text: str) -> List[Tuple[str, str]]:
+        """
+        Find every known alias in free text, preferring the longest match.
+
+        Args:
+            text: Text to scan
+
+        Returns:
+            List of (matched phrase, canonical name) in order of appearance
+        """
+        tokens = re.findall(r"[\w'-]+", text.lower())
+        found = []
+        i = 0
+        while i < len(tokens):
+            node = self._trie
+            best = None
+            j = i
+            while j < len(tokens) and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if _END in node:
+                    best = (j, node[_END])
+            if best is None:
+                i += 1
+                continue
+            end, canonical = best
+            found.append((" ".join(tokens[i:end]), canonical))
+            i = end
+        return found
+
+    def pattern(self) -> str:
+        """
+        Compile the aliases into a regex fragment (no capturing groups).
+
+        Returns:
+            str: Regex matching any alias as whole words, or a never-matching
+            pattern if the gazetteer is empty
+        """
+        return self._node_pattern(self._trie) or r"(?!)"
+
+    def _node_pattern(self, node: dict) -> Optional[str]:
+        # Longest tokens first so a shorter word never shadows a longer one
+        tokens = sorted((t for t in node if t != _END), key=lambda t: (-len(t), t))
+        branches = []
+        for token in tokens:
+            child = node[token]
+            branch = re.escape(token) + r"(?!\w)"
+            rest = self._node_pattern(child)
+            if rest is not None:
+                tail = rf"\s+{rest}"
+                branch += f"(?:{tail})?" if _END in child else tail
+            branches.append(branch)
+
+        if not branches:
+            return None
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    def names(self) -> List[str]:
+        """
+        Get all canonical names.
+
+        Returns:
+            List of canonical names
+        """
+        return sorted(set(self._index.values()))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def load_routes(routes_path: Optional[str] = None) -> dict:
+    """
+    Load the ROUTES table from demo/routes.py.
+
+    Args:
+        routes_path: Path to a routes module (defaults to demo/routes.py)
+
+    Returns:
+        dict: Destination -> route info, or {} if the file cannot be loaded
+    """
+    if routes_path is None:
+        routes_path = Path(__file__).parent.parent.parent / "demo" / "routes.py"
+
+    try:
+        spec = importlib.util.spec_from_file_location("demo_routes", str(routes_path))
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        return dict(getattr(module, "ROUTES", {}))
+    except Exception as e:
+        logger.error(f"Failed to load routes from {routes_path}: {e}")
+        return {}
+
+
+def build_destination_gazetteer(routes: Optional[dict] = None) -> Gazetteer:
+    """
+    Build the destination gazetteer from the route table.
+
+    Args:
+        routes: Destination -> route info with an "aliases" list (defaults to demo/routes.py)
+
+    Returns:
+        Gazetteer: Destinations indexed by alias
+    """
+    if routes is None:
+        routes = load_routes()
+    return Gazetteer({name: route.get("aliases", []) for name, route in routes.items()})
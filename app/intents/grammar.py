@@ -0,0 +1,125 @@
+"""
+Command Grammar
+Closed-vocabulary command phrases generated from the intent rules.
+"""
+
+import logging
+from itertools import product
+from typing import Dict, List, Optional
+
+from app.intents.rules import RuleEngine, get_rule_engine, normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+# The regex parser is internal to CPython; without it there is no local grammar
+try:
+    try:
+        from re import _constants as sre_constants, _parser as sre_parse
+    except ImportError:  # Python < 3.11
+        import sre_constants
+        import sre_parse
+
+    # Zero-width items (\b, lookarounds) say nothing about the words spoken
+    _ZERO_WIDTH = (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT)
+    _REPEATS = (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT)
+except (ImportError, AttributeError) as e:
+    logger.warning(f"Regex parser unavailable, no command grammar for local ASR: {e}")
+    sre_constants = sre_parse = None
+
+
+def _is_space(item) -> bool:
+    op, av = item
+    return op == sre_constants.IN and av == [(sre_constants.CATEGORY, sre_constants.CATEGORY_SPACE)]
+
+
+def _expand(items, limit: int) -> Optional[List[str]]:
+    """Strings matched by a parsed regex sequence, or None if it is open-ended."""
+    results = [""]
+    for op, av in items:
+        if op == sre_constants.LITERAL:
+            options = [chr(av)]
+        elif op in _ZERO_WIDTH:
+            options = [""]
+        elif op == sre_constants.SUBPATTERN:
+            options = _expand(av[-1], limit)
+        elif op == sre_constants.BRANCH:
+            branches = [_expand(branch, limit) for branch in av[1]]
+            options = None if None in branches else [option for branch in branches for option in branch]
+        elif op in _REPEATS:
+            low, high, body = av
+            if len(body) == 1 and _is_space(body[0]):
+                options = [" "]
+            elif low == 0 and high == 1:
+                # An optional part that can't be enumerated (a number) is left out
+                options = [""] + (_expand(body, limit) or [])
+            elif low == high == 1:
+                options = _expand(body, limit)
+            else:
+                options = None
+        elif op == sre_constants.IN and _is_space((op, av)):
+            options = [" "]
+        elif op == sre_constants.IN and all(kind == sre_constants.LITERAL for kind, _ in av):
+            options = [chr(code) for _, code in av]
+        else:
+            options = None
+
+        if options is None:
+            return None
+        results = [a + b for a, b in product(results, options)][:limit]
+    return results
+
+
+def expand_regex(regex: str, limit: int = 512) -> Optional[List[str]]:
+    """
+    Enumerate the phrases a rule pattern matches on its own.
+
+    Literals, alternations, optional parts and \\s+ are expanded; optional
+    parts that cannot be enumerated (e.g. a {number} slot) are dropped.
+
+    Args:
+        regex: Rule pattern with slot placeholders already expanded
+        limit: Maximum phrases to return
+
+    Returns:
+        List of normalized phrases, or None if the pattern is open-ended
+        (or the regex parser is unavailable)
+    """
+    if sre_parse is None:
+        return None
+    try:
+        phrases = _expand(list(sre_parse.parse(regex)), limit)
+    except Exception:
+        return None
+    if phrases is None:
+        return None
+    return list(dict.fromkeys(p for p in (normalize_text(phrase) for phrase in phrases) if p))
+
+
+def command_grammar(engine: Optional[RuleEngine] = None, limit_per_pattern: int = 512) -> Dict[str, str]:
+    """
+    Build the closed vocabulary of spoken commands from the intent rules.
+
+    Every phrase is a complete utterance that the rule engine matches, so a
+    locally recognized phrase goes through the normal intent path.
+
+    Args:
+        engine: Rule engine to read the rules from (default: global engine)
+        limit_per_pattern: Maximum phrases generated from one pattern
+
+    Returns:
+        Dict of phrase -> intent name, in rule priority order (empty if the
+        regex parser is unavailable)
+    """
+    if sre_parse is None:
+        return {}
+    engine = engine or get_rule_engine()
+    grammar: Dict[str, str] = {}
+    for intent, regex in engine.expanded_patterns():
+        for phrase in expand_regex(regex, limit_per_pattern) or []:
+            grammar.setdefault(phrase, intent)
+
+    # Only keep phrases that really resolve to their intent (earlier rules win)
+    grammar = {phrase: intent for phrase, intent in grammar.items() if engine.resolve(phrase) == intent}
+    logger.debug(f"Command grammar: {len(grammar)} phrases")
+    return grammar
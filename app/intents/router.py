@@ -0,0 +1,68 @@
+"""
+Intent Router
+Tiered intent resolution: regex rules, then the local classifier, then the LLM.
+"""
+
+import os
+import logging
+
+from app.intents.types import Intent
+from app.intents.rules import get_rule_engine
+from app.intents.classifier import get_intent_classifier
+
+logger = logging.getLogger(__name__)
+
+
+# Intents that move the car: a weak rule match alone never runs them
+_ACTUATOR_INTENTS = ("NAVIGATE", "DANCE")
+
+
+def match_intent(text: str) -> Intent:
+    """
+    Resolve a transcript to an intent, cheapest tier first.
+    
+    1. Regex rules (cached). Their confidence is how much of the utterance
+       the pattern covers, so a bare keyword in a longer sentence ("kill
+       the music") is only a weak match.
+    2. Nearest-neighbour classifier over example utterances, for
+       paraphrases. It answers when no rule matched, or overrides a weak
+       rule match it is more confident about. An ESTOP rule match is never
+       overridden.
+    3. Anything else is UNKNOWN and goes to the LLM in the dispatcher.
+       That includes weak NAVIGATE/DANCE rule matches the classifier does
+       not agree with ("I went to the cafeteria yesterday"): they would
+       move the car. Weak matches of the other intents are kept.
+    
+    Args:
+        text: Input text to match (typically from ASR)
+    
+    Returns:
+        Intent object
+    """
+    intent = get_rule_engine().match(text)
+    if intent.name == "ESTOP":
+        return intent
+    
+    rule_min_confidence = float(os.getenv("INTENT_RULE_MIN_CONFIDENCE", "0.9"))
+    if intent.name != "UNKNOWN" and intent.confidence >= rule_min_confidence:
+        return intent
+    
+    classifier = get_intent_classifier()
+    if classifier is not None:
+        min_confidence = float(os.getenv("INTENT_CLASSIFIER_MIN_CONFIDENCE", "0.4"))
+        classified = classifier.match(text, max(min_confidence, intent.confidence))
+        if classified is not None:
+            if intent.name != "UNKNOWN" and classified.name != intent.name:
+                logger.info(f"Classifier overrides weak rule match {intent.name} ({intent.confidence:.2f})")
+            return classified
+        
+        if intent.name in _ACTUATOR_INTENTS:
+            name, confidence = classifier.classify(text)
+            if name == intent.name and confidence >= min_confidence:
+                # The classifier agrees, just less confidently than the rule
+                return intent
+    
+    if intent.name in _ACTUATOR_INTENTS:
+        logger.info(f"Weak {intent.name} rule match ({intent.confidence:.2f}) left to the LLM")
+        return Intent(name="UNKNOWN", slots={}, confidence=0.0, raw_text=text)
+    return intent
@@ -3,36 +3,131 @@ Intent Rules Engine
 Loads rules from YAML and matches text to intents using regex patterns.
 """
 
+import os
 import re
 import logging
+import threading
 import yaml
+from collections import OrderedDict
+from dataclasses import replace
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 
 from app.intents.types import Intent, IntentName
+from app.intents.gazetteer import Gazetteer, build_destination_gazetteer
+from app.intents.slots import SlotType, default_slot_types, convert_slot
 
 logger = logging.getLogger(__name__)
 
 
+# {type} placeholders in rule patterns, expanded to the slot type's regex
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+# Named group definitions and backreferences in rule patterns
+_NAMED_GROUP = re.compile(r"\(\?P<(\w+)>")
+_NAMED_BACKREF = re.compile(r"\(\?P=(\w+)\)")
+
+# Punctuation dropped before matching (keeps apostrophes, hyphens and decimal points)
+_PUNCTUATION = re.compile(r"(?!(?<=\d)[.,:](?=\d))[^\w\s'-]")
+
+# Hesitation words ASR transcribes but no rule cares about
+FILLER_WORDS = frozenset({"um", "umm", "uh", "uhh", "uhm", "er", "erm", "ah", "hmm", "mm", "mhm"})
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a transcript for matching and caching.
+    
+    Casefolds, replaces punctuation with spaces, drops filler words and
+    collapses whitespace, so "Um, pause!" and "pause" are the same key.
+    
+    Args:
+        text: Raw transcript
+    
+    Returns:
+        str: Normalized text
+    """
+    words = _PUNCTUATION.sub(" ", text.casefold()).split()
+    return " ".join(word for word in words if word not in FILLER_WORDS)
+
+
 class RuleEngine:
     """
     Rule-based intent matcher using regex patterns from YAML configuration.
+    
+    All patterns are compiled once at load into a single alternation regex
+    in rule order. Each pattern ends in an empty named marker group that
+    identifies it (cheaper than wrapping it in a capturing group).
+    
+    A leftmost search finds a candidate. No pattern can match before it,
+    and at the same position alternation order already prefers earlier
+    rules, so a higher-priority rule could only match further right. That
+    is checked by resuming the search with just the higher-priority prefix
+    of the alternation, which usually finds nothing. Text that matches no
+    rule costs a single search.
+    
+    Named groups in a pattern become slots, converted by the rule's
+    slot_types (or the type with the same name as the slot). Patterns can
+    embed a slot type's regex with a {type} placeholder, e.g.
+    (?P<destination>{destination}) matches any alias in the destination
+    gazetteer. Group names are prefixed per pattern when compiled, so
+    several patterns may capture the same slot.
+    
+    Results are kept in a bounded LRU cache keyed on the normalized text,
+    since ASR keeps producing the same few commands. The cache is cleared
+    whenever the rules are recompiled.
     """
     
-    def __init__(self, rules_path: Optional[str] = None):
+    def __init__(
+        self,
+        rules_path: Optional[str] = None,
+        destinations: Optional[Gazetteer] = None,
+        cache_size: Optional[int] = None
+    ):
         """
         Initialize the rule engine and load rules from YAML.
         
         Args:
             rules_path: Path to rules.yaml file (defaults to same directory)
+            destinations: Destination gazetteer (defaults to demo/routes.py)
+            cache_size: Max cached results (default from INTENT_CACHE_SIZE or 256, 0 disables)
         """
         if rules_path is None:
             # Default to rules.yaml in the same directory as this file
             rules_path = Path(__file__).parent / "rules.yaml"
         
+        if destinations is None:
+            destinations = build_destination_gazetteer()
+        if cache_size is None:
+            cache_size = int(os.getenv("INTENT_CACHE_SIZE", "256"))
+        
+        self.rules_path = rules_path
+        self.cache_size = cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: "OrderedDict[str, Intent]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        
+        self.destinations = destinations
+        self.slot_types: Dict[str, SlotType] = default_slot_types(destinations)
         self.rules = self._load_rules(rules_path)
+        self._compile()
         logger.info(f"Loaded {len(self.rules)} intent rules")
     
+    def reload(self, destinations: Optional[Gazetteer] = None) -> None:
+        """
+        Reload rules from YAML (and optionally new destinations) and drop cached results.
+        
+        Args:
+            destinations: New destination gazetteer (keeps the current one if None)
+        """
+        if destinations is not None:
+            self.destinations = destinations
+            self.slot_types = default_slot_types(destinations)
+        self.rules = self._load_rules(self.rules_path)
+        self._compile()
+        logger.info(f"Reloaded {len(self.rules)} intent rules")
+    
     def _load_rules(self, rules_path: Path) -> List[Dict[str, Any]]:
         """
         Load intent rules from YAML file.
@@ -51,6 +146,153 @@ class RuleEngine:
             logger.error(f"Failed to load rules from {rules_path}: {e}")
             return []
     
+    def _compile(self) -> None:
+        """
+        Compile every rule pattern into one priority-ordered matcher.
+        
+        Invalid patterns are logged and skipped.
+        """
+        self._alternatives: List[Tuple[str, Dict[str, Any], str, str, List[Tuple[str, str, Optional[SlotType]]]]] = []
+        self._prefix_matchers: Dict[int, Optional[re.Pattern]] = {}
+        
+        for rule_index, rule in enumerate(self.rules):
+            types = rule.get('slot_types', {})
+            for name in types.values():
+                if name not in self.slot_types:
+                    logger.error(f"Unknown slot type '{name}' in rule {rule.get('name')}")
+            
+            for pattern_index, pattern in enumerate(rule.get('patterns', [])):
+                group = f"r{rule_index}_p{pattern_index}"
+                try:
+                    regex, slot_groups = self._expand(pattern, group)
+                    re.compile(regex)
+                except re.error as e:
+                    logger.error(f"Invalid regex pattern '{pattern}': {e}")
+                    continue
+                
+                # Resolve slot types once so matching only does group lookups
+                slot_specs = [
+                    (name, slot_group, self.slot_types.get(types.get(name, name)))
+                    for name, slot_group in slot_groups.items()
+                ]
+                self._alternatives.append((group, rule, pattern, regex, slot_specs))
+        
+        self._group_index = {group: i for i, (group, *_) in enumerate(self._alternatives)}
+        self._matcher = self._prefix_matcher(len(self._alternatives))
+        self.clear_cache()
+    
+    def _expand(self, pattern: str, group: str) -> Tuple[str, Dict[str, str]]:
+        """
+        Expand slot type placeholders and make named groups unique to one pattern.
+        
+        Args:
+            pattern: Rule pattern as written in rules.yaml
+            group: Marker group name of the pattern
+        
+        Returns:
+            Tuple of (regex, slot name -> group name in the combined regex)
+        """
+        def placeholder(match):
+            slot_type = self.slot_types.get(match.group(1))
+            # Anything else (e.g. a{2}) is ordinary regex syntax
+            return f"(?:{slot_type.pattern})" if slot_type else match.group(0)
+        
+        regex = _PLACEHOLDER.sub(placeholder, pattern)
+        slot_groups = {name: f"{group}__{name}" for name in _NAMED_GROUP.findall(regex)}
+        regex = _NAMED_GROUP.sub(lambda m: f"(?P<{slot_groups[m.group(1)]}>", regex)
+        regex = _NAMED_BACKREF.sub(lambda m: f"(?P={slot_groups.get(m.group(1), m.group(1))})", regex)
+        return regex, slot_groups
+    
+    def _prefix_matcher(self, count: int) -> Optional[re.Pattern]:
+        """
+        Get the alternation of the first `count` patterns (compiled on first use).
+        
+        Args:
+            count: Number of highest-priority patterns to include
+        
+        Returns:
+            Compiled regex, or None when count is 0
+        """
+        if count not in self._prefix_matchers:
+            if count == 0:
+                self._prefix_matchers[count] = None
+            else:
+                alternation = "|".join(
+                    f"(?:{regex})(?P<{group}>)" for group, _, _, regex, _ in self._alternatives[:count]
+                )
+                self._prefix_matchers[count] = re.compile(alternation, re.IGNORECASE)
+        return self._prefix_matchers[count]
+    
+    def _find(self, text: str) -> Optional[Tuple[Dict[str, Any], str, Dict[str, Any], float]]:
+        """
+        Find the highest-priority rule matching the text.
+        
+        Args:
+            text: Normalized input text
+        
+        Returns:
+            Tuple of (rule, pattern, slots, confidence), or None if nothing matched
+        """
+        if self._matcher is None:
+            return None
+        
+        best = None
+        match = self._matcher.search(text)
+        while match is not None:
+            # The marker group closes last, so it names the matching pattern
+            index = self._group_index[match.lastgroup]
+            best = (index, match)
+            matcher = self._prefix_matcher(index)
+            if matcher is None:
+                break
+            match = matcher.search(text, match.start() + 1)
+        
+        if best is None:
+            return None
+        
+        index, match = best
+        _, rule, pattern, _, slot_specs = self._alternatives[index]
+        return rule, pattern, self._extract_slots(rule, match, slot_specs), self._confidence(text, match)
+    
+    @staticmethod
+    def _confidence(text: str, match: re.Match) -> float:
+        """
+        Confidence of a rule match from how much of the utterance it explains.
+        
+        A pattern covering the whole utterance ("stop the car") scores 1.0; a
+        keyword inside a long sentence ("I like that song you played") scores
+        down to 0.5.
+        
+        Args:
+            text: Normalized input text
+            match: Match of the winning pattern
+        
+        Returns:
+            float: Confidence between 0.5 and 1.0
+        """
+        covered = len(text[match.start():match.end()].strip())
+        return round(0.5 + 0.5 * covered / max(len(text), 1), 3)
+    
+    @staticmethod
+    def _extract_slots(rule: Dict[str, Any], match: re.Match, slot_specs: List[Tuple[str, str, Optional[SlotType]]]) -> Dict[str, Any]:
+        """
+        Build the slots for a match: static slots, overridden by typed captures.
+        
+        Args:
+            rule: Matched rule
+            match: Match object from the combined regex
+            slot_specs: (slot name, group name, slot type) for the matched pattern
+        
+        Returns:
+            Dict of slot values
+        """
+        slots = dict(rule.get('slots', {}))
+        for name, group, slot_type in slot_specs:
+            raw = match.group(group)
+            if raw is not None:
+                slots[name] = convert_slot(slot_type, raw)
+        return slots
+    
     def match(self, text: str) -> Intent:
         """
         Match input text against rules to extract intent.
@@ -62,34 +304,61 @@ class RuleEngine:
             text: Input text to match (typically from ASR)
         
         Returns:
-            Intent object with name and extracted slots
+            Intent object with name and extracted slots (shared, immutable)
         """
         # Normalize text for matching
-        normalized_text = text.lower().strip()
+        normalized_text = normalize_text(text)
+        
+        if self.cache_size > 0:
+            with self._cache_lock:
+                intent = self._cache.get(normalized_text)
+                if intent is not None:
+                    self._cache.move_to_end(normalized_text)
+                    self.cache_hits += 1
+                else:
+                    self.cache_misses += 1
+            
+            if intent is not None:
+                logger.debug(f"Intent cache hit: '{normalized_text}' -> {intent.name}")
+                # Same intent, but keep this utterance's text (used for chat)
+                return intent if intent.raw_text == text else replace(intent, raw_text=text)
+        
+        intent = self._match_normalized(normalized_text, text)
+        
+        if self.cache_size > 0:
+            with self._cache_lock:
+                self._cache[normalized_text] = intent
+                if len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        
+        return intent
+    
+    def _match_normalized(self, normalized_text: str, text: str) -> Intent:
+        """
+        Run the rule matcher (uncached).
+        
+        Args:
+            normalized_text: Output of normalize_text
+            text: Original input text
         
+        Returns:
+            Intent object
+        """
         logger.debug(f"Matching text: '{normalized_text}'")
         
-        # Try each rule in order
-        for rule in self.rules:
+        # Single pass over all rules in priority order
+        found = self._find(normalized_text)
+        if found is not None:
+            rule, pattern, slots, confidence = found
             intent_name = rule.get('name')
-            patterns = rule.get('patterns', [])
-            default_slots = rule.get('slots', {})
+            logger.info(f"Matched intent: {intent_name} (pattern: {pattern[:50]}...)")
             
-            # Try each pattern for this intent
-            for pattern in patterns:
-                try:
-                    if re.search(pattern, normalized_text, re.IGNORECASE):
-                        # Match found!
-                        logger.info(f"Matched intent: {intent_name} (pattern: {pattern[:50]}...)")
-                        
-                        return Intent(
-                            name=intent_name,
-                            slots=default_slots.copy(),
-                            confidence=1.0,
-                            raw_text=text
-                        )
-                except re.error as e:
-                    logger.error(f"Invalid regex pattern '{pattern}': {e}")
+            return Intent(
+                name=intent_name,
+                slots=slots,
+                confidence=confidence,
+                raw_text=text
+            )
         
         # No match found
         logger.warning(f"No intent matched for: '{text}'")
@@ -99,6 +368,66 @@ class RuleEngine:
             confidence=0.0,
             raw_text=text
         )
+    
+    def resolve(self, text: str) -> Optional[str]:
+        """
+        Get the intent the rules give a phrase, without caching or logging.
+        
+        For checking generated phrases rather than matching user input.
+        
+        Args:
+            text: Phrase to check
+        
+        Returns:
+            Intent name, or None if no rule matches
+        """
+        found = self._find(normalize_text(text))
+        return found[0].get('name') if found is not None else None
+    
+    def expanded_patterns(self) -> List[Tuple[str, str]]:
+        """
+        Get every compiled pattern in priority order.
+
+        Returns:
+            List of (intent name, regex with slot placeholders expanded)
+        """
+        return [(rule.get('name'), regex) for _, rule, _, regex, _ in self._alternatives]
+
+    def slot_types_for(self, intent_name: str) -> Dict[str, Optional[SlotType]]:
+        """
+        Get the slots an intent's patterns capture and their types.
+        
+        Args:
+            intent_name: Intent name
+        
+        Returns:
+            Dict of slot name -> slot type (None for plain strings)
+        """
+        return {
+            name: slot_type
+            for _, rule, _, _, slot_specs in self._alternatives if rule.get('name') == intent_name
+            for name, _, slot_type in slot_specs
+        }
+    
+    def clear_cache(self) -> None:
+        """Drop all cached match results."""
+        with self._cache_lock:
+            self._cache.clear()
+    
+    def cache_stats(self) -> dict:
+        """
+        Get match cache statistics.
+        
+        Returns:
+            dict: Entries, capacity, hits and misses
+        """
+        with self._cache_lock:
+            return {
+                "entries": len(self._cache),
+                "size": self.cache_size,
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+            }
 
 
 # Global rule engine instance
@@ -122,6 +451,8 @@ def match_intent(text: str) -> Intent:
     """
     Convenience function to match text to intent using the global rule engine.
     
+    Rules only; app.intents.match_intent adds the classifier tier.
+    
     Args:
         text: Input text to match
     
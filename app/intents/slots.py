@@ -0,0 +1,171 @@
+"""
+Slot Types
+Regex fragments and converters for typed slots captured by intent rules.
+"""
+
+import re
+import logging
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Union
+
+from app.intents.gazetteer import Gazetteer
+
+logger = logging.getLogger(__name__)
+
+
+Number = Union[int, float]
+
+_UNITS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "eleven": 11, "twelve": 12, "thirteen": 13, "fourteen": 14, "fifteen": 15,
+    "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+_TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50,
+    "sixty": 60, "seventy": 70, "eighty": 80, "ninety": 90,
+}
+_SCALES = {"hundred": 100, "thousand": 1000}
+
+# Duration units in seconds
+_DURATION_UNITS = {
+    "second": 1, "seconds": 1, "sec": 1, "secs": 1,
+    "minute": 60, "minutes": 60, "min": 60, "mins": 60,
+    "hour": 3600, "hours": 3600, "hr": 3600, "hrs": 3600,
+}
+
+_NUMBER_WORD = "(?:" + "|".join(
+    sorted([*_UNITS, *_TENS, *_SCALES], key=len, reverse=True)
+) + r")(?!\w)"
+
+NUMBER_PATTERN = rf"(?:\d+(?:\.\d+)?|{_NUMBER_WORD}(?:(?:\s+|-)(?:and\s+)?{_NUMBER_WORD})*)"
+
+_DURATION_UNIT = "(?:" + "|".join(sorted(_DURATION_UNITS, key=len, reverse=True)) + r")(?!\w)"
+
+DURATION_PATTERN = rf"(?:{NUMBER_PATTERN}|half\s+an?|an?)\s*{_DURATION_UNIT}"
+
+_DURATION_PARTS = re.compile(rf"^(?P<amount>.*?)\s*(?P<unit>{_DURATION_UNIT})$")
+
+
+def parse_number(text: str) -> Optional[Number]:
+    """
+    Parse digits or English number words ("42", "2.5", "twenty-five").
+
+    Args:
+        text: Number as spoken or transcribed
+
+    Returns:
+        int or float: Parsed value, or None if the text is not a number
+    """
+    text = text.strip().lower()
+    try:
+        return int(text)
+    except ValueError:
+        pass
+    try:
+        return float(text)
+    except ValueError:
+        pass
+
+    total = 0
+    current = 0
+    seen = False
+    for token in re.split(r"[\s-]+", text):
+        if token == "and" and seen:
+            continue
+        if token in _UNITS:
+            current += _UNITS[token]
+        elif token in _TENS:
+            current += _TENS[token]
+        elif token == "hundred":
+            current = max(current, 1) * 100
+        elif token == "thousand":
+            total += max(current, 1) * 1000
+            current = 0
+        else:
+            return None
+        seen = True
+
+    return total + current if seen else None
+
+
+def parse_duration(text: str) -> Optional[float]:
+    """
+    Parse a spoken duration ("10 seconds", "two minutes", "half an hour").
+
+    Args:
+        text: Duration as spoken or transcribed
+
+    Returns:
+        float: Duration in seconds, or None if the text is not a duration
+    """
+    match = _DURATION_PARTS.match(" ".join(text.lower().split()))
+    if match is None:
+        return None
+
+    amount_text = match.group("amount")
+    if amount_text in ("a", "an"):
+        amount = 1
+    elif amount_text in ("half a", "half an"):
+        amount = 0.5
+    else:
+        amount = parse_number(amount_text)
+        if amount is None:
+            return None
+
+    return float(amount * _DURATION_UNITS[match.group("unit")])
+
+
+@dataclass(frozen=True)
+class SlotType:
+    """
+    A typed slot that rule patterns can reference as {name}.
+
+    Attributes:
+        name: Type name used in rules.yaml (placeholder and slot_types)
+        pattern: Regex fragment substituted for the placeholder (no capturing groups)
+        convert: Turns the captured text into a value, returning None if it cannot;
+                 a convert of None keeps the raw text
+    """
+    name: str
+    pattern: str
+    convert: Optional[Callable[[str], Any]]
+
+
+def default_slot_types(destinations: Gazetteer) -> Dict[str, SlotType]:
+    """
+    Build the slot types available to intent rules.
+
+    Args:
+        destinations: Gazetteer of known destinations
+
+    Returns:
+        Dict mapping type name to SlotType
+    """
+    return {
+        "destination": SlotType("destination", destinations.pattern(), destinations.lookup),
+        "number": SlotType("number", NUMBER_PATTERN, parse_number),
+        "duration": SlotType("duration", DURATION_PATTERN, parse_duration),
+    }
+
+
+def convert_slot(slot_type: Optional[SlotType], raw: str) -> Any:
+    """
+    Convert captured text with a slot type, falling back to the raw text.
+
+    Args:
+        slot_type: Type of the slot, or None for plain strings
+        raw: Captured text
+
+    Returns:
+        Converted value, or the stripped raw text if it could not be converted
+    """
+    raw = raw.strip()
+    if slot_type is None or slot_type.convert is None:
+        return raw
+
+    value = slot_type.convert(raw)
+    if value is None:
+        logger.debug(f"Could not convert '{raw}' as {slot_type.name}, keeping text")
+        return raw
+    return value
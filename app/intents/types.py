@@ -3,7 +3,8 @@ Intent Types
 Defines data structures for different types of user intents.
 """
 
-from typing import Literal, Dict, Any
+from types import MappingProxyType
+from typing import Literal, Mapping, Any
 from dataclasses import dataclass
 
 
@@ -11,22 +12,29 @@ from dataclasses import dataclass
 IntentName = Literal["NAVIGATE", "PLAY_RADIO", "PAUSE_RADIO", "DANCE", "ESTOP", "HELP", "UNKNOWN"]
 
 
-@dataclass
+@dataclass(frozen=True)
 class Intent:
     """
     Represents a user intent extracted from speech.
     
+    Intents are immutable (slots are a read-only mapping), so one instance
+    can be cached and shared between callers.
+    
     Attributes:
         name: The type of intent (NAVIGATE, PLAY_RADIO, ESTOP, HELP, UNKNOWN)
         slots: Dictionary of extracted parameters (e.g., {"destination": "cafeteria"})
-        confidence: Confidence score (1.0 for rule-based, varies for LLM)
+        confidence: Confidence score (rule coverage, classifier similarity or LLM; 0.0 for UNKNOWN)
         raw_text: Original transcribed text
     """
     name: IntentName
-    slots: Dict[str, Any]
+    slots: Mapping[str, Any]
     confidence: float = 1.0
     raw_text: str = ""
     
+    def __post_init__(self):
+        """Freeze a copy of the slots so callers cannot mutate shared intents."""
+        object.__setattr__(self, "slots", MappingProxyType(dict(self.slots)))
+    
     def __str__(self) -> str:
         """String representation for logging."""
         slots_str = ", ".join(f"{k}={v}" for k, v in self.slots.items()) if self.slots else "none"
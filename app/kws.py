@@ -0,0 +1,345 @@
+"""
+Keyword Spotter
+Local template-matching keyword spotter (MFCC + DTW) for always-on command words.
+"""
+
+import os
+import sys
+import time
+import logging
+from collections import deque
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+from app.audio_codec import decode_audio, encode_wav
+
+logger = logging.getLogger(__name__)
+
+
+# Feature extraction parameters (fixed so templates and live audio agree)
+KWS_SAMPLE_RATE = 16000
+_WIN_SAMPLES = 400      # 25 ms
+_HOP_SAMPLES = 160      # 10 ms
+_N_FFT = 512
+_N_MELS = 26
+_N_MFCC = 13
+
+_mel_cache = {}
+
+
+def _mel_filterbank(sample_rate: int) -> np.ndarray:
+    """Triangular mel filterbank of shape (_N_MELS, _N_FFT // 2 + 1)."""
+    if sample_rate not in _mel_cache:
+        def hz_to_mel(hz):
+            return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+        def mel_to_hz(mel):
+            return 700.0 * (10 ** (mel / 2595.0) - 1.0)
+
+        mels = np.linspace(hz_to_mel(60.0), hz_to_mel(sample_rate / 2), _N_MELS + 2)
+        bins = np.floor((_N_FFT + 1) * mel_to_hz(mels) / sample_rate).astype(int)
+
+        bank = np.zeros((_N_MELS, _N_FFT // 2 + 1))
+        for m in range(1, _N_MELS + 1):
+            left, center, right = bins[m - 1], bins[m], bins[m + 1]
+            if center > left:
+                bank[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+            if right > center:
+                bank[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+        _mel_cache[sample_rate] = bank
+    return _mel_cache[sample_rate]
+
+
+_DCT = np.cos(np.pi / _N_MELS * (np.arange(_N_MELS) + 0.5)[None, :] * np.arange(_N_MFCC)[:, None])
+
+
+def mfcc(samples: np.ndarray, sample_rate: int = KWS_SAMPLE_RATE) -> np.ndarray:
+    """
+    Compute MFCC features (without c0).
+
+    Args:
+        samples: Mono samples (int16 or float)
+        sample_rate: Sample rate in Hz
+
+    Returns:
+        np.ndarray: Features of shape (frames, 12), empty if the audio is too short
+    """
+    x = np.asarray(samples)
+    x = x.astype(np.float32) / 32768.0 if x.dtype == np.int16 else x.astype(np.float32)
+    if len(x) < _WIN_SAMPLES:
+        return np.zeros((0, _N_MFCC - 1), dtype=np.float32)
+
+    x = np.append(x[0], x[1:] - 0.97 * x[:-1])  # pre-emphasis
+    count = 1 + (len(x) - _WIN_SAMPLES) // _HOP_SAMPLES
+    idx = np.arange(_WIN_SAMPLES)[None, :] + _HOP_SAMPLES * np.arange(count)[:, None]
+    frames = x[idx] * np.hamming(_WIN_SAMPLES)
+
+    power = np.abs(np.fft.rfft(frames, _N_FFT)) ** 2 / _N_FFT
+    energies = np.log(power @ _mel_filterbank(sample_rate).T + 1e-10)
+    # c0 (overall loudness) is dropped so distance doesn't depend on volume
+    return (energies @ _DCT.T)[:, 1:].astype(np.float32)
+
+
+def subsequence_dtw(template: np.ndarray, stream: np.ndarray) -> float:
+    """
+    Best alignment cost of a template anywhere inside a longer feature stream.
+
+    Start and end in the stream are free, so the keyword can sit anywhere in
+    the window. Steps (1,0), (1,1) and (1,2) allow speaking rates from half
+    to double the template's and keep each row a vectorized update.
+
+    Args:
+        template: Template features (n, d)
+        stream: Window features (m, d)
+
+    Returns:
+        float: Path cost normalized by template length (inf if stream is empty)
+    """
+    if len(template) == 0 or len(stream) == 0:
+        return float("inf")
+
+    cost = np.sqrt(((template[:, None, :] - stream[None, :, :]) ** 2).sum(axis=2))
+    acc = cost[0].copy()
+    for i in range(1, len(template)):
+        best = acc.copy()
+        best[1:] = np.minimum(best[1:], acc[:-1])
+        best[2:] = np.minimum(best[2:], acc[:-2])
+        acc = best + cost[i]
+    return float(acc.min() / len(template))
+
+
+def dtw(template: np.ndarray, utterance: np.ndarray) -> float:
+    """
+    Alignment cost of a template against a whole utterance.
+
+    Like subsequence_dtw, but the path must start and end at both ends
+    of the utterance, so "stop" does not match "stop the music".
+
+    Args:
+        template: Template features (n, d)
+        utterance: Utterance features (m, d)
+
+    Returns:
+        float: Path cost normalized by template length (inf if no path fits)
+    """
+    if len(template) == 0 or len(utterance) == 0:
+        return float("inf")
+
+    cost = np.sqrt(((template[:, None, :] - utterance[None, :, :]) ** 2).sum(axis=2))
+    acc = np.full(len(utterance), np.inf)
+    acc[0] = cost[0, 0]
+    for i in range(1, len(template)):
+        best = acc.copy()
+        best[1:] = np.minimum(best[1:], acc[:-1])
+        best[2:] = np.minimum(best[2:], acc[:-2])
+        acc = best + cost[i]
+    return float(acc[-1] / len(template))
+
+
+def load_templates(template_dir: str) -> List[np.ndarray]:
+    """
+    Load keyword recordings and convert them to features.
+
+    Args:
+        template_dir: Directory of WAV/FLAC recordings of the keyword
+
+    Returns:
+        List of feature arrays (empty if the directory is missing)
+    """
+    path = Path(template_dir).expanduser()
+    if not path.is_dir():
+        return []
+
+    templates = []
+    for file in sorted(path.iterdir()):
+        if file.suffix.lower() not in (".wav", ".flac", ".ogg"):
+            continue
+        try:
+            samples, sample_rate = decode_audio(file.read_bytes(), dtype='float32')
+            samples = resample_linear(samples, sample_rate, KWS_SAMPLE_RATE)
+            features = mfcc(trim_silence(samples))
+            if len(features):
+                templates.append(features)
+        except Exception as e:
+            logger.warning(f"Skipping keyword template {file.name}: {e}")
+    return templates
+
+
+def resample_linear(samples: np.ndarray, from_rate: int, to_rate: int) -> np.ndarray:
+    """
+    Resample by linear interpolation (adequate for keyword features).
+
+    Args:
+        samples: Mono samples
+        from_rate: Input sample rate
+        to_rate: Output sample rate
+
+    Returns:
+        np.ndarray: float32 samples at to_rate
+    """
+    samples = np.asarray(samples)
+    samples = samples.astype(np.float32) / 32768.0 if samples.dtype == np.int16 else samples.astype(np.float32)
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    count = int(round(len(samples) * to_rate / from_rate))
+    positions = np.arange(count) * (from_rate / to_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def trim_silence(samples: np.ndarray, threshold_db: float = 30.0) -> np.ndarray:
+    """
+    Cut leading and trailing audio more than threshold_db below the peak.
+
+    Args:
+        samples: float mono samples
+        threshold_db: Level below peak treated as silence
+
+    Returns:
+        np.ndarray: Trimmed samples
+    """
+    if len(samples) < _WIN_SAMPLES:
+        return samples
+    count = len(samples) // _HOP_SAMPLES
+    rms = np.sqrt(np.mean(samples[:count * _HOP_SAMPLES].reshape(count, -1) ** 2, axis=1) + 1e-12)
+    levels = 20 * np.log10(rms)
+    loud = np.nonzero(levels > levels.max() - threshold_db)[0]
+    return samples[loud[0] * _HOP_SAMPLES:(loud[-1] + 1) * _HOP_SAMPLES]
+
+
+class KeywordSpotter:
+    """
+    Sliding-window keyword spotter over live microphone audio.
+
+    Incoming audio is resampled to 16 kHz into a ring buffer slightly
+    longer than the longest template. Every hop, if the window contains
+    speech, it is compared against each template with subsequence DTW;
+    a cost under the threshold is a detection. Without an explicit
+    threshold, one is calibrated from how far the templates are from
+    each other.
+    """
+
+    def __init__(
+        self,
+        templates: List[np.ndarray],
+        sample_rate: int,
+        threshold: Optional[float] = None,
+        hop_ms: Optional[int] = None,
+        min_level_db: Optional[float] = None,
+        refractory_s: float = 1.0
+    ):
+        """
+        Initialize the spotter.
+
+        Args:
+            templates: Keyword feature arrays (from load_templates)
+            sample_rate: Sample rate of the audio passed to process()
+            threshold: Detection cost threshold (default from ESTOP_KWS_THRESHOLD, else calibrated)
+            hop_ms: How often the window is evaluated (default from ESTOP_KWS_HOP_MS or 100)
+            min_level_db: Windows quieter than this (dBFS) are skipped (default from VAD_MIN_LEVEL_DB or -50)
+            refractory_s: Ignore further detections for this long after one
+        """
+        if not templates:
+            raise ValueError("KeywordSpotter needs at least one template")
+        if threshold is None and os.getenv("ESTOP_KWS_THRESHOLD"):
+            threshold = float(os.getenv("ESTOP_KWS_THRESHOLD"))
+        if hop_ms is None:
+            hop_ms = int(os.getenv("ESTOP_KWS_HOP_MS", "100"))
+        if min_level_db is None:
+            min_level_db = float(os.getenv("VAD_MIN_LEVEL_DB", "-50"))
+
+        self.templates = templates
+        self.sample_rate = sample_rate
+        self.threshold = threshold if threshold is not None else self._calibrate(templates)
+        self.min_level_db = min_level_db
+        self.refractory_s = refractory_s
+        self.last_cost = float("inf")
+
+        longest = max(len(t) for t in templates)
+        self._window = int((longest * 1.5 * _HOP_SAMPLES + _WIN_SAMPLES))
+        self._hop = int(KWS_SAMPLE_RATE * hop_ms / 1000)
+        self._buffer: deque = deque()
+        self._buffered = 0
+        self._since_eval = 0
+        self._quiet_until = 0.0
+
+        logger.info(f"Keyword spotter: {len(templates)} templates, threshold {self.threshold:.2f}")
+
+    @staticmethod
+    def _calibrate(templates: List[np.ndarray]) -> float:
+        """Threshold just above the worst distance between two recordings of the keyword."""
+        if len(templates) < 2:
+            return 8.0
+        costs = []
+        for i, a in enumerate(templates):
+            for j, b in enumerate(templates):
+                if i != j:
+                    costs.append(subsequence_dtw(a, np.pad(b, ((2, 2), (0, 0)), mode='edge')))
+        return float(max(costs) * 1.15)
+
+    def process(self, frame: np.ndarray) -> bool:
+        """
+        Feed a block of microphone audio.
+
+        Args:
+            frame: Mono samples at self.sample_rate
+
+        Returns:
+            bool: True if the keyword was detected in the current window
+        """
+        samples = resample_linear(frame.reshape(-1), self.sample_rate, KWS_SAMPLE_RATE)
+        self._buffer.append(samples)
+        self._buffered += len(samples)
+        self._since_eval += len(samples)
+        while self._buffered - len(self._buffer[0]) >= self._window:
+            self._buffered -= len(self._buffer.popleft())
+
+        if self._since_eval < self._hop or self._buffered < self._window // 2:
+            return False
+        self._since_eval = 0
+
+        now = time.monotonic()
+        if now < self._quiet_until:
+            return False
+
+        window = np.concatenate(self._buffer)[-self._window:]
+        level = 20 * np.log10(np.sqrt(np.mean(window ** 2)) + 1e-10)
+        if level < self.min_level_db:
+            return False
+
+        features = mfcc(window)
+        self.last_cost = min(subsequence_dtw(t, features) for t in self.templates)
+        if self.last_cost < self.threshold:
+            self._quiet_until = now + self.refractory_s
+            logger.info(f"Keyword detected (cost {self.last_cost:.2f} < {self.threshold:.2f})")
+            return True
+        return False
+
+
+def enroll(template_dir: str, count: int = 5) -> None:
+    """
+    Record keyword templates from the microphone.
+
+    Args:
+        template_dir: Directory to write WAV files into
+        count: Number of recordings
+    """
+    from app.audio_io import record_ptt
+
+    path = Path(template_dir).expanduser()
+    path.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        input(f"[{i + 1}/{count}] Press Enter and say the keyword...")
+        samples = record_ptt(sample_rate=KWS_SAMPLE_RATE)
+        target = path / f"keyword_{int(time.time())}_{i}.wav"
+        target.write_bytes(encode_wav(samples, KWS_SAMPLE_RATE))
+        print(f"Saved {target}")
+
+
+if __name__ == "__main__":
+    # python -m app.kws <template_dir> [count]
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.kws <template_dir> [count]")
+        sys.exit(1)
+    enroll(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 5)
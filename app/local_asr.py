@@ -0,0 +1,204 @@
+"""
+Local Command ASR
+On-device recognizer for the closed command grammar (MFCC + whole-utterance DTW).
+"""
+
+import os
+import sys
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.boson_api import AsrBackend, AsrResult
+from app.kws import KWS_SAMPLE_RATE, dtw, load_templates, mfcc, resample_linear, trim_silence
+from app.intents.grammar import command_grammar
+
+logger = logging.getLogger(__name__)
+
+
+def phrase_dir_name(phrase: str) -> str:
+    """Template directory name of a phrase ("stop the car" -> "stop_the_car")."""
+    return phrase.replace(" ", "_")
+
+
+class LocalCommandRecognizer(AsrBackend):
+    """
+    Recognizes whole utterances against recorded templates of grammar phrases.
+
+    Each enrolled phrase has a few recordings. An utterance is compared with
+    every template by DTW over MFCCs, anchored at both ends. Confidence is
+    the smaller of two margins: how far the best cost is below the
+    threshold, and how far it is below the best cost of any other phrase.
+    An utterance that is not one of the phrases (or sounds like two of
+    them) gets a low confidence and should go to an open-vocabulary
+    recognizer instead.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        templates: Dict[str, List[np.ndarray]],
+        threshold: Optional[float] = None,
+        min_level_db: Optional[float] = None
+    ):
+        """
+        Initialize the recognizer.
+
+        Args:
+            templates: Phrase -> template features (from load_templates)
+            threshold: DTW cost above which nothing is recognized
+                       (default from ASR_LOCAL_THRESHOLD, else calibrated)
+            min_level_db: Utterances quieter than this (dBFS) are not recognized
+                          (default from VAD_MIN_LEVEL_DB or -50)
+        """
+        templates = {phrase: t for phrase, t in templates.items() if t}
+        if not templates:
+            raise ValueError("LocalCommandRecognizer needs at least one template")
+        if threshold is None and os.getenv("ASR_LOCAL_THRESHOLD"):
+            threshold = float(os.getenv("ASR_LOCAL_THRESHOLD"))
+        if min_level_db is None:
+            min_level_db = float(os.getenv("VAD_MIN_LEVEL_DB", "-50"))
+
+        self.templates = templates
+        self.threshold = threshold if threshold is not None else self._calibrate(templates)
+        self.min_level_db = min_level_db
+        self.recognized = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+        logger.info(
+            f"Local ASR: {len(templates)} phrases, "
+            f"{sum(len(t) for t in templates.values())} templates, threshold {self.threshold:.2f}"
+        )
+
+    @classmethod
+    def from_directory(cls, template_dir: str, grammar: Optional[Dict[str, str]] = None) -> Optional["LocalCommandRecognizer"]:
+        """
+        Load templates recorded with `python -m app.local_asr`.
+
+        The directory holds one sub-directory of recordings per phrase,
+        named like the phrase with underscores ("stop_the_car/").
+        Phrases that are not in the command grammar are skipped, since the
+        intent rules would not understand them.
+
+        Args:
+            template_dir: Template root directory
+            grammar: Allowed phrases (default: generated from the intent rules)
+
+        Returns:
+            LocalCommandRecognizer, or None if no usable templates were found
+        """
+        root = Path(template_dir).expanduser() if template_dir else None
+        if root is None or not root.is_dir():
+            return None
+        if grammar is None:
+            grammar = command_grammar()
+
+        templates = {}
+        for phrase_dir in sorted(p for p in root.iterdir() if p.is_dir()):
+            phrase = phrase_dir.name.replace("_", " ")
+            if phrase not in grammar:
+                logger.warning(f"Skipping local ASR templates for '{phrase}': not a command in rules.yaml")
+                continue
+            features = load_templates(str(phrase_dir))
+            if features:
+                templates[phrase] = features
+
+        return cls(templates) if templates else None
+
+    @staticmethod
+    def _calibrate(templates: Dict[str, List[np.ndarray]]) -> float:
+        """Threshold just above the worst distance between two recordings of the same phrase."""
+        costs = [
+            dtw(a, b)
+            for recordings in templates.values()
+            for i, a in enumerate(recordings)
+            for j, b in enumerate(recordings)
+            if i != j
+        ]
+        costs = [cost for cost in costs if np.isfinite(cost)]
+        return float(max(costs) * 1.15) if costs else 8.0
+
+    def transcribe(self, audio: np.ndarray, sample_rate: int) -> AsrResult:
+        start = time.perf_counter()
+        samples = trim_silence(resample_linear(np.asarray(audio).reshape(-1), sample_rate, KWS_SAMPLE_RATE))
+        level = 20 * np.log10(np.sqrt(np.mean(samples ** 2)) + 1e-10) if len(samples) else -200.0
+        features = mfcc(samples)
+        if level < self.min_level_db or len(features) == 0:
+            return self._result("", 0.0)
+
+        costs = {}
+        for phrase, recordings in self.templates.items():
+            # DTW steps allow half to double speed; skip templates that can't fit
+            fitting = [t for t in recordings if len(t) / 2 <= len(features) <= 2 * len(t)]
+            costs[phrase] = min((dtw(t, features) for t in fitting), default=float("inf"))
+
+        ranked = sorted(costs, key=costs.get)
+        best = costs[ranked[0]]
+        runner_up = costs[ranked[1]] if len(ranked) > 1 else float("inf")
+        confidence = 0.0
+        if best < self.threshold:
+            confidence = min(1 - best / self.threshold, 1 - best / runner_up)
+
+        logger.debug(
+            f"Local ASR: '{ranked[0]}' cost {best:.2f} (next {runner_up:.2f}), "
+            f"confidence {confidence:.2f} in {(time.perf_counter() - start) * 1000:.0f}ms"
+        )
+        return self._result(ranked[0] if confidence > 0 else "", confidence)
+
+    def _result(self, text: str, confidence: float) -> AsrResult:
+        with self._lock:
+            if text:
+                self.recognized += 1
+            else:
+                self.rejected += 1
+        return AsrResult(text, confidence, self.name)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"phrases": len(self.templates), "recognized": self.recognized, "rejected": self.rejected}
+
+
+def enroll(template_dir: str, phrases: List[str], count: int = 3) -> None:
+    """
+    Record templates of command phrases from the microphone.
+
+    Args:
+        template_dir: Template root directory (one sub-directory per phrase)
+        phrases: Phrases to record; each must be in the command grammar
+        count: Recordings per phrase
+    """
+    from app.audio_io import record_ptt
+    from app.audio_codec import encode_wav
+
+    grammar = command_grammar()
+    for phrase in phrases:
+        if phrase not in grammar:
+            print(f"'{phrase}' is not a command in rules.yaml, skipping")
+            continue
+        path = Path(template_dir).expanduser() / phrase_dir_name(phrase)
+        path.mkdir(parents=True, exist_ok=True)
+        for i in range(count):
+            input(f"[{phrase} {i + 1}/{count}] Press Enter and say '{phrase}'...")
+            samples = record_ptt(sample_rate=KWS_SAMPLE_RATE)
+            target = path / f"{int(time.time())}_{i}.wav"
+            target.write_bytes(encode_wav(samples, KWS_SAMPLE_RATE))
+            print(f"Saved {target}")
+
+
+if __name__ == "__main__":
+    # python -m app.local_asr <template_dir> [phrase ...]
+    if len(sys.argv) < 2:
+        print("Usage: python -m app.local_asr <template_dir> [phrase ...]")
+        sys.exit(1)
+    if len(sys.argv) == 2:
+        print("Command phrases (from rules.yaml):")
+        for phrase, intent in command_grammar().items():
+            print(f"  {phrase:<40} {intent}")
+        sys.exit(0)
+    enroll(sys.argv[1], [phrase.strip().lower() for phrase in sys.argv[2:]])
@@ -0,0 +1,484 @@
+"""
+Audio Mixer
+Single long-lived output stream that mixes speech, music and radio.
+"""
+
+import os
+import time
+import logging
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+import sounddevice as sd
+
+logger = logging.getLogger(__name__)
+
+
+# Source priorities: an audible source ducks every source below it
+PRIORITY_RADIO = 0
+PRIORITY_MUSIC = 10
+PRIORITY_SPEECH = 20
+
+
+class RingBuffer:
+    """
+    Single-producer, single-consumer ring buffer of float32 samples.
+
+    The producer only advances the write counter and the consumer only the
+    read counter, each after its copy is complete, so the audio callback
+    never waits on a lock held by a producer thread.
+    """
+
+    def __init__(self, capacity: int):
+        """
+        Initialize an empty buffer.
+
+        Args:
+            capacity: Maximum buffered samples
+        """
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.float32)
+        self._written = 0  # total samples written (producer only)
+        self._read = 0  # total samples read (consumer only)
+
+    @property
+    def available(self) -> int:
+        """Samples ready to read."""
+        return self._written - self._read
+
+    @property
+    def space(self) -> int:
+        """Samples that can be written without overwriting unread data."""
+        return self.capacity - (self._written - self._read)
+
+    def write(self, samples: np.ndarray) -> int:
+        """
+        Append as many samples as fit.
+
+        Args:
+            samples: float32 mono samples
+
+        Returns:
+            int: Number of samples written
+        """
+        count = min(len(samples), self.space)
+        start = self._written % self.capacity
+        first = min(count, self.capacity - start)
+        self._data[start:start + first] = samples[:first]
+        self._data[:count - first] = samples[first:count]
+        self._written += count
+        return count
+
+    def read_into(self, out: np.ndarray) -> int:
+        """
+        Fill the start of `out` with buffered samples.
+
+        Args:
+            out: float32 array to fill
+
+        Returns:
+            int: Number of samples read
+        """
+        count = min(len(out), self.available)
+        start = self._read % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self._data[start:start + first]
+        out[first:count] = self._data[:count - first]
+        self._read += count
+        return count
+
+
+class MixerSource:
+    """
+    One stream of audio fed into the mixer by a producer thread.
+
+    The producer writes samples (at any sample rate, resampled on write)
+    and closes the source when done; playback starts once `prefill` samples
+    are buffered or the source is closed. cancel() stops it at the next
+    audio block. Resampling carries its phase across writes, so audio
+    decoded block by block has no seams at block boundaries.
+
+    Attributes:
+        name: Label for logs ("speech", "music", "radio")
+        priority: Mixing priority (higher ducks lower)
+        gain: Target volume, 0-1 (changes are ramped by the mixer)
+        interruptible: Whether stop_playback() cancels this source
+        first_audio_at: time.monotonic() the first audible block reached the speaker
+        playback_started: Event set when the first block reaches the output
+        clock: (frames_played, time.monotonic() at the speaker) of the latest block
+        frames_played: Samples of this source that reached the output
+        underruns: Blocks that ran out of data before the source was closed
+    """
+
+    def __init__(
+        self,
+        name: str,
+        priority: int,
+        sample_rate: int,
+        gain: float = 1.0,
+        prefill: int = 0,
+        capacity: Optional[int] = None,
+        interruptible: bool = True,
+        playback_started: Optional[threading.Event] = None
+    ):
+        """
+        Initialize a source.
+
+        Args:
+            name: Label for logs
+            priority: Mixing priority (PRIORITY_SPEECH, PRIORITY_MUSIC, PRIORITY_RADIO)
+            sample_rate: Mixer output rate (samples written are at this rate)
+            gain: Initial volume, 0-1
+            prefill: Samples to buffer before playback starts
+            capacity: Ring buffer size (default: 4 seconds)
+            interruptible: Whether stop_playback() cancels this source
+            playback_started: Event to set when playback starts (default: a new one)
+        """
+        self.name = name
+        self.priority = priority
+        self.sample_rate = sample_rate
+        self.gain = gain
+        self.prefill = prefill
+        self.interruptible = interruptible
+        self.buffer = RingBuffer(capacity or sample_rate * 4)
+
+        self.first_audio_at: Optional[float] = None
+        self.playback_started = playback_started or threading.Event()
+        self.clock: Optional[Tuple[int, float]] = None
+        self.frames_played = 0
+        self.underruns = 0
+
+        self.closed = False
+        self.started = prefill == 0
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.applied_gain = gain  # gain at the end of the last block (mixer only)
+
+        # Streaming resampler state: last input sample and position of the next output
+        self._tail: Optional[np.ndarray] = None
+        self._phase = 0.0
+
+    @property
+    def audible(self) -> bool:
+        """Whether this source is currently playing (or about to)."""
+        return self.started and not self.done.is_set() and self.gain > 0
+
+    def time_of(self, frame: int) -> Optional[float]:
+        """
+        Predict when a sample of this source reaches the speaker.
+
+        Uses the device timestamp of the latest mixed block, so the
+        prediction follows the audio clock rather than the system clock.
+
+        Args:
+            frame: Sample index at the mixer rate (seconds * sample_rate)
+
+        Returns:
+            float: time.monotonic() of the sample at the speaker (None before playback)
+        """
+        clock = self.clock
+        if clock is None:
+            return None
+        played, at = clock
+        return at + (frame - played) / self.sample_rate
+
+    def write(self, samples: np.ndarray, sample_rate: Optional[int] = None) -> bool:
+        """
+        Queue samples, blocking while the ring buffer is full.
+
+        Args:
+            samples: int16 or float mono samples
+            sample_rate: Rate of the samples (default: mixer rate)
+
+        Returns:
+            bool: False if the source was cancelled before everything was queued
+        """
+        samples = self._resample(samples, sample_rate or self.sample_rate)
+        # Never wait on a full buffer for longer than it takes to play a quarter of it
+        poll = self.buffer.capacity / self.sample_rate / 4
+        while len(samples):
+            if self.cancelled.is_set():
+                return False
+            written = self.buffer.write(samples)
+            samples = samples[written:]
+            if not self.started and self.buffer.available >= self.prefill:
+                self.started = True
+            if len(samples):
+                self.cancelled.wait(min(poll, len(samples) / self.sample_rate))
+        return not self.cancelled.is_set()
+
+    def _resample(self, samples: np.ndarray, rate: int) -> np.ndarray:
+        """
+        Convert to float32 at the mixer rate by linear interpolation.
+
+        The last input sample of each write is held back as the left
+        neighbour of the next one, so consecutive writes resample exactly
+        like one long signal.
+
+        Args:
+            samples: int16 or float mono samples
+            rate: Rate of the samples
+
+        Returns:
+            np.ndarray: float32 samples at the mixer rate
+        """
+        samples = np.asarray(samples)
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        else:
+            samples = samples.astype(np.float32, copy=False)
+        if rate == self.sample_rate or len(samples) == 0:
+            return samples
+
+        if self._tail is not None:
+            samples = np.concatenate([self._tail, samples])
+        last = len(samples) - 1
+        step = rate / self.sample_rate
+        count = max(0, int(np.ceil((last - self._phase) / step)))
+        positions = self._phase + np.arange(count) * step
+        out = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+        self._tail = samples[-1:]
+        self._phase = self._phase + count * step - last
+        return out
+
+    def close(self) -> None:
+        """Mark the end of the audio (what is buffered still plays)."""
+        self.closed = True
+        self.started = True
+
+    def cancel(self) -> None:
+        """Stop playback at the next audio block."""
+        self.cancelled.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until the source has played out or was cancelled.
+
+        Args:
+            timeout: Maximum seconds to wait
+
+        Returns:
+            bool: True if the source finished
+        """
+        return self.done.wait(timeout)
+
+
+class AudioMixer:
+    """
+    Callback-driven mixer behind one output stream opened once.
+
+    Sources are added and removed without touching the device. In each
+    audio block every source contributes its buffered samples at its own
+    gain; sources below the highest-priority audible source are capped at
+    `duck_gain`. Gain changes are ramped over a few milliseconds.
+    """
+
+    def __init__(
+        self,
+        sample_rate: Optional[int] = None,
+        blocksize: Optional[int] = None,
+        duck_gain: Optional[float] = None,
+        ramp_ms: Optional[float] = None,
+        stream_factory: Optional[Callable[..., sd.OutputStream]] = None
+    ):
+        """
+        Initialize the mixer (the device is opened on first use).
+
+        Args:
+            sample_rate: Output rate (default from MIXER_SAMPLE_RATE or 48000)
+            blocksize: Samples per callback (default from MIXER_BLOCK_SIZE or 480, i.e. 10ms)
+            duck_gain: Gain of ducked sources (default from MIXER_DUCK_GAIN or 0.2)
+            ramp_ms: Gain ramp length (default from MIXER_RAMP_MS or 20)
+            stream_factory: Opens the output stream (default: sd.OutputStream)
+        """
+        if sample_rate is None:
+            sample_rate = int(os.getenv("MIXER_SAMPLE_RATE", "48000"))
+        if blocksize is None:
+            blocksize = int(os.getenv("MIXER_BLOCK_SIZE", "480"))
+        if duck_gain is None:
+            duck_gain = float(os.getenv("MIXER_DUCK_GAIN", "0.2"))
+        if ramp_ms is None:
+            ramp_ms = float(os.getenv("MIXER_RAMP_MS", "20"))
+
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.duck_gain = duck_gain
+        self.ramp_samples = max(1, int(sample_rate * ramp_ms / 1000))
+        self.frames_out = 0  # samples written to the device since start
+
+        # Replaced (never mutated) so the callback can iterate without a lock;
+        # the callback only flags finished sources, producers prune them
+        self._sources: List[MixerSource] = []
+        self._lock = threading.Lock()
+        self._stream_lock = threading.Lock()
+        self._stream = None
+        self._stream_factory = stream_factory or sd.OutputStream
+        self._scratch = np.zeros(blocksize, dtype=np.float32)
+
+    def start(self) -> None:
+        """Open and start the output stream if it is not running."""
+        with self._stream_lock:
+            if self._stream is not None:
+                return
+            self._stream = self._stream_factory(
+                samplerate=self.sample_rate,
+                blocksize=self.blocksize,
+                channels=1,
+                dtype='float32',
+                callback=self._callback
+            )
+            self._stream.start()
+            logger.info(f"Audio output open ({self.sample_rate}Hz, {self.blocksize}-sample blocks)")
+
+    def source(self, name: str, priority: int, **kwargs) -> MixerSource:
+        """
+        Create a source at the mixer rate and start mixing it.
+
+        Args:
+            name: Label for logs
+            priority: Mixing priority
+            **kwargs: MixerSource options (gain, prefill, capacity, interruptible)
+
+        Returns:
+            MixerSource: Source to write into
+        """
+        return self.add(MixerSource(name, priority, self.sample_rate, **kwargs))
+
+    def add(self, source: MixerSource, preempt: bool = False) -> MixerSource:
+        """
+        Start mixing a source.
+
+        Args:
+            source: Source to add
+            preempt: Cancel interruptible sources of the same or lower priority
+
+        Returns:
+            MixerSource: The added source
+        """
+        self.start()
+        with self._lock:
+            if preempt:
+                for other in self._sources:
+                    if other.interruptible and other.priority <= source.priority:
+                        other.cancel()
+            self._sources = [s for s in self._sources if not s.done.is_set()] + [source]
+        return source
+
+    def stop_playback(self) -> None:
+        """Cancel every interruptible source (speech and music)."""
+        for source in self._sources:
+            if source.interruptible:
+                source.cancel()
+
+    def _callback(self, outdata, frame_count, time_info, status):
+        if status:
+            logger.debug(f"Mixer output status: {status}")
+        # Translate the device's DAC timestamp for this block to time.monotonic()
+        dac_time = None
+        output_time = getattr(time_info, "outputBufferDacTime", 0.0)
+        current_time = getattr(time_info, "currentTime", 0.0)
+        if output_time > 0 and current_time > 0:
+            dac_time = time.monotonic() + (output_time - current_time)
+        self.mix(outdata[:, 0], dac_time)
+
+    def mix(self, out: np.ndarray, dac_time: Optional[float] = None) -> None:
+        """
+        Render one block of all sources into `out` (called by the audio callback).
+
+        Args:
+            out: float32 block to fill
+            dac_time: time.monotonic() the block reaches the speaker (default: now)
+        """
+        frames = len(out)
+        out[:] = 0.0
+        if len(self._scratch) < frames:
+            self._scratch = np.zeros(frames, dtype=np.float32)
+        scratch = self._scratch[:frames]
+
+        sources = self._sources
+        top = max((s.priority for s in sources if s.audible), default=None)
+        finished = []
+        now = time.monotonic()
+        if dac_time is None:
+            dac_time = now
+
+        for source in sources:
+            if source.done.is_set():
+                continue
+            if source.cancelled.is_set():
+                finished.append(source)
+                continue
+            if not source.started:
+                continue
+
+            read = source.buffer.read_into(scratch)
+            if read < frames:
+                if source.closed and source.buffer.available == 0:
+                    finished.append(source)
+                else:
+                    source.underruns += 1
+            if read == 0:
+                continue
+
+            target = source.gain
+            if top is not None and source.priority < top:
+                target = min(target, self.duck_gain)
+            start = source.applied_gain
+            if start == target:
+                out[:read] += scratch[:read] * target
+            else:
+                # Move toward the target by at most one ramp's worth this block
+                step = frames / self.ramp_samples
+                end = min(target, start + step) if target > start else max(target, start - step)
+                out[:read] += scratch[:read] * np.linspace(start, end, read, dtype=np.float32)
+                source.applied_gain = end
+
+            source.clock = (source.frames_played, dac_time)
+            if source.first_audio_at is None:
+                source.first_audio_at = dac_time
+                source.playback_started.set()
+            source.frames_played += read
+
+        np.clip(out, -1.0, 1.0, out=out)
+        self.frames_out += frames
+
+        # No lock here: add() drops finished sources from the list
+        for source in finished:
+            source.done.set()
+
+    def close(self) -> None:
+        """Cancel all sources and close the output stream."""
+        with self._lock:
+            sources, self._sources = self._sources, []
+        with self._stream_lock:
+            stream, self._stream = self._stream, None
+        for source in sources:
+            source.cancel()
+            source.done.set()
+        if stream is not None:
+            try:
+                stream.close()
+            except Exception as e:
+                logger.debug(f"Closing audio output failed: {e}")
+
+
+# Global mixer instance
+_mixer: Optional[AudioMixer] = None
+_mixer_lock = threading.Lock()
+
+
+def get_mixer() -> AudioMixer:
+    """
+    Get or create the global audio mixer.
+
+    Returns:
+        AudioMixer: Global mixer instance
+    """
+    global _mixer
+    if _mixer is None:
+        with _mixer_lock:
+            if _mixer is None:
+                _mixer = AudioMixer()
+    return _mixer
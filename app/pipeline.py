@@ -0,0 +1,577 @@
+"""
+Voice Pipeline
+Asyncio pipeline that runs capture, recognition, dispatch, speech and actuator stages concurrently.
+"""
+
+import os
+import queue
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+from app.audio_io import (
+    record_ptt, stream_microphone, play_audio, play_stream, play_local_audio, music_source, stop_playback
+)
+from app.boson_api import asr_transcribe, asr_transcribe_stream, tts_speak, tts_stream, TTS_SAMPLE_RATE
+from app.intents import Intent, match_intent
+from app.dispatcher import dispatch
+from app.speech_pipeline import speak_sentences
+from app.radio_player import get_radio_player
+from app.arduino_client import get_arduino_client
+from app.choreography import Choreographer, load_beats
+from app.safety import get_estop_guard
+from app.tracing import Trace, Tracer, get_tracer, activate, bind, span
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Turn:
+    """
+    One push-to-talk interaction as it moves through the pipeline.
+
+    Attributes:
+        id: Sequence number (later turns supersede earlier ones)
+        radio_was_playing: Whether the radio should resume after this turn
+        cancel: Set when the turn's speech should stop (barge-in, shutdown)
+        audio: Recorded samples (batch ASR)
+        frames: Microphone frames, ended by None (streaming ASR)
+        transcript: Recognized text
+        intent: Matched intent
+        result: Handler result from the dispatcher
+        speech: Synthesized audio, a PCM chunk stream, or a sentence stream
+        requested_stop: The turn's own transcript triggered an emergency stop
+        stops_before: Emergency stops that had happened when the turn started
+        trace: Latency spans of this turn
+    """
+    id: int
+    radio_was_playing: bool = False
+    cancel: threading.Event = field(default_factory=threading.Event)
+    audio: Optional[np.ndarray] = None
+    frames: Optional["queue.Queue[Optional[np.ndarray]]"] = None
+    transcript: str = ""
+    intent: Optional[Intent] = None
+    result: Dict[str, Any] = field(default_factory=dict)
+    speech: Any = None
+    requested_stop: bool = False
+    stops_before: int = 0
+    trace: Optional[Trace] = None
+
+
+class VoicePipeline:
+    """
+    Push-to-talk assistant as a chain of asyncio stages.
+
+    capture -> recognize -> dispatch -> synthesize -> playback, with an
+    actuator stage fed by dispatch and playback. Stages are connected by
+    bounded queues and blocking work (audio, HTTP, serial) runs in
+    executor threads, so a stage is free for the next turn as soon as it
+    hands a turn on: the next PTT can be armed while the previous reply is
+    still playing, a reply is synthesized while the one before it plays,
+    and Arduino commands go out while the response is spoken.
+
+    Every turn carries a trace; stages time their work as spans of it,
+    and the trace is handed to executor threads with the blocking call.
+
+    A new PTT press cancels the speech of turns still in flight (barge-in);
+    their actuator commands are still sent. An emergency stop goes around
+    the stages: transcripts (partial ones too, with streaming ASR) are
+    checked by the ESTOP guard as soon as they arrive, and a stop cancels
+    all pending speech and queued Arduino commands.
+    """
+
+    def __init__(
+        self,
+        radio=None,
+        arduino=None,
+        streaming_asr: Optional[bool] = None,
+        streaming_tts: Optional[bool] = None,
+        queue_size: Optional[int] = None,
+        wait_for_ptt: Callable[[], Any] = input,
+        guard=None,
+        tracer: Optional[Tracer] = None,
+        choreography: Optional[bool] = None
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            radio: Radio player (default: global instance)
+            arduino: Arduino client (default: global instance)
+            streaming_asr: Transcribe while recording (default from ASR_STREAMING)
+            streaming_tts: Play TTS from the first chunk (default from TTS_STREAMING)
+            queue_size: Capacity of each inter-stage queue (default from PIPELINE_QUEUE_SIZE or 2)
+            wait_for_ptt: Blocks until the next PTT press, raises EOFError when input ends
+            guard: Emergency stop guard (default: global instance)
+            tracer: Latency tracer (default: global instance)
+            choreography: Cue dance moves on the song's beats (default from DANCE_CHOREOGRAPHY or false;
+                          needs the framed protocol and firmware that knows the moves)
+        """
+        if streaming_asr is None:
+            streaming_asr = os.getenv("ASR_STREAMING", "false").lower() == "true"
+        if streaming_tts is None:
+            streaming_tts = os.getenv("TTS_STREAMING", "false").lower() == "true"
+        if queue_size is None:
+            queue_size = int(os.getenv("PIPELINE_QUEUE_SIZE", "2"))
+        if choreography is None:
+            choreography = os.getenv("DANCE_CHOREOGRAPHY", "false").lower() == "true"
+        # Seconds from the end of recording that Boson retries may use (0 = unbounded)
+        self.turn_budget = float(os.getenv("TURN_BUDGET_S", "8"))
+
+        self.radio = radio if radio is not None else get_radio_player()
+        self.arduino = arduino if arduino is not None else get_arduino_client()
+        self.guard = guard if guard is not None else get_estop_guard()
+        self.tracer = tracer if tracer is not None else get_tracer()
+        if choreography and getattr(self.arduino, "protocol", "framed") != "framed":
+            # Unacked moves would resolve (or time out) with replies meant for RUN/DANCE/STOP
+            logger.warning("DANCE_CHOREOGRAPHY needs ARDUINO_PROTOCOL=framed, dancing without cued moves")
+            choreography = False
+        self.choreographer = Choreographer(self.arduino) if choreography else None
+        self.streaming_asr = streaming_asr
+        self.streaming_tts = streaming_tts
+        self.queue_size = queue_size
+        self.wait_for_ptt = wait_for_ptt
+
+        self._turn_count = 0
+        self._turns: Dict[int, Turn] = {}  # turns in flight
+        self._stop_count = 0  # emergency stops so far
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def run(self) -> None:
+        """
+        Run all stages until stdin closes or the task is cancelled.
+        """
+        self._loop = asyncio.get_running_loop()
+
+        self._ptt: "asyncio.Queue[Optional[bool]]" = asyncio.Queue(maxsize=1)
+        self._recognize_q: "asyncio.Queue[Optional[Turn]]" = asyncio.Queue(maxsize=self.queue_size)
+        self._dispatch_q: "asyncio.Queue[Optional[Turn]]" = asyncio.Queue(maxsize=self.queue_size)
+        self._synthesize_q: "asyncio.Queue[Optional[Turn]]" = asyncio.Queue(maxsize=self.queue_size)
+        self._playback_q: "asyncio.Queue[Optional[Turn]]" = asyncio.Queue(maxsize=self.queue_size)
+        self._actuator_q: "asyncio.Queue[Optional[tuple]]" = asyncio.Queue(maxsize=self.queue_size * 2)
+
+        threading.Thread(target=self._read_ptt, name="ptt-input", daemon=True).start()
+        self.guard.add_listener(self._on_estop)
+
+        stages = [
+            self._capture_stage(),
+            self._recognize_stage(),
+            self._dispatch_stage(),
+            self._synthesize_stage(),
+            self._playback_stage(),
+            self._actuator_stage(),
+        ]
+        tasks = [asyncio.ensure_future(stage) for stage in stages]
+
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            self._cancel_speech(self._turns.values())
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self.guard.remove_listener(self._on_estop)
+
+    # --- helpers ---------------------------------------------------------
+
+    async def _call(self, func, *args, **kwargs):
+        """Run blocking work in the default executor (with the current trace)."""
+        return await self._loop.run_in_executor(None, bind(lambda: func(*args, **kwargs)))
+
+    def _read_ptt(self) -> None:
+        """Forward PTT presses to the capture stage (runs on its own thread)."""
+        try:
+            while True:
+                try:
+                    self.wait_for_ptt()
+                except (EOFError, OSError, ValueError):
+                    # End of input waits for room so pending presses still run
+                    asyncio.run_coroutine_threadsafe(self._ptt.put(None), self._loop)
+                    return
+                self._loop.call_soon_threadsafe(self._press_ptt)
+        except RuntimeError:
+            pass  # event loop already closed
+
+    def _press_ptt(self) -> None:
+        try:
+            self._ptt.put_nowait(True)
+        except asyncio.QueueFull:
+            logger.info("PTT already armed - ignoring extra press")
+
+    def _cancel_speech(self, turns) -> None:
+        """Stop speech of the given turns (playback is interrupted immediately)."""
+        cancelled = False
+        for turn in turns:
+            if not turn.cancel.is_set():
+                turn.cancel.set()
+                cancelled = True
+        if cancelled:
+            stop_playback()
+
+    def _on_estop(self) -> None:
+        """
+        Drop everything pending after an emergency stop (called from the guard's thread).
+        
+        Audio has already been stopped by the guard. The ESTOP turn itself
+        keeps its acknowledgement; nothing resumes the radio. Turns that
+        started before the stop never send Arduino commands, even if their
+        handler (e.g. an LLM round-trip) only finishes afterwards.
+        """
+        self._stop_count += 1
+        for turn in list(self._turns.values()):
+            turn.radio_was_playing = False
+            if not turn.requested_stop:
+                turn.cancel.set()
+        self._loop.call_soon_threadsafe(self._drop_actuator_commands)
+
+    def _stopped_since(self, turn: Turn) -> bool:
+        """True if an emergency stop happened after the turn started."""
+        return self._stop_count > turn.stops_before
+
+    def _check_stop(self, turn: Turn, text: str) -> None:
+        """Trigger the emergency stop as soon as a (partial) transcript is ESTOP."""
+        detected_at = time.monotonic()
+        if text and match_intent(text).name == "ESTOP" and not turn.requested_stop:
+            turn.requested_stop = True
+            self.guard.trigger("transcript", detected_at)
+
+    def _drop_actuator_commands(self) -> None:
+        dropped = []
+        while not self._actuator_q.empty():
+            item = self._actuator_q.get_nowait()
+            if item is None:
+                # Keep the shutdown marker
+                self._actuator_q.put_nowait(None)
+                break
+            dropped.append(item[1])
+        if dropped:
+            logger.warning(f"ESTOP: dropped queued Arduino commands {dropped}")
+
+    def _finish(self, turn: Turn) -> None:
+        """
+        Close out a turn and restore the radio.
+
+        Superseded turns leave the radio to the newer turn, which inherited
+        their radio state.
+        """
+        self._turns.pop(turn.id, None)
+        self.tracer.finish(turn.trace)
+        if turn.id != self._turn_count:
+            return
+
+        if turn.result.get('start_radio'):
+            logger.info("Starting radio playback now...")
+            self.radio.play()
+        elif turn.intent is not None and turn.intent.name == "PAUSE_RADIO":
+            logger.info("Radio paused (user requested)")
+            self.radio.stop()
+        elif turn.radio_was_playing and self.radio.is_playing():
+            logger.info("Restoring radio volume...")
+            self.radio.restore()
+        elif turn.radio_was_playing:
+            logger.info("Resuming radio playback...")
+            self.radio.play()
+        elif self.radio.is_playing():
+            # Still connected but not to be resumed (e.g. after an emergency stop)
+            self.radio.stop()
+        logger.info("")
+
+    # --- stages ----------------------------------------------------------
+
+    async def _capture_stage(self) -> None:
+        """Wait for PTT, mute the radio and record (or stream) microphone audio."""
+        while True:
+            if await self._ptt.get() is None:
+                await self._recognize_q.put(None)
+                return
+
+            logger.info("PTT activated - starting recording...")
+
+            # Barge-in: a new request silences replies still in flight
+            in_flight = list(self._turns.values())
+            self._cancel_speech(in_flight)
+
+            self._turn_count += 1
+            turn = Turn(
+                id=self._turn_count,
+                stops_before=self._stop_count,
+                trace=self.tracer.start_trace(self._turn_count)
+            )
+            turn.radio_was_playing = self.radio.is_playing() or any(t.radio_was_playing for t in in_flight)
+            self._turns[turn.id] = turn
+
+            # The stream stays connected, so the radio comes back instantly
+            if self.radio.is_playing():
+                logger.info("Muting radio for voice input...")
+                self.radio.mute()
+
+            if self.streaming_asr:
+                # Recognition consumes frames while they are being captured
+                turn.frames = queue.Queue()
+                await self._recognize_q.put(turn)
+                with span("capture", turn.trace):
+                    await self._call(self._pump_microphone, turn.frames)
+                self._end_capture(turn)
+                continue
+
+            try:
+                with span("capture", turn.trace):
+                    turn.audio = await self._call(record_ptt)
+            except Exception as e:
+                logger.error(f"Recording failed: {e}")
+                self._finish(turn)
+                continue
+            self._end_capture(turn)
+            await self._recognize_q.put(turn)
+
+    def _end_capture(self, turn: Turn) -> None:
+        """Mic is closed: start the turn's latency budget and duck the radio."""
+        if self.turn_budget > 0:
+            turn.trace.deadline = time.monotonic() + self.turn_budget
+        self._duck_radio(turn)
+
+    def _duck_radio(self, turn: Turn) -> None:
+        """Mic is closed: let the radio play quietly under the reply."""
+        # A finished or superseded turn no longer owns the radio
+        if turn.id in self._turns and turn.id == self._turn_count and self.radio.is_playing():
+            self.radio.duck()
+
+    @staticmethod
+    def _pump_microphone(frames: "queue.Queue[Optional[np.ndarray]]") -> None:
+        try:
+            for frame in stream_microphone():
+                frames.put(frame)
+        except Exception as e:
+            logger.error(f"Recording failed: {e}")
+        finally:
+            frames.put(None)
+
+    async def _recognize_stage(self) -> None:
+        """Transcribe recorded audio."""
+        while True:
+            turn = await self._recognize_q.get()
+            if turn is None:
+                await self._dispatch_q.put(None)
+                return
+
+            try:
+                with activate(turn.trace), span("asr"):
+                    if turn.frames is not None:
+                        # Partial transcripts can stop the car before the user finishes
+                        turn.transcript = await self._call(
+                            asr_transcribe_stream, iter(turn.frames.get, None),
+                            on_partial=lambda text: self._check_stop(turn, text)
+                        )
+                    else:
+                        turn.transcript = await self._call(asr_transcribe, turn.audio)
+                        await self._call(self._check_stop, turn, turn.transcript)
+            except Exception as e:
+                logger.error(f"Processing failed: {e}")
+                self._finish(turn)
+                continue
+
+            if not turn.transcript:
+                logger.info("No speech detected")
+                self._finish(turn)
+                continue
+
+            logger.info(f"USER SAID: {turn.transcript}")
+            await self._dispatch_q.put(turn)
+
+    async def _dispatch_stage(self) -> None:
+        """Match the intent, run its handler and queue actuator commands right away."""
+        while True:
+            turn = await self._dispatch_q.get()
+            if turn is None:
+                await self._synthesize_q.put(None)
+                return
+
+            with activate(turn.trace):
+                with span("intent"):
+                    turn.intent = match_intent(turn.transcript)
+                logger.info(f"INTENT: {turn.intent}")
+
+                # Handlers may block on the LLM
+                with span("dispatch", intent=turn.intent.name):
+                    turn.result = await self._call(dispatch, turn.intent, None)
+            result = turn.result
+            # The LLM picked a command for an utterance the rules missed
+            if result.get('resolved_intent') is not None:
+                turn.intent = result['resolved_intent']
+                logger.info(f"LLM INTENT: {turn.intent}")
+            logger.info(f"RESULT: {result.get('message') or ('(streaming reply)' if result.get('reply_stream') else 'No message')}")
+
+            # Driving does not wait for the spoken acknowledgement
+            if result.get('send_arduino_run'):
+                if self._stopped_since(turn):
+                    logger.warning(f"ESTOP: not sending RUN for turn {turn.id}, it started before the stop")
+                else:
+                    logger.info("Executing navigation on Arduino...")
+                    await self._actuator_q.put((turn, "RUN"))
+
+            await self._synthesize_q.put(turn)
+
+    async def _synthesize_stage(self) -> None:
+        """Synthesize the spoken reply, overlapping with playback of the previous turn."""
+        while True:
+            turn = await self._synthesize_q.get()
+            if turn is None:
+                await self._playback_q.put(None)
+                return
+
+            if not turn.cancel.is_set():
+                with activate(turn.trace):
+                    turn.speech = await self._synthesize(turn)
+
+            await self._playback_q.put(turn)
+
+    async def _synthesize(self, turn: Turn) -> Any:
+        result = turn.result
+        message = result.get('message', '')
+
+        if result.get('reply_stream') is not None:
+            # Streamed LLM reply: synthesized sentence by sentence during playback
+            return result['reply_stream']
+        if not message:
+            return None
+        if self.streaming_tts:
+            # Lazy chunk stream, fetched while it plays
+            return tts_stream(message)
+
+        try:
+            with span("tts"):
+                return await self._call(tts_speak, message)
+        except Exception as e:
+            logger.error(f"TTS/playback failed: {e}")
+            return None
+
+    async def _playback_stage(self) -> None:
+        """Play replies in order, then run audio-bound follow-ups (dance, radio)."""
+        while True:
+            turn = await self._playback_q.get()
+            if turn is None:
+                await self._actuator_q.put(None)
+                return
+
+            try:
+                with activate(turn.trace):
+                    await self._play_speech(turn)
+                    if turn.result.get('play_dance_song') and not turn.cancel.is_set():
+                        await self._perform_dance(turn)
+            except Exception as e:
+                logger.error(f"Processing failed: {e}")
+            finally:
+                self._finish(turn)
+
+    async def _play_speech(self, turn: Turn) -> None:
+        speech = turn.speech
+        if speech is None or turn.cancel.is_set():
+            return
+
+        try:
+            with span("playback"):
+                await self._play(turn, speech)
+        except Exception as e:
+            logger.error(f"TTS/playback failed: {e}")
+
+    async def _play(self, turn: Turn, speech: Any) -> None:
+        if isinstance(speech, np.ndarray):
+            await self._call(play_audio, speech, TTS_SAMPLE_RATE)
+        elif turn.result.get('reply_stream') is not None:
+            spoken = await self._call(speak_sentences, speech, cancel=turn.cancel)
+            logger.info(f"Car said: '{spoken}'")
+        else:
+            await self._call(play_stream, speech, TTS_SAMPLE_RATE, cancel=turn.cancel)
+
+    async def _perform_dance(self, turn: Turn) -> None:
+        """Start the dance song, then cue the Arduino once the music is playing."""
+        send_dance = turn.result.get('send_arduino_dance')
+        dance_song_path = os.getenv('DANCE_SONG')
+
+        if not (dance_song_path and os.path.exists(dance_song_path)):
+            logger.warning(f"Dance song not found: {dance_song_path}")
+            # Still send dance signal even without music
+            if send_dance:
+                logger.info("Executing dance on Arduino (no music)...")
+                await self._actuator_q.put((turn, "DANCE"))
+            return
+
+        logger.info("Starting dance song...")
+        duration = turn.result.get('dance_duration')
+        source = music_source()
+        song = asyncio.ensure_future(
+            self._call(play_local_audio, dance_song_path, max_seconds=duration, source=source)
+        )
+        # Beat tracking (cached per file) overlaps with the song starting
+        beats = None
+        if send_dance and self.choreographer is not None:
+            beats = asyncio.ensure_future(self._call(load_beats, dance_song_path))
+
+        # Cue the car when the first samples reach the speaker (or the song failed to start)
+        timeout = float(os.getenv("DANCE_START_TIMEOUT_S", "3.0"))
+        playing = asyncio.ensure_future(self._loop.run_in_executor(None, source.playback_started.wait, timeout))
+        await asyncio.wait([song, playing], return_when=asyncio.FIRST_COMPLETED)
+        started = source.playback_started.is_set()
+        if not started:
+            logger.warning("Dance song did not start playing - dancing without waiting for it")
+        if send_dance:
+            logger.info("Executing dance on Arduino (with music!)...")
+            await self._actuator_q.put((turn, "DANCE"))
+
+        if beats is not None:
+            try:
+                beat_map = await beats
+                if started:
+                    # Moves on the beat, timed against the song's playback clock
+                    await self._call(self.choreographer.perform, source, beat_map,
+                                     cancel=turn.cancel, max_seconds=duration)
+            except Exception as e:
+                logger.error(f"Dance choreography failed: {e}")
+
+        try:
+            await song
+        except Exception as e:
+            logger.error(f"Dance song playback failed: {e}")
+
+    async def _actuator_stage(self) -> None:
+        """Queue Arduino commands in order and wait for each acknowledgement without blocking the loop."""
+        commands = {"RUN": self.arduino.send_run, "DANCE": self.arduino.send_dance}
+        while True:
+            item = await self._actuator_q.get()
+            if item is None:
+                return
+
+            turn, command = item
+            if self._stopped_since(turn):
+                logger.warning(f"ESTOP: dropped Arduino {command} of turn {turn.id}, it started before the stop")
+                continue
+            try:
+                sent = commands[command]()
+                # wait() instead of await: a STOP cancelling the command is not our cancellation
+                with span("arduino_ack", turn.trace, command=command):
+                    await asyncio.wait([asyncio.wrap_future(sent)])
+                if sent.cancelled():
+                    logger.warning(f"Arduino {command} dropped by STOP (turn {turn.id})")
+                    continue
+                logger.info(f"Arduino acknowledged {command} (turn {turn.id}): {sent.result() or 'ok'}")
+            except Exception as e:
+                logger.error(f"Arduino {command} failed (turn {turn.id}): {e}")
+
+
+def run_pipeline(pipeline: Optional[VoicePipeline] = None) -> None:
+    """
+    Run the voice pipeline on a new event loop until stdin closes.
+
+    KeyboardInterrupt propagates to the caller after the stages are cancelled.
+
+    Args:
+        pipeline: Pipeline to run (default: a new VoicePipeline)
+    """
+    if pipeline is None:
+        pipeline = VoicePipeline()
+    asyncio.run(pipeline.run())
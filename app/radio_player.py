@@ -1,39 +1,63 @@
 """
 Radio Player
-Manages background radio playback using sounddevice.
+Manages background radio playback through the audio mixer.
 """
 
 import os
 import json
 import logging
+import subprocess
 import threading
 from pathlib import Path
 from typing import Optional
-import sounddevice as sd
-import soundfile as sf
-import requests
-import tempfile
-import time
+import numpy as np
+
+from app.mixer import AudioMixer, MixerSource, PRIORITY_RADIO, get_mixer
 
 logger = logging.getLogger(__name__)
 
 
 class RadioPlayer:
     """
-    Background radio player using subprocess for streaming audio.
+    Background radio player that decodes the stream into the shared mixer.
+
+    ffmpeg only fetches and decodes the station to raw PCM on a pipe; the
+    samples are written to a radio source of the audio mixer, which also
+    ducks it automatically under speech. Ducking and muting just move the
+    source gain (the mixer ramps it to avoid clicks) while the connection,
+    decoder and buffer keep running, so restoring the radio after a voice
+    turn is instant instead of reconnecting and rebuffering.
     """
-    
-    def __init__(self):
-        """Initialize the radio player."""
+
+    def __init__(self, duck_gain: Optional[float] = None, mixer: Optional[AudioMixer] = None):
+        """
+        Initialize the radio player.
+
+        Args:
+            duck_gain: Volume while ducked, 0-1 (default from RADIO_DUCK_GAIN or 0.15)
+            mixer: Mixer to play through (default: the global mixer)
+        """
+        if duck_gain is None:
+            duck_gain = float(os.getenv("RADIO_DUCK_GAIN", "0.15"))
+
+        self.duck_gain = duck_gain
+        self.prefill_ms = int(os.getenv("RADIO_PREFILL_MS", "500"))
+
         self.thread: Optional[threading.Thread] = None
         self.stop_flag = threading.Event()
         self.current_station: Optional[str] = None
         self.stations = self._load_stations()
-    
+
+        self._mixer = mixer
+        self._process: Optional[subprocess.Popen] = None
+        self._source: Optional[MixerSource] = None
+        self._gain = 1.0
+        self._lock = threading.Lock()
+
     def _load_stations(self) -> dict:
         """
         Load radio stations from demo/stations.json.
-        
+
         Returns:
             dict: Stations configuration
         """
@@ -44,117 +68,169 @@ class RadioPlayer:
         except Exception as e:
             logger.error(f"Failed to load stations: {e}")
             return {"stations": [], "default": None}
-    
+
     def is_playing(self) -> bool:
         """
-        Check if radio is currently playing.
-        
+        Check if the radio stream is running (audible, ducked or muted).
+
         Returns:
             bool: True if radio is playing
         """
         return self.thread is not None and self.thread.is_alive()
-    
-    def _play_stream(self, station_url: str):
+
+    @property
+    def gain(self) -> float:
+        """Volume the radio is heading to (1.0 = full, 0.0 = muted)."""
+        return self._gain
+
+    def _set_gain(self, gain: float) -> None:
+        self._gain = gain
+        if self._source is not None:
+            self._source.gain = gain
+
+    def _decode_stream(self, process: subprocess.Popen, source: MixerSource):
         """
-        Background thread function to play radio stream.
-        
+        Background thread function that feeds decoded PCM into the mixer.
+
         Args:
-            station_url: URL of radio stream
+            process: ffmpeg writing s16le mono at the mixer rate to stdout
+            source: Mixer source playing the radio
         """
+        # 50ms reads keep latency low without a wakeup per packet
+        block_bytes = int(source.sample_rate * 0.05) * 2
         try:
-            import subprocess
-            
-            # Use ffplay with minimal output (it's already available via sounddevice dependencies)
-            process = subprocess.Popen(
-                ['ffplay', '-nodisp', '-autoexit', '-loglevel', 'quiet', station_url],
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL
-            )
-            
-            # Wait for stop signal or process to end
             while not self.stop_flag.is_set():
-                if process.poll() is not None:
-                    # Process ended
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                usable = len(data) - (len(data) % 2)
+                if not source.write(np.frombuffer(data[:usable], dtype=np.int16)):
                     break
-                time.sleep(0.1)
-            
-            # Terminate process if still running
-            if process.poll() is None:
-                process.terminate()
-                process.wait(timeout=2)
-        
         except Exception as e:
             logger.error(f"Radio playback error: {e}")
-    
+        finally:
+            source.close()
+            if not self.stop_flag.is_set():
+                logger.warning("Radio stream ended")
+
     def play(self, station_name: Optional[str] = None) -> bool:
         """
         Start playing a radio station.
-        
-        If already playing, stops current station first.
-        
+
+        If that station is already streaming (e.g. ducked for a voice turn),
+        its volume is just restored. Another station is stopped first.
+
         Args:
             station_name: Name of station to play (uses default if None)
-        
+
         Returns:
             bool: True if playback started successfully
         """
-        # Stop current playback if any
-        if self.is_playing():
-            logger.info("Stopping current radio playback")
-            self.stop()
-        
         # Get station to play
         if station_name is None:
             station_name = self.stations.get("default")
-        
+
+        if self.is_playing():
+            if station_name == self.current_station:
+                self.restore()
+                return True
+            logger.info("Stopping current radio playback")
+            self.stop()
+
         # Find station URL
         station_url = None
         for station in self.stations.get("stations", []):
             if station["name"] == station_name:
                 station_url = station["url"]
                 break
-        
+
         if not station_url:
             logger.error(f"Station not found: {station_name}")
             return False
-        
+
         try:
             logger.info(f"Starting radio: {station_name}")
-            
-            # Clear stop flag and start playback thread
+
+            mixer = self._mixer or get_mixer()
+            self._process = subprocess.Popen(
+                ['ffmpeg', '-nostdin', '-loglevel', 'quiet',
+                 '-reconnect', '1', '-reconnect_streamed', '1',
+                 '-i', station_url,
+                 '-f', 's16le', '-ac', '1', '-ar', str(mixer.sample_rate), '-'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL
+            )
+            self._gain = 1.0
+            self._source = mixer.source(
+                "radio", PRIORITY_RADIO,
+                prefill=int(mixer.sample_rate * self.prefill_ms / 1000),
+                interruptible=False
+            )
+
+            # Clear stop flag and start decoding
             self.stop_flag.clear()
             self.thread = threading.Thread(
-                target=self._play_stream,
-                args=(station_url,),
+                target=self._decode_stream,
+                args=(self._process, self._source),
+                name="radio-decoder",
                 daemon=True
             )
             self.thread.start()
-            
+
             self.current_station = station_name
             logger.info(f"Radio playing: {station_name}")
             return True
-        
+
         except Exception as e:
             logger.error(f"Failed to start radio: {e}")
+            self.stop()
             return False
-    
+
+    def duck(self, gain: Optional[float] = None) -> None:
+        """
+        Lower the radio under speech without dropping the stream.
+
+        Args:
+            gain: Volume while ducked, 0-1 (default: duck_gain)
+        """
+        self._set_gain(self.duck_gain if gain is None else gain)
+
+    def mute(self) -> None:
+        """Silence the radio (e.g. while the mic is hot) without dropping the stream."""
+        self._set_gain(0.0)
+
+    def restore(self) -> None:
+        """Bring the radio back to full volume."""
+        self._set_gain(1.0)
+
     def stop(self) -> None:
-        """Stop radio playback."""
-        if self.thread and self.thread.is_alive():
-            try:
-                logger.info(f"Radio stopped: {self.current_station}")
-                self.stop_flag.set()
+        """Stop radio playback and close the stream connection."""
+        with self._lock:
+            process, source = self._process, self._source
+            self._process = self._source = None
+
+        if self.thread is None and process is None and source is None:
+            return
+        try:
+            logger.info(f"Radio stopped: {self.current_station}")
+            self.stop_flag.set()
+            if source is not None:
+                source.cancel()
+            if process is not None and process.poll() is None:
+                process.terminate()
+                process.wait(timeout=2)
+            if self.thread is not None:
                 self.thread.join(timeout=2)
-            except Exception as e:
-                logger.error(f"Error stopping radio: {e}")
-            finally:
-                self.thread = None
-                self.current_station = None
-    
+        except Exception as e:
+            logger.error(f"Error stopping radio: {e}")
+        finally:
+            self.thread = None
+            self.current_station = None
+
     def get_current_station(self) -> Optional[str]:
         """
         Get the name of currently playing station.
-        
+
         Returns:
             str: Station name, or None if not playing
         """
@@ -168,7 +244,7 @@ _radio_player: Optional[RadioPlayer] = None
 def get_radio_player() -> RadioPlayer:
     """
     Get or create the global radio player instance.
-    
+
     Returns:
         RadioPlayer: Global player instance
     """
@@ -176,4 +252,3 @@ def get_radio_player() -> RadioPlayer:
     if _radio_player is None:
         _radio_player = RadioPlayer()
     return _radio_player
-
@@ -0,0 +1,254 @@
+"""
+Emergency Stop Guard
+Low-latency ESTOP path that stops the car and preempts audio outside the normal pipeline.
+"""
+
+import os
+import queue
+import logging
+import threading
+import time
+from typing import Callable, List, Optional
+
+import numpy as np
+import sounddevice as sd
+
+from app.audio_io import stop_playback
+from app.kws import KeywordSpotter, load_templates, KWS_SAMPLE_RATE
+from app.arduino_client import get_arduino_client
+from app.radio_player import get_radio_player
+
+logger = logging.getLogger(__name__)
+
+
+class EstopGuard:
+    """
+    Dedicated emergency stop path.
+
+    Stops can come from an always-on keyword spotter on its own microphone
+    stream, from (partial) transcripts checked by the voice pipeline, or
+    from the ESTOP intent handler.
+    Whatever the source, trigger() writes STOP to the Arduino first (ahead
+    of any queued commands), then silences TTS, music and radio and lets
+    registered listeners (the voice pipeline) drop pending work.
+
+    Every stop is timed from detection to the STOP write; the worst case
+    is reported with stats().
+    """
+
+    def __init__(self, arduino=None, radio=None, debounce_s: Optional[float] = None):
+        """
+        Initialize the guard.
+
+        Args:
+            arduino: Arduino client (default: global instance)
+            radio: Radio player (default: global instance)
+            debounce_s: Repeated triggers within this window are ignored, unless the car
+                        was sent a command since the last STOP (default from ESTOP_DEBOUNCE_S or 1.0)
+        """
+        if arduino is None:
+            arduino = get_arduino_client()
+        if radio is None:
+            radio = get_radio_player()
+        if debounce_s is None:
+            debounce_s = float(os.getenv("ESTOP_DEBOUNCE_S", "1.0"))
+        # How long trigger() waits for the STOP write (not the ack)
+        self.write_timeout = float(os.getenv("ESTOP_WRITE_TIMEOUT_S", "0.5"))
+
+        self.arduino = arduino
+        self.radio = radio
+        self.debounce_s = debounce_s
+
+        self._listeners: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._last_trigger = float("-inf")
+        self._latencies: List[float] = []  # seconds, detection -> STOP written
+        self._sources: List[str] = []
+
+        self._spotter = None
+        self._spotter_thread: Optional[threading.Thread] = None
+        self._spotter_stop = threading.Event()
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback run on every stop (from the triggering thread).
+
+        Args:
+            callback: Function that cancels pending work
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Unregister a stop callback.
+
+        Args:
+            callback: Function passed to add_listener
+        """
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def trigger(self, source: str, detected_at: Optional[float] = None) -> bool:
+        """
+        Stop the car and everything that is playing.
+
+        A trigger shortly after the previous stop is the same stop detected
+        again (keyword spotter, then transcript, then intent) and is ignored,
+        but only while nothing has been sent to the car since: a stop after
+        a new RUN is always performed.
+
+        Args:
+            source: What detected the stop ("keyword", "transcript", "intent", ...)
+            detected_at: time.monotonic() of the detection (default: now)
+
+        Returns:
+            bool: True if this call performed the stop, False if debounced
+        """
+        if detected_at is None:
+            detected_at = time.monotonic()
+
+        with self._lock:
+            if detected_at - self._last_trigger < self.debounce_s and self.arduino.commands_since_stop() == 0:
+                return False
+            self._last_trigger = detected_at
+
+        # The car comes first; audio can wait a few milliseconds
+        sent = self.arduino.send_stop().wait_written(self.write_timeout)
+        latency = time.monotonic() - detected_at
+
+        with self._lock:
+            self._latencies.append(latency)
+            self._sources.append(source)
+
+        logger.warning(
+            f"🛑 ESTOP ({source}): STOP {'sent' if sent else 'not sent (Arduino offline)'} "
+            f"{latency * 1000:.1f}ms after detection"
+        )
+
+        stop_playback()
+        try:
+            self.radio.stop()
+        except Exception as e:
+            logger.error(f"Failed to stop radio on ESTOP: {e}")
+
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.error(f"ESTOP listener failed: {e}")
+
+        return True
+
+    # --- keyword spotter -------------------------------------------------
+
+    def start_spotter(self, template_dir: Optional[str] = None) -> bool:
+        """
+        Listen for the stop keyword on a dedicated microphone stream.
+
+        Args:
+            template_dir: Keyword recordings (default from ESTOP_KWS_TEMPLATES)
+
+        Returns:
+            bool: True if the spotter is running
+        """
+        if template_dir is None:
+            template_dir = os.getenv("ESTOP_KWS_TEMPLATES", "")
+        if not template_dir:
+            logger.info("ESTOP keyword spotter off (ESTOP_KWS_TEMPLATES not set)")
+            return False
+
+        templates = load_templates(template_dir)
+        if not templates:
+            logger.warning(f"ESTOP keyword spotter off: no templates in {template_dir}")
+            return False
+
+        self._spotter = KeywordSpotter(templates, sample_rate=KWS_SAMPLE_RATE)
+        self._spotter_stop.clear()
+        self._spotter_thread = threading.Thread(target=self._listen, name="estop-kws", daemon=True)
+        self._spotter_thread.start()
+        return True
+
+    def stop_spotter(self) -> None:
+        """Stop the keyword spotter thread."""
+        self._spotter_stop.set()
+        if self._spotter_thread is not None:
+            self._spotter_thread.join(timeout=2)
+            self._spotter_thread = None
+
+    def _listen(self) -> None:
+        """Feed the microphone to the keyword spotter until stopped."""
+        frame_ms = int(os.getenv("ESTOP_KWS_FRAME_MS", "20"))
+        frames: "queue.Queue[tuple]" = queue.Queue()
+
+        def callback(indata, frame_count, time_info, status):
+            frames.put((indata[:, 0].copy(), time.monotonic()))
+
+        try:
+            with sd.InputStream(
+                samplerate=KWS_SAMPLE_RATE,
+                channels=1,
+                dtype='int16',
+                blocksize=int(KWS_SAMPLE_RATE * frame_ms / 1000),
+                callback=callback
+            ):
+                logger.info("ESTOP keyword spotter listening")
+                while not self._spotter_stop.is_set():
+                    try:
+                        frame, arrived = frames.get(timeout=0.2)
+                    except queue.Empty:
+                        continue
+                    if self._spotter.process(frame):
+                        self.trigger("keyword", arrived)
+        except Exception as e:
+            logger.error(f"ESTOP keyword spotter stopped: {e}")
+
+    # --- reporting -------------------------------------------------------
+
+    def stats(self) -> dict:
+        """
+        Get stop latency statistics.
+
+        Returns:
+            dict: Count, median and worst-case latency in ms, and stops per source
+        """
+        with self._lock:
+            latencies = np.array(self._latencies) * 1000
+            sources = list(self._sources)
+
+        if len(latencies) == 0:
+            return {"count": 0}
+        return {
+            "count": len(latencies),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "max_ms": round(float(latencies.max()), 2),
+            "sources": {s: sources.count(s) for s in sorted(set(sources))},
+        }
+
+    def log_stats(self) -> None:
+        """Log stop latency statistics."""
+        stats = self.stats()
+        if stats["count"]:
+            logger.info(
+                f"ESTOP: {stats['count']} stops, p50 {stats['p50_ms']}ms, "
+                f"worst case {stats['max_ms']}ms ({stats['sources']})"
+            )
+
+
+# Global guard instance
+_estop_guard: Optional[EstopGuard] = None
+_estop_guard_lock = threading.Lock()
+
+
+def get_estop_guard() -> EstopGuard:
+    """
+    Get or create the global emergency stop guard.
+
+    Returns:
+        EstopGuard instance
+    """
+    global _estop_guard
+    if _estop_guard is None:
+        with _estop_guard_lock:
+            if _estop_guard is None:
+                _estop_guard = EstopGuard()
+    return _estop_guard
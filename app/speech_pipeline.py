@@ -0,0 +1,100 @@
+"""
+Speech Pipeline
+Overlaps sentence synthesis with playback for streamed conversational replies.
+"""
+
+import os
+import queue
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+from app.audio_io import play_audio
+from app.boson_api import tts_speak, TTS_SAMPLE_RATE
+from app.tracing import bind
+
+logger = logging.getLogger(__name__)
+
+
+def speak_sentences(
+    sentences: Iterable[str],
+    voice: Optional[str] = None,
+    cancel: Optional[threading.Event] = None
+) -> str:
+    """
+    Speak sentences as they become available.
+
+    A producer thread pulls sentences (e.g. from a streaming LLM reply)
+    and submits each one for synthesis right away, while this thread plays
+    finished sentences in order. The first sentence is heard while later
+    ones are still being generated and synthesized.
+
+    Args:
+        sentences: Iterable of sentences (may block while text is generated)
+        voice: Voice to use (default from TTS_VOICE env var or "belinda")
+        cancel: Event that stops speaking after the current sentence when set
+
+    Returns:
+        str: Everything that was spoken, joined
+    """
+    workers = int(os.getenv("TTS_PIPELINE_WORKERS", "2"))
+    depth = int(os.getenv("TTS_PIPELINE_DEPTH", "4"))
+
+    pending: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=depth)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-pipeline")
+    spoken: List[str] = []
+    stop = threading.Event()
+
+    def stopped() -> bool:
+        return stop.is_set() or (cancel is not None and cancel.is_set())
+
+    def put(item) -> bool:
+        # Bounded put that gives up once playback has stopped
+        while not stopped():
+            try:
+                pending.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for sentence in sentences:
+                logger.debug(f"Queueing sentence for TTS: '{sentence[:50]}'")
+                if not put((sentence, executor.submit(bind(tts_speak), sentence, voice))):
+                    return
+        except Exception as e:
+            logger.error(f"Reply stream failed: {e}")
+        finally:
+            put(None)
+
+    producer = threading.Thread(target=bind(produce), daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            try:
+                item = pending.get(timeout=0.1)
+            except queue.Empty:
+                if stopped():
+                    break
+                continue
+            if item is None or stopped():
+                break
+
+            sentence, future = item
+            try:
+                audio = future.result()
+            except Exception as e:
+                logger.error(f"TTS failed for sentence '{sentence[:50]}': {str(e)[:100]}")
+                continue
+
+            spoken.append(sentence)
+            play_audio(audio, TTS_SAMPLE_RATE)
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
+
+    return " ".join(spoken)
@@ -0,0 +1,303 @@
+"""
+Latency Tracing
+Per-turn traces with monotonic-clock spans, exported as JSON lines and summarized on shutdown.
+"""
+
+import os
+import json
+import uuid
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Trace of the turn being worked on in the current thread / task
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+
+
+class Trace:
+    """
+    Spans recorded for one voice turn.
+
+    Spans are (name, start, end) on the time.monotonic() clock and may be
+    recorded from any thread. Every span also feeds the tracer's
+    histograms right away, so spans that finish after the trace was
+    exported (a late Arduino ack) still count in the summary.
+
+    Attributes:
+        trace_id: Random hex ID
+        turn: Turn number in the pipeline
+        start: time.monotonic() when the turn started
+        deadline: time.monotonic() by which the turn should be answered (None = no budget)
+    """
+
+    def __init__(self, tracer: "Tracer", turn: int):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.turn = turn
+        self.start = time.monotonic()
+        self.deadline: Optional[float] = None
+        self.spans: List[dict] = []
+        self._tracer = tracer
+        self._lock = threading.Lock()
+
+    def record(self, name: str, start: float, end: float, **attrs) -> None:
+        """
+        Record a finished span.
+
+        Args:
+            name: Span name ("asr", "tts_request", ...)
+            start: time.monotonic() when it started
+            end: time.monotonic() when it ended
+            **attrs: Extra JSON-serializable fields
+        """
+        with self._lock:
+            self.spans.append({"name": name, "start": start, "end": end, **attrs})
+        self._tracer.observe(name, end - start)
+
+    def last_end(self, name: str) -> Optional[float]:
+        """End time of the latest span with this name, if any."""
+        with self._lock:
+            ends = [span["end"] for span in self.spans if span["name"] == name]
+        return max(ends) if ends else None
+
+    def has(self, name: str) -> bool:
+        with self._lock:
+            return any(span["name"] == name for span in self.spans)
+
+    def to_dict(self) -> dict:
+        """JSON form with span times in ms relative to the trace start."""
+        with self._lock:
+            spans = list(self.spans)
+        return {
+            "trace_id": self.trace_id,
+            "turn": self.turn,
+            "duration_ms": round((time.monotonic() - self.start) * 1000, 2),
+            "spans": [
+                {
+                    **{k: v for k, v in span.items() if k not in ("start", "end")},
+                    "start_ms": round((span["start"] - self.start) * 1000, 2),
+                    "duration_ms": round((span["end"] - span["start"]) * 1000, 2),
+                }
+                for span in sorted(spans, key=lambda s: s["start"])
+            ],
+        }
+
+
+class Tracer:
+    """
+    Creates traces, exports finished ones and keeps per-span histograms.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_samples: int = 10000):
+        """
+        Initialize the tracer.
+
+        Args:
+            path: JSON lines file for finished traces (default from TRACE_FILE
+                or /tmp/ai_car_traces.jsonl; empty disables the export)
+            max_samples: Most recent durations kept per span name
+        """
+        if path is None:
+            path = os.getenv("TRACE_FILE", "/tmp/ai_car_traces.jsonl")
+
+        self.path = path
+        self.max_samples = max_samples
+        self._durations: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+        self._file = None
+
+    def start_trace(self, turn: int) -> Trace:
+        """
+        Start a trace for a new turn.
+
+        Args:
+            turn: Turn number
+
+        Returns:
+            Trace: New trace
+        """
+        return Trace(self, turn)
+
+    def observe(self, name: str, seconds: float) -> None:
+        """Add one span duration to the histograms."""
+        with self._lock:
+            if name not in self._durations:
+                self._durations[name] = deque(maxlen=self.max_samples)
+            self._durations[name].append(seconds)
+
+    def finish(self, trace: Optional[Trace]) -> None:
+        """
+        Export a finished trace as one JSON line.
+
+        Args:
+            trace: Trace to export (None is ignored)
+        """
+        if trace is None or not self.path:
+            return
+
+        line = json.dumps(trace.to_dict())
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self.path, "a", encoding="utf-8")
+                self._file.write(line + "\n")
+                self._file.flush()
+            except OSError as e:
+                logger.warning(f"Failed to export trace: {e}")
+                self.path = ""
+
+    def summary(self) -> Dict[str, dict]:
+        """
+        Get latency percentiles per span name.
+
+        Returns:
+            dict: Span name -> count, p50/p95/p99/max in ms
+        """
+        with self._lock:
+            durations = {name: np.array(values) * 1000 for name, values in self._durations.items()}
+
+        return {
+            name: {
+                "count": len(values),
+                "p50_ms": round(float(np.percentile(values, 50)), 2),
+                "p95_ms": round(float(np.percentile(values, 95)), 2),
+                "p99_ms": round(float(np.percentile(values, 99)), 2),
+                "max_ms": round(float(values.max()), 2),
+            }
+            for name, values in durations.items() if len(values)
+        }
+
+    def log_summary(self) -> None:
+        """Log a latency table of all spans."""
+        summary = self.summary()
+        if not summary:
+            return
+        logger.info(f"{'Span':<14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for name, stats in sorted(summary.items()):
+            logger.info(
+                f"{name:<14} {stats['count']:>6} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+                f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}"
+            )
+        if self.path:
+            logger.info(f"Traces written to {self.path}")
+
+    def close(self) -> None:
+        """Close the export file."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace of the turn being worked on here, if any."""
+    return _current_trace.get()
+
+
+@contextmanager
+def activate(trace: Optional[Trace]) -> Iterator[Optional[Trace]]:
+    """
+    Make a trace current for spans recorded in this thread or task.
+
+    Args:
+        trace: Trace to activate (None records nothing)
+    """
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+def bind(func: Callable) -> Callable:
+    """
+    Bind the current trace to a function that will run on another thread.
+
+    Args:
+        func: Thread target or executor job
+
+    Returns:
+        Callable: Wrapper that runs func with the trace active
+    """
+    trace = current_trace()
+
+    def run(*args, **kwargs):
+        with activate(trace):
+            return func(*args, **kwargs)
+
+    return run
+
+
+@contextmanager
+def span(name: str, trace: Optional[Trace] = None, **attrs) -> Iterator[None]:
+    """
+    Time a block as a span of the current trace (a no-op outside a turn).
+
+    The span is recorded even if the block raises.
+
+    Args:
+        name: Span name
+        trace: Trace to record into (default: current trace)
+        **attrs: Extra JSON-serializable fields
+    """
+    if trace is None:
+        trace = current_trace()
+    if trace is None:
+        yield
+        return
+
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        trace.record(name, start, time.monotonic(), **attrs)
+
+
+def mark(name: str, since: str, trace: Optional[Trace] = None, at: Optional[float] = None) -> None:
+    """
+    Record a one-off span from the end of another span (or the turn start) to now.
+
+    Only the first mark per trace counts, e.g. time-to-first-audio for a
+    reply played in several pieces.
+
+    Args:
+        name: Span name
+        since: Span whose end starts this one
+        trace: Trace to record into (default: current trace)
+        at: time.monotonic() the span ended (default: now)
+    """
+    if trace is None:
+        trace = current_trace()
+    if trace is None or trace.has(name):
+        return
+
+    start = trace.last_end(since)
+    trace.record(name, trace.start if start is None else start, time.monotonic() if at is None else at)
+
+
+# Global tracer instance
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """
+    Get or create the global tracer.
+
+    Returns:
+        Tracer: Global tracer instance
+    """
+    global _tracer
+    if _tracer is None:
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = Tracer()
+    return _tracer
@@ -0,0 +1,224 @@
+"""
+TTS Cache
+Persistent, content-addressed cache of synthesized speech stored as raw PCM.
+"""
+
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    On-disk LRU cache of TTS audio keyed by (text, voice, model).
+
+    Each entry is a headerless int16 PCM file named by the SHA-256 of its
+    key, so hits can be memory-mapped straight into playback. Recency is
+    tracked through file modification times, which survive restarts.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_bytes: Optional[int] = None):
+        """
+        Initialize the cache and index any existing entries.
+
+        Args:
+            cache_dir: Directory for cache files (default from TTS_CACHE_DIR or ~/.cache/beemerai/tts)
+            max_bytes: Size cap in bytes (default from TTS_CACHE_MAX_MB or 64 MB)
+        """
+        if cache_dir is None:
+            cache_dir = os.getenv("TTS_CACHE_DIR", str(Path.home() / ".cache" / "beemerai" / "tts"))
+        if max_bytes is None:
+            max_bytes = int(float(os.getenv("TTS_CACHE_MAX_MB", "64")) * 1024 * 1024)
+
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._total_bytes = 0
+        self._load_index()
+
+    def _load_index(self) -> None:
+        """Index existing cache files, oldest first."""
+        files = []
+        for path in self.cache_dir.glob("*.pcm"):
+            try:
+                stat = path.stat()
+                files.append((stat.st_mtime, path.stem, stat.st_size))
+            except OSError:
+                continue
+
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+
+        logger.info(f"TTS cache: {len(self._entries)} entries, {self._total_bytes / 1024:.0f} KB in {self.cache_dir}")
+        self._evict()
+
+    @staticmethod
+    def make_key(text: str, voice: str, model: str) -> str:
+        """
+        Build the content address for a synthesis request.
+
+        Args:
+            text: Text that was spoken
+            voice: Voice name
+            model: TTS model name
+
+        Returns:
+            str: Hex SHA-256 digest
+        """
+        payload = json.dumps([model, voice, text], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.pcm"
+
+    def get(self, text: str, voice: str, model: str) -> Optional[np.ndarray]:
+        """
+        Look up cached audio.
+
+        Args:
+            text: Text to speak
+            voice: Voice name
+            model: TTS model name
+
+        Returns:
+            np.ndarray: Read-only memory-mapped int16 samples, or None on a miss
+        """
+        key = self.make_key(text, voice, model)
+        path = self._path(key)
+
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+
+        try:
+            os.utime(path)  # mark as recently used
+            audio = np.memmap(path, dtype='<i2', mode='r')
+        except (OSError, ValueError) as e:
+            logger.warning(f"TTS cache entry unreadable, dropping: {e}")
+            self._remove(key)
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        logger.debug(f"TTS cache hit: '{text[:50]}'")
+        return audio
+
+    def put(self, text: str, voice: str, model: str, samples: np.ndarray) -> None:
+        """
+        Store synthesized audio, evicting least recently used entries over the cap.
+
+        Args:
+            text: Text that was spoken
+            voice: Voice name
+            model: TTS model name
+            samples: int16 mono samples
+        """
+        data = np.ascontiguousarray(samples, dtype='<i2').tobytes()
+        if not data or len(data) > self.max_bytes:
+            return
+
+        key = self.make_key(text, voice, model)
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".tmp{threading.get_ident()}")
+
+        try:
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)  # atomic, readers never see partial files
+        except OSError as e:
+            logger.warning(f"Failed to write TTS cache entry: {e}")
+            return
+
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total_bytes += len(data)
+
+        self._evict()
+
+    def contains(self, text: str, voice: str, model: str) -> bool:
+        """Check whether audio for a request is cached (without counting a hit)."""
+        with self._lock:
+            return self.make_key(text, voice, model) in self._entries
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until the cache fits its cap."""
+        while True:
+            with self._lock:
+                if self._total_bytes <= self.max_bytes or not self._entries:
+                    return
+                key, size = self._entries.popitem(last=False)
+                self._total_bytes -= size
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+            logger.debug(f"TTS cache evicted {key[:12]} ({size} bytes)")
+
+    def _remove(self, key: str) -> None:
+        """Drop a single entry."""
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        try:
+            self._path(key).unlink()
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        """
+        Get cache statistics.
+
+        Returns:
+            dict: Entries, total bytes, hits and misses
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Global TTS cache instance
+_tts_cache: Optional[TTSCache] = None
+_tts_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> Optional[TTSCache]:
+    """
+    Get or create the global TTS cache.
+
+    Returns:
+        TTSCache: Global cache instance, or None if disabled via TTS_CACHE_ENABLED
+    """
+    global _tts_cache
+    if os.getenv("TTS_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    if _tts_cache is None:
+        with _tts_cache_lock:
+            if _tts_cache is None:
+                try:
+                    _tts_cache = TTSCache()
+                except OSError as e:
+                    logger.warning(f"TTS cache unavailable: {e}")
+                    return None
+    return _tts_cache
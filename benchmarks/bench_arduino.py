@@ -0,0 +1,69 @@
+"""
+Arduino Command Channel Benchmark
+Measures command latency and throughput against the simulated car firmware.
+
+Usage:
+    python -m benchmarks.bench_arduino [--count N] [--baud B] [--protocol framed|legacy]
+
+Sequential mode waits for each ack before sending the next command
+(round-trip latency); pipelined mode queues all commands at once
+(throughput of the queue, writer and link).
+"""
+
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+# Allow running as a script from the repo root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.device.car_sim import SimulatedCar
+
+
+def bench(label: str, car: SimulatedCar, count: int, pipelined: bool) -> None:
+    """Send RUN/STOP pairs and print latency and throughput."""
+    commands = [car.send_run if i % 2 == 0 else car.send_stop for i in range(count)]
+
+    start = time.perf_counter()
+    if pipelined:
+        # STOP would cancel the queued RUNs, so pipeline plain sends
+        futures = [car.send("RUN" if i % 2 == 0 else "DANCE") for i in range(count)]
+        for future in futures:
+            future.result(timeout=10)
+    else:
+        for send in commands:
+            send().result(timeout=10)
+    elapsed = time.perf_counter() - start
+
+    stats = car.stats()
+    print(
+        f"{label:<11} {count:>6} commands  {elapsed:7.3f}s  {count / elapsed:>9,.0f} cmd/s  "
+        f"ack p50 {stats.get('ack_p50_ms', 0):6.2f}ms  p95 {stats.get('ack_p95_ms', 0):6.2f}ms  "
+        f"max {stats.get('ack_max_ms', 0):6.2f}ms  timeouts {stats['timeouts']}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Arduino command channel")
+    parser.add_argument("--count", type=int, default=200, help="Commands per run")
+    parser.add_argument("--baud", type=int, default=9600, help="Simulated baud rate")
+    parser.add_argument("--protocol", default="framed", choices=["framed", "legacy"])
+    args = parser.parse_args()
+
+    # Per-command logging would dominate the measurement
+    logging.disable(logging.CRITICAL)
+
+    print(f"Simulated car: {args.protocol} protocol at {args.baud} baud")
+    for label, pipelined in (("sequential", False), ("pipelined", True)):
+        car = SimulatedCar(protocol=args.protocol, baud=args.baud)
+        car.start()
+        try:
+            bench(label, car, args.count, pipelined)
+        finally:
+            car.disconnect()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Intent Matcher Benchmark
+Measures RuleEngine and tiered (rules + classifier) match throughput over a transcript corpus.
+
+Usage:
+    python -m benchmarks.bench_intents [corpus.txt] [--repeat N]
+
+The corpus is one transcript per line. Without a corpus, a built-in set of
+command and chat utterances is used.
+"""
+
+import re
+import sys
+import time
+import logging
+import argparse
+from pathlib import Path
+
+# Allow running as a script from the repo root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.intents import match_intent
+from app.intents.classifier import get_intent_classifier
+from app.intents.rules import RuleEngine
+
+
+DEFAULT_CORPUS = [
+    "take me to the cafeteria",
+    "hey can you drive me to the canteen please",
+    "play the radio",
+    "turn on some music",
+    "pause",
+    "stop the radio",
+    "stop the car",
+    "emergency stop",
+    "show me your moves",
+    "hit the brakes",
+    "kill the music",
+    "let's boogie",
+    "what can you do",
+    "how are you doing today",
+    "tell me a joke about cars",
+    "what's the weather like outside",
+    "i think i left my keys in the food court",
+    "um so yeah can we maybe go somewhere fun later",
+]
+
+
+def legacy_patterns(engine: RuleEngine):
+    """(intent name, pattern) pairs in rule order, with slot placeholders expanded."""
+    return engine.expanded_patterns()
+
+
+def legacy_match(patterns, text: str):
+    """Per-rule, per-pattern re.search loop (the pre-compiled baseline)."""
+    normalized = text.lower().strip()
+    for name, pattern in patterns:
+        if re.search(pattern, normalized, re.IGNORECASE):
+            return name
+    return "UNKNOWN"
+
+
+def bench(label: str, fn, corpus, repeat: int) -> float:
+    """Run fn over the corpus and print throughput."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in corpus:
+            fn(text)
+    elapsed = time.perf_counter() - start
+    total = repeat * len(corpus)
+    rate = total / elapsed
+    print(f"{label:<12} {total:>9} matches  {elapsed:7.3f}s  {rate:>12,.0f} matches/s  {elapsed / total * 1e6:7.2f} us/match")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark intent matching throughput")
+    parser.add_argument("corpus", nargs="?", help="Transcript corpus, one utterance per line")
+    parser.add_argument("--repeat", type=int, default=2000, help="Passes over the corpus")
+    args = parser.parse_args()
+
+    if args.corpus:
+        corpus = [line.strip() for line in Path(args.corpus).read_text().splitlines() if line.strip()]
+    else:
+        corpus = DEFAULT_CORPUS
+
+    # Per-match logging would dominate the measurement
+    logging.disable(logging.CRITICAL)
+
+    engine = RuleEngine(cache_size=0)
+    cached_engine = RuleEngine()
+    patterns = legacy_patterns(engine)
+
+    # Both matchers must agree before their speed is compared
+    for text in corpus:
+        expected = legacy_match(patterns, text)
+        actual = engine.match(text).name
+        if expected != actual:
+            print(f"MISMATCH for '{text}': legacy={expected} compiled={actual}")
+            sys.exit(1)
+
+    print(f"Corpus: {len(corpus)} utterances x {args.repeat} passes")
+    legacy_rate = bench("legacy", lambda t: legacy_match(patterns, t), corpus, args.repeat)
+    compiled_rate = bench("uncached", engine.match, corpus, args.repeat)
+    cached_rate = bench("cached", cached_engine.match, corpus, args.repeat)
+    print(f"Speedup: {compiled_rate / legacy_rate:.2f}x uncached, {cached_rate / legacy_rate:.2f}x cached")
+    print(f"Cache: {cached_engine.cache_stats()}")
+
+    # Rules first, the classifier for what they miss (the LLM tier is not timed)
+    classifier = get_intent_classifier()
+    if classifier is not None:
+        bench("classifier", lambda t: classifier.classify(t), corpus, args.repeat)
+        bench("tiered", match_intent, corpus, args.repeat)
+        resolved = {text: match_intent(text) for text in corpus}
+        local = sum(intent.name != "UNKNOWN" for intent in resolved.values())
+        print(f"Resolved locally: {local}/{len(corpus)} (rest go to the LLM)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Voice Turn Benchmark
+Runs full turns (ASR, intent match, dispatch, LLM, TTS) against the mock Boson server.
+
+Usage:
+    python -m benchmarks.bench_turns [--turns N] [--concurrency C] [--stream-chat]
+                                     [--asr-latency S] [--chat-latency S] [--tts-latency S]
+
+Each turn sends recorded audio through asr_transcribe, matches the
+transcript, dispatches it (chat_with_car for conversation) and
+synthesizes the reply with tts_speak, exactly as the voice pipeline
+does minus the microphone and speaker. No network access is needed.
+
+Reports turn throughput, p50/p95/p99 per stage (from app.tracing) and
+memory allocated per turn (tracemalloc, measured in a separate pass so
+it does not distort the timings).
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+# Allow running as a script from the repo root
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.mock_boson import MockBosonServer, MockConfig
+
+
+# One utterance per intent the pipeline can speak a reply for (ESTOP would drive the car)
+DEFAULT_TRANSCRIPTS = [
+    "take me to the cafeteria",
+    "play the radio",
+    "pause",
+    "show me your moves",
+    "what can you do",
+    "how are you doing today",
+]
+
+
+def make_audio(seconds: float, sample_rate: int = 24000) -> np.ndarray:
+    """Low-level noise standing in for a recorded command."""
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(seconds * sample_rate)) * 300).astype(np.int16)
+
+
+def run_turn(audio: np.ndarray, tracer, turn: int) -> float:
+    """
+    Run one voice turn and return its duration in seconds.
+
+    Args:
+        audio: Recorded command
+        tracer: app.tracing.Tracer collecting the spans
+        turn: Turn number
+    """
+    from app.boson_api import asr_transcribe, tts_speak
+    from app.intents import match_intent
+    from app.dispatcher import dispatch
+    from app.tracing import activate, span
+
+    trace = tracer.start_trace(turn)
+    start = time.monotonic()
+    with activate(trace):
+        with span("asr"):
+            transcript = asr_transcribe(audio)
+        with span("intent"):
+            intent = match_intent(transcript)
+        with span("dispatch", intent=intent.name):
+            result = dispatch(intent)
+
+        if result.get("reply_stream") is not None:
+            for sentence in result["reply_stream"]:
+                with span("tts"):
+                    tts_speak(sentence)
+        elif result.get("message"):
+            with span("tts"):
+                tts_speak(result["message"])
+    end = time.monotonic()
+    trace.record("turn", start, end)
+    tracer.finish(trace)
+    return end - start
+
+
+def run_turns(audio: np.ndarray, tracer, turns: int, concurrency: int) -> float:
+    """Run turns on `concurrency` threads and return the wall time."""
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(lambda i: run_turn(audio, tracer, i), range(turns)))
+    return time.perf_counter() - start
+
+
+def measure_allocations(audio: np.ndarray, tracer, turns: int) -> dict:
+    """Peak and retained traced memory per turn, one turn at a time."""
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for i in range(turns):
+            before = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            run_turn(audio, tracer, i)
+            current, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    return {
+        "peak_kib": float(np.median(peaks)) / 1024,
+        "retained_kib": float(np.median(retained)) / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark full voice turns against a mock Boson server")
+    parser.add_argument("--turns", type=int, default=60, help="Turns to run")
+    parser.add_argument("--concurrency", type=int, default=1, help="Turns in flight at once")
+    parser.add_argument("--audio-seconds", type=float, default=2.0, help="Length of each recorded command")
+    parser.add_argument("--stream-chat", action="store_true", help="Stream chat replies sentence by sentence")
+    parser.add_argument("--tts-cache", action="store_true", help="Leave the TTS cache enabled")
+    parser.add_argument("--asr-latency", type=float, default=MockConfig.asr_latency_s)
+    parser.add_argument("--chat-latency", type=float, default=MockConfig.chat_latency_s)
+    parser.add_argument("--token-latency", type=float, default=MockConfig.token_latency_s)
+    parser.add_argument("--tts-latency", type=float, default=MockConfig.tts_latency_s)
+    parser.add_argument("--tts-seconds-per-char", type=float, default=MockConfig.tts_seconds_per_char)
+    args = parser.parse_args()
+
+    config = MockConfig(
+        asr_latency_s=args.asr_latency,
+        chat_latency_s=args.chat_latency,
+        token_latency_s=args.token_latency,
+        tts_latency_s=args.tts_latency,
+        tts_seconds_per_char=args.tts_seconds_per_char,
+        transcripts=DEFAULT_TRANSCRIPTS,
+    )
+
+    with MockBosonServer(config) as server:
+        # The app reads these when the shared client and handlers are first used
+        os.environ["BOSON_BASE_URL"] = server.base_url
+        os.environ["BOSON_API_KEY"] = "mock"
+        os.environ["CHAT_STREAMING"] = "true" if args.stream_chat else "false"
+        os.environ["TTS_CACHE_ENABLED"] = "true" if args.tts_cache else "false"
+        os.environ.pop("AUDIO_DEBUG_DUMP_DIR", None)
+
+        from app.boson_client import get_boson_client, close_boson_client
+        from app.tracing import Tracer
+
+        # Per-request logging would dominate the measurement
+        logging.disable(logging.CRITICAL)
+
+        audio = make_audio(args.audio_seconds)
+        get_boson_client().warm_up()
+
+        tracer = Tracer(path="")
+        elapsed = run_turns(audio, tracer, args.turns, args.concurrency)
+        summary = tracer.summary()
+        allocations = measure_allocations(audio, Tracer(path=""), min(args.turns, 20))
+        requests = dict(server.requests)
+        asr_request_bytes = server.asr_request_bytes
+        close_boson_client()
+
+    print(f"Turns: {args.turns} x {args.audio_seconds:g}s audio, concurrency {args.concurrency}, "
+          f"chat {'streaming' if args.stream_chat else 'batch'}, TTS cache {'on' if args.tts_cache else 'off'}")
+    print(f"Throughput: {args.turns / elapsed:.2f} turns/s ({elapsed:.2f}s)")
+    print(f"{'Span':<14} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for name in ("turn", "asr", "asr_request", "intent", "dispatch", "llm", "tts", "tts_request"):
+        if name in summary:
+            stats = summary[name]
+            print(f"{name:<14} {stats['count']:>6} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} "
+                  f"{stats['p99_ms']:>9.1f} {stats['max_ms']:>9.1f}")
+    print(f"Memory per turn: {allocations['peak_kib']:.0f} KiB peak, {allocations['retained_kib']:.1f} KiB retained")
+    if requests["asr"]:
+        print(f"ASR upload: {asr_request_bytes / requests['asr'] / 1024:.1f} KiB per request body")
+    print(f"Mock requests: {requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,333 @@
+"""
+Mock Boson Server
+Local OpenAI-compatible stand-in for the Boson API with configurable latency and payload sizes.
+
+Usage:
+    python -m benchmarks.mock_boson [--port 8765] [--asr-latency 0.3] ...
+
+Then point the app at it:
+    BOSON_BASE_URL=http://127.0.0.1:8765/v1 BOSON_API_KEY=mock python -m app.main
+
+Serves the endpoints the app uses:
+    GET  /v1/models                 warm-up and keep-alive pings
+    POST /v1/chat/completions       ASR (input_audio messages) and chat, streaming or not,
+                                    with an optional tool call when tools are offered
+    POST /v1/audio/speech           16-bit mono PCM at 24kHz, sent in chunks
+"""
+
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+# Boson TTS returns 16-bit mono PCM at 24kHz
+PCM_SAMPLE_RATE = 24000
+
+
+@dataclass
+class MockConfig:
+    """
+    Latency and payload settings of the mock server.
+
+    Attributes:
+        asr_latency_s: Time before an ASR response
+        chat_latency_s: Time before the first chat token (or the whole reply)
+        token_latency_s: Time between streamed chat tokens
+        tts_latency_s: Time before the first PCM byte
+        tts_seconds_per_char: Audio length per character of input text
+        tts_realtime: Stream PCM no faster than real time (like a live generator)
+        tts_chunk_bytes: PCM bytes per HTTP chunk
+        transcripts: ASR results, returned in rotation
+        reply: Chat reply text
+        tool_call: (tool name, arguments) called when a chat request offers that
+                   tool; the reply is sent along with it
+    """
+    asr_latency_s: float = 0.3
+    chat_latency_s: float = 0.4
+    token_latency_s: float = 0.02
+    tts_latency_s: float = 0.25
+    tts_seconds_per_char: float = 0.06
+    tts_realtime: bool = False
+    tts_chunk_bytes: int = 4800
+    transcripts: List[str] = field(default_factory=lambda: ["take me to the cafeteria"])
+    reply: str = "I'm doing great, thanks for asking! Where would you like to go today?"
+    tool_call: Optional[Tuple[str, dict]] = None
+
+
+class MockBosonServer:
+    """
+    Threaded HTTP/1.1 server (keep-alive, like the real endpoint) in a background thread.
+    """
+
+    def __init__(self, config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        Initialize the server (port 0 picks a free port).
+
+        Args:
+            config: Latency and payload settings (default: MockConfig())
+            host: Interface to bind
+            port: Port to bind
+        """
+        self.config = config or MockConfig()
+        self.requests: Dict[str, int] = {"asr": 0, "chat": 0, "tts": 0, "models": 0}
+        self.asr_request_bytes = 0
+        # Tool names offered by the last chat request
+        self.last_tools: List[str] = []
+        self._lock = threading.Lock()
+        self._asr_index = 0
+
+        server = self
+
+        class Handler(_MockHandler):
+            mock = server
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """OpenAI-style base URL (ends in /v1)."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "MockBosonServer":
+        """Serve requests on a background thread."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-boson", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self) -> None:
+        """Serve requests on the calling thread until interrupted."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockBosonServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def count(self, kind: str, body_bytes: int = 0) -> None:
+        with self._lock:
+            self.requests[kind] += 1
+            if kind == "asr":
+                self.asr_request_bytes += body_bytes
+
+    def next_transcript(self) -> str:
+        with self._lock:
+            text = self.config.transcripts[self._asr_index % len(self.config.transcripts)]
+            self._asr_index += 1
+        return text
+
+
+class _MockHandler(BaseHTTPRequestHandler):
+    """Request handler; `mock` is bound to the owning MockBosonServer."""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; Nagle would hold the body back
+    disable_nagle_algorithm = True
+    mock: MockBosonServer
+
+    def log_message(self, format, *args):
+        logger.debug(f"mock-boson: {format % args}")
+
+    # --- routing -----------------------------------------------------------
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self.mock.count("models")
+            self._send_json({"object": "list", "data": [{"id": "mock", "object": "model", "owned_by": "mock"}]})
+        else:
+            self._send_json({"error": {"message": "not found"}}, status=404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", "0"))
+        body = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.endswith("/chat/completions"):
+            if _has_audio(body.get("messages", [])):
+                self._asr(length)
+            else:
+                self._chat(body)
+        elif self.path.endswith("/audio/speech"):
+            self._speech(body)
+        else:
+            self._send_json({"error": {"message": "not found"}}, status=404)
+
+    # --- endpoints ---------------------------------------------------------
+
+    def _asr(self, body_bytes: int):
+        self.mock.count("asr", body_bytes)
+        time.sleep(self.mock.config.asr_latency_s)
+        self._send_json(_completion(self.mock.next_transcript()))
+
+    def _chat(self, body: dict):
+        self.mock.count("chat")
+        config = self.mock.config
+        offered = [tool.get("function", {}).get("name") for tool in body.get("tools") or []]
+        self.mock.last_tools = offered
+        tool_call = config.tool_call if config.tool_call and config.tool_call[0] in offered else None
+        time.sleep(config.chat_latency_s)
+
+        if not body.get("stream"):
+            self._send_json(_completion(config.reply, tool_call))
+            return
+
+        self._start_chunked("text/event-stream")
+        deltas = []
+        if tool_call is not None:
+            # Name first, then the arguments in two pieces, like a real stream
+            name, arguments = tool_call[0], json.dumps(tool_call[1])
+            half = len(arguments) // 2
+            deltas.append({"tool_calls": [{"index": 0, "id": "call_mock", "type": "function",
+                                           "function": {"name": name, "arguments": ""}}]})
+            deltas += [{"tool_calls": [{"index": 0, "function": {"arguments": part}}]}
+                       for part in (arguments[:half], arguments[half:])]
+        deltas += [{"content": token} for token in _tokens(config.reply)]
+        for i, delta in enumerate(deltas):
+            if i:
+                time.sleep(config.token_latency_s)
+            chunk = {
+                "id": "mock", "object": "chat.completion.chunk", "created": 0, "model": "mock",
+                "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+            }
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._end_chunked()
+
+    def _speech(self, body: dict):
+        self.mock.count("tts")
+        config = self.mock.config
+        samples = int(len(body.get("input", "")) * config.tts_seconds_per_char * PCM_SAMPLE_RATE)
+        pcm = _tone(samples)
+        time.sleep(config.tts_latency_s)
+
+        self._start_chunked("application/octet-stream")
+        chunk_seconds = config.tts_chunk_bytes / 2 / PCM_SAMPLE_RATE
+        for offset in range(0, len(pcm), config.tts_chunk_bytes):
+            self._write_chunk(pcm[offset:offset + config.tts_chunk_bytes])
+            if config.tts_realtime:
+                time.sleep(chunk_seconds)
+        self._end_chunked()
+
+    # --- HTTP helpers ------------------------------------------------------
+
+    def _send_json(self, payload: dict, status: int = 200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _start_chunked(self, content_type: str):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+    def _write_chunk(self, data: bytes):
+        if data:
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    def _end_chunked(self):
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
+
+
+def _has_audio(messages: list) -> bool:
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list) and any(part.get("type") == "input_audio" for part in content):
+            return True
+    return False
+
+
+def _completion(text: str, tool_call: Optional[Tuple[str, dict]] = None) -> dict:
+    message = {"role": "assistant", "content": text}
+    if tool_call is not None:
+        message["tool_calls"] = [{
+            "id": "call_mock", "type": "function",
+            "function": {"name": tool_call[0], "arguments": json.dumps(tool_call[1])},
+        }]
+    return {
+        "id": "mock", "object": "chat.completion", "created": 0, "model": "mock",
+        "choices": [{
+            "index": 0,
+            "message": message,
+            "finish_reason": "tool_calls" if tool_call is not None else "stop",
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+    }
+
+
+def _tokens(text: str) -> List[str]:
+    """Split text into word-sized deltas that keep their spacing."""
+    words = text.split(" ")
+    return [word if i == 0 else " " + word for i, word in enumerate(words)]
+
+
+def _tone(samples: int) -> bytes:
+    """Quiet 220Hz tone as int16 PCM (cheap stand-in for speech)."""
+    t = np.arange(samples) / PCM_SAMPLE_RATE
+    return (np.sin(2 * np.pi * 220 * t) * 3000).astype(np.int16).tobytes()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a mock Boson API server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--asr-latency", type=float, default=MockConfig.asr_latency_s)
+    parser.add_argument("--chat-latency", type=float, default=MockConfig.chat_latency_s)
+    parser.add_argument("--token-latency", type=float, default=MockConfig.token_latency_s)
+    parser.add_argument("--tts-latency", type=float, default=MockConfig.tts_latency_s)
+    parser.add_argument("--tts-seconds-per-char", type=float, default=MockConfig.tts_seconds_per_char)
+    parser.add_argument("--tts-realtime", action="store_true", help="Stream PCM at playback speed")
+    parser.add_argument("--transcript", action="append", help="ASR result (repeat to rotate)")
+    parser.add_argument("--tool-call", help="Tool to call when offered, e.g. 'navigate' or 'dance:{\"duration\": 10}'")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stdout)
+    config = MockConfig(
+        asr_latency_s=args.asr_latency,
+        chat_latency_s=args.chat_latency,
+        token_latency_s=args.token_latency,
+        tts_latency_s=args.tts_latency,
+        tts_seconds_per_char=args.tts_seconds_per_char,
+        tts_realtime=args.tts_realtime,
+    )
+    if args.transcript:
+        config.transcripts = args.transcript
+    if args.tool_call:
+        name, _, arguments = args.tool_call.partition(":")
+        config.tool_call = (name, json.loads(arguments or "{}"))
+
+    server = MockBosonServer(config, args.host, args.port)
+    print(f"Mock Boson server on {server.base_url} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
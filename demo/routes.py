@@ -1,2 +1,14 @@
 # Demo Routes
 # Sample routes for demonstration purposes
+#
+# Each destination lists the spoken names (aliases) that refer to it and
+# the Arduino command that drives the route. Aliases are compiled into the
+# destination gazetteer used by the intent rules, so adding a destination
+# here makes it recognizable without touching rules.yaml.
+
+ROUTES = {
+    "cafeteria": {
+        "aliases": ["cafeteria", "canteen", "food court", "cafe"],
+        "command": "RUN",
+    },
+}
@@ -0,0 +1,164 @@
+"""
+Test Arduino Client
+Unit tests for the queued serial command channel with a fake serial port.
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.arduino_client import ArduinoClient
+
+
+class FakeSerial:
+    """Serial port that acks framed commands (or echoes legacy ones) after a delay."""
+
+    def __init__(self, framed=True, ack_delay=0.0, reply=True):
+        self.framed = framed
+        self.ack_delay = ack_delay
+        self.reply = reply
+        self.written = []
+        self._rx = b""
+        self._lock = threading.Lock()
+
+    def __call__(self, port, baud, timeout=None):
+        return self
+
+    @property
+    def in_waiting(self):
+        with self._lock:
+            return len(self._rx)
+
+    def write(self, data):
+        line = data.decode().strip()
+        self.written.append(line)
+        if not self.reply:
+            return
+        if self.framed:
+            seq = line[1:].split()[0]
+            answer = f"ACK {seq}\n"
+        else:
+            answer = f"OK {line}\n"
+        threading.Timer(self.ack_delay, self._receive, [answer.encode()]).start()
+
+    def _receive(self, data):
+        with self._lock:
+            self._rx += data
+
+    def flush(self):
+        pass
+
+    def read(self, size=1):
+        with self._lock:
+            data, self._rx = self._rx[:size], self._rx[size:]
+        if not data:
+            time.sleep(0.01)
+        return data
+
+    def close(self):
+        pass
+
+
+def make_client(fake, protocol="framed", ack_timeout=1.0):
+    client = ArduinoClient(
+        port="fake", baud=9600, protocol=protocol, ack_timeout=ack_timeout,
+        reset_delay=0.0, serial_factory=fake
+    )
+    client.start()
+    return client
+
+
+def test_framed_command_resolves_on_ack():
+    """Test that a framed command carries a sequence number and resolves on its ack."""
+    fake = FakeSerial()
+    client = make_client(fake)
+    try:
+        future = client.send_run()
+        assert future.result(timeout=2) == "ACK"
+        assert fake.written == [f"@{future.seq} RUN"]
+        assert client.stats()["acked"] == 1
+    finally:
+        client.disconnect()
+
+
+def test_send_does_not_block():
+    """Test that sending returns before the Arduino acknowledges."""
+    client = make_client(FakeSerial(ack_delay=0.3))
+    try:
+        start = time.monotonic()
+        future = client.send_dance()
+        assert time.monotonic() - start < 0.1
+        assert not future.done()
+        future.result(timeout=2)
+    finally:
+        client.disconnect()
+
+
+def test_missing_ack_times_out():
+    """Test that a framed command without an ack fails with TimeoutError."""
+    client = make_client(FakeSerial(reply=False), ack_timeout=0.1)
+    try:
+        with pytest.raises(TimeoutError):
+            client.send_run().result(timeout=2)
+        assert client.stats()["timeouts"] == 1
+    finally:
+        client.disconnect()
+
+
+def test_stop_cancels_queued_commands():
+    """Test that STOP goes ahead of queued commands and cancels them."""
+    fake = FakeSerial()
+    client = ArduinoClient(
+        port="fake", baud=9600, protocol="framed", ack_timeout=1.0,
+        reset_delay=0.0, serial_factory=fake
+    )
+    # Queue before the I/O threads run so nothing is written yet
+    client._running.set()
+    run = client.send("RUN")
+    stop = client.send_stop()
+    client._running.clear()
+    client.start()
+    try:
+        assert stop.wait_written(timeout=2)
+        assert run.cancelled()
+        assert fake.written == [f"@{stop.seq} STOP"]
+    finally:
+        client.disconnect()
+
+
+def test_legacy_reply_resolves_oldest_command():
+    """Test that legacy firmware replies resolve commands in order."""
+    fake = FakeSerial(framed=False)
+    client = make_client(fake, protocol="legacy")
+    try:
+        assert client.send_run().result(timeout=2) == "OK RUN"
+        assert fake.written == ["RUN"]
+    finally:
+        client.disconnect()
+
+
+def test_reader_survives_command_being_written():
+    """Test that a reply or timeout check racing a write never sees a command without sent_at."""
+    fake = FakeSerial(framed=False, reply=False)
+    client = make_client(fake, protocol="legacy")
+    try:
+        # Hold the port between registration of the command and its write
+        with client._write_lock:
+            dance = client.send_dance()
+            deadline = time.monotonic() + 2
+            while not client._pending and time.monotonic() < deadline:
+                time.sleep(0.005)
+            assert all(future.sent_at is not None for future in client._pending.values())
+
+            # What the reader thread does on a reply line and on every read
+            client._expire(time.monotonic())
+            client._handle_line("DANCE started")
+        assert dance.result(timeout=2) == "DANCE started"
+    finally:
+        client.disconnect()
@@ -0,0 +1,74 @@
+"""
+Test ASR Upload
+Unit tests for resampling, silence trimming and compact encoding of ASR uploads.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.asr_upload import prepare_asr_upload, resample, trim_silence
+from app.audio_codec import decode_audio, encode_wav
+
+
+def speech_like(sample_rate=24000, lead=0.8, talk=1.0, tail=0.7):
+    """A voiced tone between stretches of low room noise."""
+    rng = np.random.default_rng(0)
+    noise = lambda seconds: rng.standard_normal(int(seconds * sample_rate)) * 20
+    t = np.arange(int(talk * sample_rate)) / sample_rate
+    voice = (np.sin(2 * np.pi * 220 * t) + 0.5 * np.sin(2 * np.pi * 1100 * t)) * 6000
+    return np.concatenate([noise(lead), voice, noise(tail)]).astype(np.int16)
+
+
+def test_resample_keeps_speech_and_drops_content_above_nyquist():
+    """Test that a 1 kHz tone survives 24k -> 16k and a 10 kHz tone does not alias."""
+    t = np.arange(24000) / 24000
+    low = resample((np.sin(2 * np.pi * 1000 * t) * 10000).astype(np.int16), 24000, 16000)
+    high = resample((np.sin(2 * np.pi * 10000 * t) * 10000).astype(np.int16), 24000, 16000)
+
+    assert len(low) == 16000 and low.dtype == np.int16
+    spectrum = np.abs(np.fft.rfft(low))
+    assert abs(np.argmax(spectrum) - 1000) <= 1
+    assert np.abs(high).max() < 50
+
+
+def test_trim_silence_keeps_padded_speech():
+    """Test that leading and trailing noise is cut down to the padding."""
+    audio = speech_like()
+    trimmed = trim_silence(audio, 24000, pad_ms=100)
+
+    assert abs(len(trimmed) / 24000 - 1.2) < 0.02
+    assert np.abs(trimmed[int(0.1 * 24000):int(1.1 * 24000)]).max() > 5000
+
+
+def test_trim_silence_leaves_silent_recordings_alone():
+    """Test that a recording with no sound above the floor is not trimmed away."""
+    silence = np.zeros(24000, dtype=np.int16)
+    assert len(trim_silence(silence, 24000)) == 24000
+
+
+def test_upload_is_smaller_than_full_rate_wav():
+    """Test that each format shrinks the upload and still decodes at the upload rate."""
+    audio = speech_like()
+    wav_size = len(encode_wav(audio, 24000))
+    sizes = {}
+    for file_format in ("wav", "flac", "opus"):
+        upload = prepare_asr_upload(audio, 24000, trim=True, upload_rate=16000, file_format=file_format)
+        decoded, sample_rate = decode_audio(upload.data)
+        assert sample_rate == 16000
+        assert abs(len(decoded) / 16000 - upload.seconds) < 0.05
+        sizes[file_format] = len(upload.data)
+
+    assert sizes["wav"] < wav_size / 2.5  # 1.3s of 2.5s, at two thirds of the rate
+    assert sizes["opus"] < sizes["flac"] < sizes["wav"]
+
+
+def test_wire_bytes_count_base64_overhead():
+    """Test that the reported wire size is the base64-encoded size."""
+    upload = prepare_asr_upload(np.zeros(1600, dtype=np.int16), 16000, trim=False, file_format="wav")
+    assert upload.wire_bytes == 4 * -(-len(upload.data) // 3)
+    assert upload.seconds == upload.source_seconds == 0.1
@@ -0,0 +1,116 @@
+"""
+Test Call Policy
+Unit tests for deadline-aware retries, hedged requests and the circuit breaker.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.call_policy import CallPolicy, CircuitBreaker, CircuitOpenError
+from app.tracing import Tracer, activate
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setenv("BOSON_RETRY_BASE_MS", "10")
+    monkeypatch.setenv("BOSON_RETRY_MAX_MS", "20")
+
+
+def flaky(failures, error=ConnectionError, result="ok"):
+    """Request that fails `failures` times, recording the timeout of every attempt."""
+    timeouts = []
+
+    def request(timeout):
+        timeouts.append(timeout)
+        if len(timeouts) <= failures:
+            raise error("boom")
+        return result
+
+    return request, timeouts
+
+
+def test_transient_failures_are_retried():
+    """Test that connection errors are retried and the call then succeeds."""
+    policy = CallPolicy("asr", timeout=5.0, hedge=False, max_attempts=3)
+    request, timeouts = flaky(2)
+    assert policy.call(request) == "ok"
+    assert len(timeouts) == 3
+    assert policy.stats()["retries"] == 2
+
+
+def test_permanent_failures_are_not_retried():
+    """Test that a non-transient error is raised on the first attempt."""
+    policy = CallPolicy("asr", timeout=5.0, hedge=False, max_attempts=3)
+    request, timeouts = flaky(5, error=ValueError)
+    with pytest.raises(ValueError):
+        policy.call(request)
+    assert len(timeouts) == 1
+
+
+def test_retries_stay_within_the_turn_budget():
+    """Test that attempt timeouts shrink to the budget and retrying stops when it is spent."""
+    policy = CallPolicy("tts", timeout=30.0, hedge=False, max_attempts=10)
+    trace = Tracer(path="").start_trace(1)
+    trace.deadline = time.monotonic() + 0.3
+
+    def slow_failure(timeout):
+        slow_failure.timeouts.append(timeout)
+        time.sleep(0.1)
+        raise TimeoutError("read timed out")
+    slow_failure.timeouts = []
+
+    start = time.monotonic()
+    with activate(trace), pytest.raises(TimeoutError):
+        policy.call(slow_failure)
+
+    assert time.monotonic() - start < 0.45
+    assert 1 < len(slow_failure.timeouts) < 10
+    assert all(timeout <= 0.3 for timeout in slow_failure.timeouts)
+
+
+def test_slow_request_is_hedged():
+    """Test that a request slower than the p95 is raced by a second one."""
+    policy = CallPolicy("chat", timeout=5.0, hedge=True)
+    for _ in range(20):
+        policy.call(lambda timeout: time.sleep(0.005))
+    calls = []
+
+    def request(timeout):
+        calls.append(timeout)
+        if len(calls) == 1:
+            time.sleep(0.5)  # stuck on a bad connection
+            return "slow"
+        return "fast"
+
+    start = time.monotonic()
+    assert policy.call(request) == "fast"
+    assert time.monotonic() - start < 0.3
+    stats = policy.stats()
+    assert stats["hedged"] == 1 and stats["hedge_wins"] == 1
+
+
+def test_circuit_opens_and_recovers():
+    """Test that repeated failures fail fast until the reset time, then a trial call closes it."""
+    breaker = CircuitBreaker("tts", failure_threshold=2, reset_s=0.1)
+    policy = CallPolicy("tts", timeout=5.0, hedge=False, max_attempts=1, breaker=breaker)
+    request, timeouts = flaky(2)
+
+    for _ in range(2):
+        with pytest.raises(ConnectionError):
+            policy.call(request)
+    assert breaker.state == "open"
+
+    with pytest.raises(CircuitOpenError):
+        policy.call(request)
+    assert len(timeouts) == 2  # rejected without a request
+
+    time.sleep(0.15)
+    assert policy.call(request) == "ok"
+    assert breaker.state == "closed"
+    assert policy.stats()["rejected"] == 1
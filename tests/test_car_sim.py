@@ -0,0 +1,61 @@
+"""
+Test Car Simulator
+Unit tests for the simulated car firmware and the command channel running on it.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.device.car_base import CarBase
+from app.device.car_sim import SimulatedCar, SimulatedFirmware
+
+
+def read_line(firmware):
+    data = b""
+    while not data.endswith(b"\n"):
+        data += firmware.read(64)
+    return data.decode().strip()
+
+
+def test_firmware_acks_framed_commands():
+    """Test that framed commands are acked with the car's state."""
+    firmware = SimulatedFirmware(timeout=1.0, process_s=0.0, jitter_s=0.0, route_s=10.0)
+    firmware.write(b"@1 RUN\n")
+    assert read_line(firmware) == "ACK 1 RUNNING"
+    assert firmware.state == "RUNNING"
+
+    firmware.write(b"@2 STOP\n")
+    assert read_line(firmware) == "ACK 2 IDLE"
+    assert firmware.state == "IDLE"
+
+    firmware.write(b"@3 FLY\n")
+    assert read_line(firmware) == "NAK 3 unknown command"
+
+
+def test_firmware_timing_follows_baud_rate():
+    """Test that a reply takes at least the serial transmission time."""
+    firmware = SimulatedFirmware(baudrate=1200, timeout=1.0, process_s=0.0, jitter_s=0.0)
+    start = time.monotonic()
+    firmware.write(b"@1 RUN\n")
+    line = read_line(firmware)
+    # 7 bytes out and len(reply)+1 bytes back, 10 bits each at 1200 baud
+    expected = (7 + len(line) + 1) * 10 / 1200
+    assert time.monotonic() - start >= expected * 0.9
+
+
+def test_simulated_car_round_trip():
+    """Test the real command channel against the simulated firmware."""
+    car = SimulatedCar(protocol="framed", baud=115200, process_s=0.0, jitter_s=0.0)
+    assert isinstance(car, CarBase)
+    car.start()
+    try:
+        assert car.send_dance().result(timeout=2) == "DANCING"
+        assert car.send_stop().result(timeout=2) == "IDLE"
+        assert car.firmware.state == "IDLE"
+        assert car.stats()["acked"] == 2
+    finally:
+        car.disconnect()
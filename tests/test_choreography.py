@@ -0,0 +1,165 @@
+"""
+Test Choreography
+Unit tests for beat tracking, the beat cache and beat-timed dance cues.
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import choreography, safety
+from app.arduino_client import CommandFuture
+from app.choreography import BeatMap, Choreographer, analyze_beats, load_beats
+from app.device.car_sim import SimulatedCar
+from app.mixer import MixerSource, PRIORITY_MUSIC
+from app.safety import EstopGuard
+
+
+def write_beat_track(path, bpm=120, first=0.25, seconds=12.0, sample_rate=44100):
+    """Kick drum on every beat and a hi-hat on every off-beat, over low noise."""
+    rng = np.random.default_rng(0)
+    audio = rng.standard_normal(int(seconds * sample_rate)).astype(np.float32) * 0.02
+    t = np.arange(int(0.05 * sample_rate)) / sample_rate
+    kick = np.sin(2 * np.pi * 60 * t * (1 + 2 * np.exp(-t * 40))) * np.exp(-t * 30)
+    hat = rng.standard_normal(int(0.02 * sample_rate)) * np.exp(-t[:int(0.02 * sample_rate)] * 200) * 0.2
+
+    beats = np.arange(first, seconds - 0.1, 60 / bpm)
+    for beat in beats:
+        start = int(beat * sample_rate)
+        audio[start:start + len(kick)] += kick * 0.8
+        offbeat = int((beat + 30 / bpm) * sample_rate)
+        audio[offbeat:offbeat + len(hat)] += hat[:len(audio) - offbeat]
+    sf.write(path, audio, sample_rate)
+    return beats
+
+
+def test_beats_follow_the_kick(tmp_path):
+    """Test that tempo and beat phase are recovered to within a few milliseconds."""
+    truth = write_beat_track(tmp_path / "song.wav", bpm=128, first=0.37)
+    beats = analyze_beats(str(tmp_path / "song.wav"))
+
+    assert abs(beats.tempo_bpm - 128) < 0.5
+    errors = np.array([np.min(np.abs(truth - b)) for b in beats.beats if b < truth[-1] + 0.1])
+    assert len(errors) >= len(truth) - 1
+    assert np.median(errors) < 0.005
+
+
+def test_beats_are_cached_per_file(tmp_path, monkeypatch):
+    """Test that a song is analyzed once and re-analyzed after it changes."""
+    song = tmp_path / "song.wav"
+    write_beat_track(song, seconds=6.0)
+    calls = []
+    original = choreography.analyze_beats
+    monkeypatch.setattr(choreography, "analyze_beats", lambda path: calls.append(path) or original(path))
+
+    first = load_beats(str(song), cache_dir=str(tmp_path / "cache"))
+    second = load_beats(str(song), cache_dir=str(tmp_path / "cache"))
+    assert len(calls) == 1
+    assert np.allclose(first.beats, second.beats, atol=1e-4)
+
+    write_beat_track(song, bpm=100, seconds=7.0)
+    load_beats(str(song), cache_dir=str(tmp_path / "cache"))
+    assert len(calls) == 2
+
+
+class FakeCar:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, command, priority):
+        future = CommandFuture(command, priority)
+        future.sent_at = time.monotonic()
+        future.mark_written()
+        self.sent.append((command, future.sent_at))
+        return future
+
+
+def test_cues_follow_the_playback_clock():
+    """Test that cues lead each beat by the configured time and track a clock jump."""
+    car = FakeCar()
+    source = MixerSource("music", PRIORITY_MUSIC, 8000)
+    start = time.monotonic() + 0.05
+    source.clock = (0, start)
+    source.playback_started.set()
+
+    def underrun():
+        # 40ms of silence at the speaker after 0.15s of song
+        time.sleep(start + 0.15 - time.monotonic())
+        source.clock = (int(0.15 * 8000), start + 0.19)
+
+    threading.Thread(target=underrun, daemon=True).start()
+    beats = BeatMap(120.0, np.array([0.1, 0.2, 0.3, 0.4]))
+    stats = Choreographer(car, routine=["LEFT", "RIGHT"], lead_ms=10).perform(source, beats)
+
+    assert [command for command, _ in car.sent] == ["LEFT", "RIGHT", "LEFT", "RIGHT"]
+    expected = start + np.array([0.1, 0.24, 0.34, 0.44]) - 0.01
+    assert np.all(np.abs(np.array([at for _, at in car.sent]) - expected) < 0.01)
+    assert stats["sent"] == 4
+    assert 30 < stats["drift_max_ms"] < 50
+
+
+def test_cues_stop_with_the_song():
+    """Test that cancelling the song ends the routine and late beats are skipped."""
+    car = FakeCar()
+    source = MixerSource("music", PRIORITY_MUSIC, 8000)
+    source.clock = (0, time.monotonic() - 1.0)  # song started a second ago
+    source.playback_started.set()
+    threading.Timer(0.1, source.cancel).start()
+
+    beats = BeatMap(120.0, np.arange(0.0, 10.0, 0.5))
+    stats = Choreographer(car, routine=["SPIN"], lead_ms=0).perform(source, beats)
+
+    assert stats["skipped"] >= 2
+    assert stats["sent"] <= 1
+
+
+class FakeRadio:
+    def stop(self):
+        pass
+
+
+def test_no_moves_after_estop(monkeypatch):
+    """Test that moves cued while the ESTOP is still silencing the song never reach the car."""
+    car = SimulatedCar(protocol="framed", baud=115200, process_s=0.0, jitter_s=0.0)
+    car.start()
+    source = MixerSource("music", PRIORITY_MUSIC, 8000)
+    source.clock = (0, time.monotonic())
+    source.playback_started.set()
+
+    def slow_stop_playback():
+        # The song keeps playing (and being cued) for a while after STOP is written
+        time.sleep(0.15)
+        source.cancel()
+
+    monkeypatch.setattr(safety, "stop_playback", slow_stop_playback)
+    guard = EstopGuard(arduino=car, radio=FakeRadio(), debounce_s=0.0)
+    try:
+        assert car.send_dance().result(timeout=2) == "DANCING"
+        beats = BeatMap(600.0, np.arange(0.05, 5.0, 0.02))
+        routine = threading.Thread(
+            target=Choreographer(car, routine=["LEFT", "RIGHT"], lead_ms=0).perform, args=(source, beats)
+        )
+        routine.start()
+        time.sleep(0.2)
+        assert guard.trigger("keyword")
+        routine.join(timeout=2)
+        time.sleep(0.05)
+
+        commands = [line.split()[-1] for line in car.firmware.received]
+        stop = commands.index("STOP")
+        assert {"LEFT", "RIGHT"} & set(commands[:stop])
+        assert commands[stop + 1:] == []
+        assert car.firmware.state == "IDLE"
+
+        # The next routine starts with DANCE, which lifts the stop
+        assert car.send_dance().result(timeout=2) == "DANCING"
+        assert car.send("LEFT").result(timeout=2) == "DANCING"
+    finally:
+        car.disconnect()
@@ -81,6 +81,16 @@ def test_unknown_dispatch():
     assert "help" in result["message"].lower()
 
 
+def test_unknown_without_llm_fallback(monkeypatch):
+    """Test that USE_LLM_FALLBACK=false answers unmatched input without the LLM."""
+    monkeypatch.setenv("USE_LLM_FALLBACK", "false")
+    intent = Intent(name="UNKNOWN", slots={}, confidence=0.0, raw_text="tell me a joke")
+    
+    result = dispatch(intent)
+    assert result["status"] == "unknown"
+    assert "reply_stream" not in result
+
+
 if __name__ == "__main__":
     print("Running dispatcher tests...")
     
@@ -0,0 +1,121 @@
+"""
+Test Emergency Stop
+Unit tests for the ESTOP guard and the local keyword spotter.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import safety
+from app.safety import EstopGuard
+from app.arduino_client import CommandFuture, PRIORITY_STOP
+from app.kws import KeywordSpotter, mfcc, trim_silence, resample_linear, KWS_SAMPLE_RATE
+
+
+class FakeArduino:
+    def __init__(self, events):
+        self.events = events
+        self.sent = 0
+
+    def commands_since_stop(self):
+        return self.sent
+
+    def send_stop(self):
+        self.events.append("STOP")
+        self.sent = 0
+        future = CommandFuture("STOP", PRIORITY_STOP)
+        future.mark_written()
+        return future
+
+
+class FakeRadio:
+    def __init__(self, events):
+        self.events = events
+
+    def stop(self):
+        self.events.append("radio_stop")
+
+
+def make_guard(monkeypatch, events):
+    monkeypatch.setattr(safety, "stop_playback", lambda: events.append("playback_stop"))
+    return EstopGuard(arduino=FakeArduino(events), radio=FakeRadio(events), debounce_s=1.0)
+
+
+def test_trigger_stops_car_first(monkeypatch):
+    """Test that STOP is written before audio is silenced and listeners run."""
+    events = []
+    guard = make_guard(monkeypatch, events)
+    guard.add_listener(lambda: events.append("listener"))
+
+    assert guard.trigger("keyword")
+    assert events == ["STOP", "playback_stop", "radio_stop", "listener"]
+
+
+def test_trigger_debounce_and_stats(monkeypatch):
+    """Test that repeated detections of one stop are ignored and latency is reported."""
+    events = []
+    guard = make_guard(monkeypatch, events)
+
+    assert guard.trigger("transcript", detected_at=100.0)
+    assert not guard.trigger("intent", detected_at=100.5)
+    assert guard.trigger("intent", detected_at=101.5)
+    assert events.count("STOP") == 2
+
+    stats = guard.stats()
+    assert stats["count"] == 2
+    assert stats["sources"] == {"intent": 1, "transcript": 1}
+    assert stats["max_ms"] >= stats["p50_ms"] > 0
+
+
+def test_new_stop_after_run_is_not_debounced(monkeypatch):
+    """Test that a stop within the debounce window is performed if the car was told to move again."""
+    events = []
+    guard = make_guard(monkeypatch, events)
+
+    assert guard.trigger("keyword", detected_at=100.0)
+    guard.arduino.sent = 1
+    assert guard.trigger("keyword", detected_at=100.5)
+    assert not guard.trigger("intent", detected_at=100.8)
+    assert events.count("STOP") == 2
+
+
+def _tone_word(f0, duration, rng):
+    """Synthetic 'word': a gliding harmonic tone with a smooth envelope."""
+    t = np.arange(int(duration * KWS_SAMPLE_RATE)) / KWS_SAMPLE_RATE
+    phase = 2 * np.pi * np.cumsum(f0 * (1 + 0.3 * t / duration)) / KWS_SAMPLE_RATE
+    envelope = np.hanning(len(t))
+    signal = 0.5 * np.sin(phase) * envelope + 0.3 * np.sin(3 * phase) * envelope
+    return (signal + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+
+
+def _detections(spotter, signal, sample_rate):
+    audio = resample_linear(signal, KWS_SAMPLE_RATE, sample_rate)
+    block = sample_rate // 50
+    return sum(spotter.process(audio[i:i + block]) for i in range(0, len(audio), block))
+
+
+def test_keyword_spotter(monkeypatch):
+    """Test that the spotter fires on the keyword and not on other sounds."""
+    monkeypatch.delenv("ESTOP_KWS_THRESHOLD", raising=False)
+    rng = np.random.default_rng(0)
+    templates = [mfcc(trim_silence(_tone_word(300, 0.4 + 0.03 * k, rng))) for k in range(3)]
+    spotter = KeywordSpotter(templates, sample_rate=24000, refractory_s=0.0)
+
+    silence = 0.001 * rng.standard_normal(8000).astype(np.float32)
+
+    def utterance(word):
+        return np.concatenate([silence, word, silence])
+
+    assert _detections(spotter, utterance(_tone_word(300, 0.45, rng)), 24000) >= 1
+    assert _detections(spotter, utterance(_tone_word(800, 0.45, rng)), 24000) == 0
+    assert _detections(spotter, utterance(0.3 * rng.standard_normal(8000).astype(np.float32)), 24000) == 0
+    assert _detections(spotter, silence, 24000) == 0
+
+
+if __name__ == "__main__":
+    print("Run the emergency stop tests with pytest (they use monkeypatch).")
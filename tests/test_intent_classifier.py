@@ -0,0 +1,80 @@
+"""
+Test Intent Classifier
+Unit tests for rule confidences, the nearest-neighbour classifier and tiered intent routing.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.intents import match_intent, get_rule_engine
+from app.intents.classifier import IntentClassifier
+
+
+def test_rule_confidence_reflects_coverage():
+    """Test that a whole-utterance rule match is certain and a stray keyword is not."""
+    assert match_intent("stop the car").confidence == 1.0
+    keyword = get_rule_engine().match("i really like the song that was on earlier")
+    assert keyword.name == "PLAY_RADIO"
+    assert 0.5 <= keyword.confidence < 0.7
+
+
+def test_paraphrases_resolve_locally():
+    """Test that commands no pattern covers are classified with a real confidence."""
+    for text, expected in [
+        ("hit the brakes", "ESTOP"),
+        ("let's boogie", "DANCE"),
+        ("crank the jams", "PLAY_RADIO"),
+        ("how do i use this", "HELP"),
+    ]:
+        intent = match_intent(text)
+        assert intent.name == expected, text
+        assert 0.4 <= intent.confidence < 1.0
+        assert intent.raw_text == text
+
+
+def test_classifier_overrides_weak_rule_match():
+    """Test that 'music' inside a request to stop it does not start the radio."""
+    assert get_rule_engine().match("kill the music").name == "PLAY_RADIO"
+    assert match_intent("kill the music").name == "PAUSE_RADIO"
+    # A stop keyword is never second-guessed
+    assert match_intent("play the radio and stop the car").name == "ESTOP"
+
+
+def test_weak_actuator_match_goes_to_the_llm():
+    """Test that a place or move mentioned in passing does not drive the car."""
+    assert get_rule_engine().match("i went to the cafeteria yesterday").name == "NAVIGATE"
+    assert match_intent("i went to the cafeteria yesterday").name == "UNKNOWN"
+    assert match_intent("i love to dance with my friends").name == "UNKNOWN"
+
+    # Weak rule matches the classifier agrees with still run locally
+    assert match_intent("can you dance").name == "DANCE"
+    assert match_intent("take me to the cafeteria").name == "NAVIGATE"
+
+
+def test_conversation_still_goes_to_the_llm():
+    """Test that chat and commands with unknown slots stay UNKNOWN."""
+    for text in ("how are you doing today", "tell me a joke about cars", "take me to the library"):
+        intent = match_intent(text)
+        assert intent.name == "UNKNOWN", text
+        assert intent.confidence == 0.0
+
+
+def test_classifier_fills_and_requires_slots():
+    """Test that slots are found in the text and a missing required slot rejects the intent."""
+    engine = get_rule_engine()
+    classifier = IntentClassifier(
+        {"NAVIGATE": ["let's go eat", "drive me somewhere"], "DANCE": ["boogie", "shake it"]},
+        slot_types={"NAVIGATE": engine.slot_types_for("NAVIGATE")},
+        required_slots={"NAVIGATE": ["destination"]},
+    )
+
+    name, confidence = classifier.classify("let's go eat")
+    assert name == "NAVIGATE" and confidence > 0.9
+
+    intent = classifier.match("let's go eat at the canteen", min_confidence=0.3)
+    assert intent.name == "NAVIGATE"
+    assert intent.slots["destination"] == "cafeteria"
+    assert classifier.match("let's go eat", min_confidence=0.3) is None
@@ -0,0 +1,100 @@
+"""
+Test LLM Tools
+Unit tests for resolving unmatched commands with LLM function calling (against the mock server).
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.boson_client import close_boson_client
+from app.dispatcher import TOOL_INTENTS, dispatch
+from app.intents import Intent
+from app.intents.fallback_llm import parse_tool_call, tool_schemas
+from benchmarks.mock_boson import MockBosonServer, MockConfig
+
+REPLY = "On it. Enjoy the ride!"
+
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    config = MockConfig(
+        asr_latency_s=0.0, chat_latency_s=0.0, token_latency_s=0.0, tts_latency_s=0.0, reply=REPLY
+    )
+    with MockBosonServer(config) as server:
+        monkeypatch.setenv("BOSON_BASE_URL", server.base_url)
+        monkeypatch.setenv("BOSON_API_KEY", "mock")
+        monkeypatch.setenv("USE_LLM_FALLBACK", "true")
+        close_boson_client()
+        try:
+            yield server
+        finally:
+            close_boson_client()
+
+
+def unknown(text):
+    return Intent(name="UNKNOWN", slots={}, confidence=0.0, raw_text=text)
+
+
+def test_tool_schemas_come_from_the_handlers():
+    """Test that every handler is a tool, with typed slots, built once."""
+    tools = tool_schemas(TOOL_INTENTS)
+    assert tools is tool_schemas(TOOL_INTENTS)
+
+    by_name = {tool["function"]["name"]: tool["function"] for tool in tools}
+    assert set(by_name) == {"navigate", "play_radio", "pause_radio", "dance", "estop", "help"}
+
+    navigate = by_name["navigate"]["parameters"]
+    assert "cafeteria" in navigate["properties"]["destination"]["enum"]
+    assert navigate["required"] == ["destination"]
+    assert by_name["dance"]["parameters"]["properties"]["duration"]["type"] == "number"
+    assert by_name["dance"]["parameters"]["required"] == []
+
+
+def test_tool_calls_become_intents():
+    """Test that arguments are converted like rule captures and bad calls are rejected."""
+    intent = parse_tool_call("navigate", '{"destination": "the cafeteria"}', "i'm starving", TOOL_INTENTS)
+    assert intent.name == "NAVIGATE"
+    assert intent.slots == {"destination": "cafeteria"}
+    assert intent.raw_text == "i'm starving"
+
+    assert parse_tool_call("dance", '{"duration": "two minutes"}', "boogie", TOOL_INTENTS).slots == {"duration": 120.0}
+    assert parse_tool_call("dance", '{"duration": 30}', "boogie", TOOL_INTENTS).slots == {"duration": 30}
+
+    assert parse_tool_call("navigate", "{}", "drive", TOOL_INTENTS) is None
+    assert parse_tool_call("navigate", "not json", "drive", TOOL_INTENTS) is None
+    assert parse_tool_call("self_destruct", "{}", "boom", TOOL_INTENTS) is None
+
+
+@pytest.mark.parametrize("streaming", ["true", "false"])
+def test_unmatched_command_runs_in_one_call(mock_server, monkeypatch, streaming):
+    """Test that a tool call is dispatched to its handler with a single LLM request."""
+    monkeypatch.setenv("CHAT_STREAMING", streaming)
+    mock_server.config.tool_call = ("navigate", {"destination": "cafeteria"})
+
+    result = dispatch(unknown("i could really eat something"))
+    assert mock_server.requests["chat"] == 1
+    assert "navigate" in mock_server.last_tools
+    assert result["resolved_intent"].name == "NAVIGATE"
+    assert result["destination"] == "cafeteria"
+    assert result["send_arduino_run"]
+    assert "cafeteria" in result["message"].lower()
+
+
+@pytest.mark.parametrize("streaming", ["true", "false"])
+def test_conversation_without_tool_call(mock_server, monkeypatch, streaming):
+    """Test that the reply from the same request is spoken when no tool fits."""
+    monkeypatch.setenv("CHAT_STREAMING", streaming)
+
+    result = dispatch(unknown("how are you"))
+    assert result["status"] == "conversation"
+    assert "resolved_intent" not in result
+    if streaming == "true":
+        assert list(result["reply_stream"]) == ["On it.", "Enjoy the ride!"]
+    else:
+        assert result["message"] == REPLY
+    assert mock_server.requests["chat"] == 1
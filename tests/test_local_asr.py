@@ -0,0 +1,133 @@
+"""
+Test Local ASR
+Unit tests for the command grammar, on-device command recognition and the hybrid ASR backend.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.boson_api import AsrBackend, AsrResult, HybridAsrBackend
+from app.intents import grammar as grammar_module
+from app.intents.grammar import command_grammar, expand_regex
+from app.kws import KWS_SAMPLE_RATE, mfcc
+from app.local_asr import LocalCommandRecognizer
+
+# Formant-like chords standing in for the sounds of three different words
+WORDS = {
+    "pause": [(300, 900), (700, 1200), (400, 2200)],
+    "stop the car": [(250, 2300), (600, 1000), (350, 1800), (750, 1150)],
+    "dance": [(650, 1700), (500, 1500), (280, 2500)],
+}
+
+
+def say(word, speed=1.0, seed=0, sample_rate=KWS_SAMPLE_RATE):
+    """Synthesize a word as chords with a pitch buzz, at some speaking rate, over room noise."""
+    rng = np.random.default_rng(seed)
+    parts = [np.zeros(int(0.2 * sample_rate))]
+    for formants in WORDS[word]:
+        t = np.arange(int(0.15 / speed * sample_rate)) / sample_rate
+        chord = sum(np.sin(2 * np.pi * f * t + rng.uniform(0, 6)) for f in formants)
+        chord *= 1 + 0.5 * np.sin(2 * np.pi * 120 * t)
+        parts.append(chord * np.hanning(len(t)) ** 0.3)
+    parts.append(np.zeros(int(0.2 * sample_rate)))
+    audio = np.concatenate(parts) * 6000 + rng.standard_normal(sum(map(len, parts))) * 30
+    return audio.astype(np.int16)
+
+
+def recognizer():
+    templates = {
+        word: [mfcc(say(word, speed, seed)[3200:-3200]) for speed, seed in ((0.9, 1), (1.0, 2), (1.1, 3))]
+        for word in WORDS
+    }
+    return LocalCommandRecognizer(templates)
+
+
+def test_grammar_comes_from_the_rules():
+    """Test that rule patterns expand to whole command phrases with their intents."""
+    grammar = command_grammar()
+    assert grammar["pause"] == "PAUSE_RADIO"
+    assert grammar["stop the radio"] == "PAUSE_RADIO"
+    assert grammar["stop the car"] == "ESTOP"
+    assert grammar["take me to the cafeteria"] == "NAVIGATE"
+    assert grammar["dance"] == "DANCE"
+    # Open-ended slots (durations) are left out rather than half-expanded
+    assert not any(phrase.startswith("dance for") for phrase in grammar)
+
+    assert expand_regex(r"\b(play|start)\s+(the\s+)?radio\b") == [
+        "play radio", "play the radio", "start radio", "start the radio"
+    ]
+    assert expand_regex(r"\bgo\s+\d+\s+meters") is None
+
+
+def test_no_grammar_without_the_regex_parser(monkeypatch, tmp_path):
+    """Test that losing the regex parser disables the local grammar instead of failing."""
+    monkeypatch.setattr(grammar_module, "sre_parse", None)
+    assert command_grammar() == {}
+    assert expand_regex(r"\bpause\b") is None
+
+    (tmp_path / "pause").mkdir()
+    sf.write(tmp_path / "pause" / "0.wav", say("pause"), KWS_SAMPLE_RATE)
+    assert LocalCommandRecognizer.from_directory(str(tmp_path)) is None
+
+
+def test_enrolled_commands_are_recognized():
+    """Test that each word is recognized at a new speaking rate with good confidence."""
+    local = recognizer()
+    for word in WORDS:
+        result = local.transcribe(say(word, speed=0.95, seed=7), KWS_SAMPLE_RATE)
+        assert result.text == word
+        assert result.confidence > 0.2
+
+
+def test_other_speech_has_low_confidence():
+    """Test that audio that is not a command, or silence, is left for the remote backend."""
+    local = recognizer()
+    rng = np.random.default_rng(5)
+    babble = (rng.standard_normal(KWS_SAMPLE_RATE) * 4000).astype(np.int16)
+
+    assert local.transcribe(babble, KWS_SAMPLE_RATE).confidence < 0.2
+    assert local.transcribe(np.zeros(KWS_SAMPLE_RATE, dtype=np.int16), KWS_SAMPLE_RATE).text == ""
+
+
+def test_templates_load_per_phrase(tmp_path):
+    """Test that template directories are named after phrases and must be in the grammar."""
+    for word, directory in (("pause", "pause"), ("dance", "not_a_command")):
+        (tmp_path / directory).mkdir()
+        for seed in range(2):
+            sf.write(tmp_path / directory / f"{seed}.wav", say(word, seed=seed), KWS_SAMPLE_RATE)
+
+    local = LocalCommandRecognizer.from_directory(str(tmp_path))
+    assert list(local.templates) == ["pause"]
+    assert LocalCommandRecognizer.from_directory(str(tmp_path / "missing")) is None
+
+
+class FakeBackend(AsrBackend):
+    def __init__(self, name, result):
+        self.name = name
+        self.result = result
+        self.calls = 0
+
+    def transcribe(self, audio, sample_rate):
+        self.calls += 1
+        return self.result
+
+
+def test_hybrid_only_calls_remote_when_unsure():
+    """Test that confident local results skip the network and unsure ones fall back."""
+    remote = FakeBackend("boson", AsrResult("what's the weather like", 1.0, "boson"))
+    audio = np.zeros(1600, dtype=np.int16)
+
+    confident = HybridAsrBackend(FakeBackend("local", AsrResult("pause", 0.6, "local")), remote, min_confidence=0.2)
+    assert confident.transcribe(audio, 16000).text == "pause"
+    assert remote.calls == 0
+
+    unsure = HybridAsrBackend(FakeBackend("local", AsrResult("pause", 0.1, "local")), remote, min_confidence=0.2)
+    assert unsure.transcribe(audio, 16000).text == "what's the weather like"
+    assert remote.calls == 1
+    assert unsure.stats()["remote"] == 1
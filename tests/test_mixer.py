@@ -0,0 +1,156 @@
+"""
+Test Audio Mixer
+Unit tests for the ring buffer, source priorities and preemption of the output mixer.
+"""
+
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.mixer import (
+    AudioMixer, MixerSource, RingBuffer, PRIORITY_MUSIC, PRIORITY_RADIO, PRIORITY_SPEECH
+)
+
+
+class FakeStream:
+    opened = 0
+
+    def __init__(self, **kwargs):
+        FakeStream.opened += 1
+        self.kwargs = kwargs
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_mixer():
+    return AudioMixer(sample_rate=8000, blocksize=80, duck_gain=0.25, ramp_ms=1,
+                      stream_factory=FakeStream)
+
+
+def pull(mixer, frames=80):
+    out = np.zeros(frames, dtype=np.float32)
+    mixer.mix(out)
+    return out
+
+
+def test_ring_buffer_wraps_around():
+    """Test that reads return samples in order across the end of the buffer."""
+    ring = RingBuffer(8)
+    assert ring.write(np.arange(6, dtype=np.float32)) == 6
+    out = np.zeros(4, dtype=np.float32)
+    assert ring.read_into(out) == 4
+    assert ring.write(np.arange(6, 12, dtype=np.float32)) == 6
+    assert ring.write(np.ones(1, dtype=np.float32)) == 0  # full
+
+    out = np.zeros(10, dtype=np.float32)
+    assert ring.read_into(out) == 8
+    assert np.array_equal(out[:8], np.arange(4, 12))
+
+
+def test_sources_share_one_stream():
+    """Test that adding sources never reopens the output device."""
+    FakeStream.opened = 0
+    mixer = make_mixer()
+    for _ in range(3):
+        source = mixer.source("speech", PRIORITY_SPEECH)
+        source.write(np.full(80, 0.5, dtype=np.float32))
+        source.close()
+        pull(mixer)
+        pull(mixer)
+        assert source.wait(0)
+    assert FakeStream.opened == 1
+
+
+def test_write_resamples_to_mixer_rate():
+    """Test that samples at another rate are resampled on write."""
+    mixer = make_mixer()
+    source = mixer.source("speech", PRIORITY_SPEECH)
+    source.write(np.zeros(2400, dtype=np.int16), 24000)
+    assert source.buffer.available == 800
+
+
+def test_speech_ducks_lower_priorities():
+    """Test that music under speech is capped at the duck gain and comes back afterwards."""
+    mixer = make_mixer()
+    music = mixer.source("music", PRIORITY_MUSIC)
+    music.write(np.full(2000, 0.4, dtype=np.float32))
+    assert np.allclose(pull(mixer), 0.4)
+
+    speech = mixer.source("speech", PRIORITY_SPEECH)
+    speech.write(np.full(160, 0.1, dtype=np.float32))
+    speech.close()
+    pull(mixer)  # ramp
+    assert np.allclose(pull(mixer), 0.4 * 0.25 + 0.1)
+
+    pull(mixer)  # speech done
+    pull(mixer)  # ramp back up
+    assert np.allclose(pull(mixer), 0.4)
+    assert speech.wait(0)
+
+
+def test_preempt_and_stop_playback_spare_the_radio():
+    """Test that preemption and stop_playback only cancel interruptible sources."""
+    mixer = make_mixer()
+    radio = mixer.source("radio", PRIORITY_RADIO, interruptible=False)
+    song = mixer.source("music", PRIORITY_MUSIC)
+    replacement = mixer.add(MixerSource("music", PRIORITY_MUSIC, 8000), preempt=True)
+    assert song.cancelled.is_set()
+    assert not radio.cancelled.is_set()
+
+    mixer.stop_playback()
+    assert replacement.cancelled.is_set()
+    assert not radio.cancelled.is_set()
+
+
+def test_cancel_unblocks_a_full_writer():
+    """Test that a producer blocked on a full buffer returns once the source is cancelled."""
+    mixer = make_mixer()
+    source = mixer.source("speech", PRIORITY_SPEECH, capacity=100)
+    results = []
+    writer = threading.Thread(target=lambda: results.append(source.write(np.zeros(1000, dtype=np.float32))))
+    writer.start()
+    source.cancel()
+    writer.join(timeout=2)
+    assert results == [False]
+
+    pull(mixer)
+    assert source.wait(0)
+
+
+def test_prefill_holds_playback():
+    """Test that a source stays silent until its prefill is buffered."""
+    mixer = make_mixer()
+    source = mixer.source("speech", PRIORITY_SPEECH, prefill=200)
+    source.write(np.full(100, 0.5, dtype=np.float32))
+    assert np.allclose(pull(mixer), 0.0)
+    source.write(np.full(100, 0.5, dtype=np.float32))
+    assert np.allclose(pull(mixer), 0.5)
+    assert source.first_audio_at is not None
+
+
+def test_callback_never_waits_for_the_lock():
+    """Test that finishing a source does not block the callback on add() and that add() prunes it."""
+    mixer = make_mixer()
+    source = mixer.source("speech", PRIORITY_SPEECH)
+    source.write(np.full(40, 0.5, dtype=np.float32))
+    source.close()
+
+    with mixer._lock:
+        mixing = threading.Thread(target=pull, args=(mixer,))
+        mixing.start()
+        mixing.join(timeout=2)
+        assert not mixing.is_alive()
+    assert source.wait(0)
+    assert np.allclose(pull(mixer), 0.0)
+
+    other = mixer.source("music", PRIORITY_MUSIC)
+    assert mixer._sources == [other]
@@ -0,0 +1,58 @@
+"""
+Test Mock Boson Server
+Runs the real Boson API wrappers against the local mock server (no network access).
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.boson_api import asr_transcribe, tts_speak, tts_stream, TTS_SAMPLE_RATE
+from app.boson_client import close_boson_client
+from app.intents.fallback_llm import chat_with_car, stream_chat_with_car
+from benchmarks.mock_boson import MockBosonServer, MockConfig
+
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    config = MockConfig(
+        asr_latency_s=0.0, chat_latency_s=0.0, token_latency_s=0.0, tts_latency_s=0.0,
+        tts_seconds_per_char=0.01, transcripts=["play the radio"], reply="Hello there. Nice day!"
+    )
+    with MockBosonServer(config) as server:
+        monkeypatch.setenv("BOSON_BASE_URL", server.base_url)
+        monkeypatch.setenv("BOSON_API_KEY", "mock")
+        monkeypatch.setenv("TTS_CACHE_ENABLED", "false")
+        close_boson_client()
+        try:
+            yield server
+        finally:
+            close_boson_client()
+
+
+def test_asr_round_trip(mock_server):
+    """Test that ASR requests are recognized and answered with the configured transcript."""
+    assert asr_transcribe(np.zeros(2400, dtype=np.int16)) == "play the radio"
+    assert mock_server.requests["asr"] == 1
+
+
+def test_tts_payload_size(mock_server):
+    """Test that synthesized audio length follows the configured seconds per character."""
+    text = "x" * 100
+    audio = tts_speak(text)
+    assert len(audio) == int(100 * 0.01 * TTS_SAMPLE_RATE)
+
+    streamed = np.concatenate(list(tts_stream(text)))
+    assert np.array_equal(streamed, audio)
+
+
+def test_chat_batch_and_streaming(mock_server):
+    """Test that chat works with and without streaming."""
+    assert chat_with_car("hi") == "Hello there. Nice day!"
+    assert "".join(stream_chat_with_car("hi")) == "Hello there. Nice day!"
+    assert mock_server.requests["chat"] == 2
@@ -0,0 +1,338 @@
+"""
+Test Voice Pipeline
+Unit tests for the asyncio stage pipeline with audio, ASR and TTS faked out.
+"""
+
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app import pipeline
+from app.pipeline import VoicePipeline
+from app.arduino_client import CommandFuture, PRIORITY_NORMAL
+
+
+class FakeRadio:
+    def __init__(self, playing=False):
+        self.playing = playing
+        self.events = []
+
+    def is_playing(self):
+        return self.playing
+
+    def play(self):
+        self.playing = True
+        self.events.append("play")
+
+    def stop(self):
+        self.playing = False
+        self.events.append("stop")
+
+    def duck(self):
+        self.events.append("duck")
+
+    def mute(self):
+        self.events.append("mute")
+
+    def restore(self):
+        self.events.append("restore")
+
+
+def acked(command):
+    future = CommandFuture(command, PRIORITY_NORMAL)
+    future.mark_written()
+    future.set_result("ACK")
+    return future
+
+
+class FakeArduino:
+    def __init__(self, events):
+        self.events = events
+
+    def send_run(self):
+        self.events.append(("RUN", time.monotonic()))
+        return acked("RUN")
+
+    def send_dance(self):
+        self.events.append(("DANCE", time.monotonic()))
+        return acked("DANCE")
+
+
+class FakeGuard:
+    def __init__(self):
+        self.listeners = []
+        self.triggers = []
+
+    def add_listener(self, callback):
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        self.listeners.remove(callback)
+
+    def trigger(self, source, detected_at=None):
+        self.triggers.append(source)
+        for listener in self.listeners:
+            listener()
+        return True
+
+
+def make_presses(count):
+    """PTT source that presses `count` times, each after the previous recording."""
+    recorded = threading.Semaphore(1)
+    remaining = [count]
+
+    def wait_for_ptt():
+        recorded.acquire()
+        if remaining[0] == 0:
+            raise EOFError
+        remaining[0] -= 1
+
+    return wait_for_ptt, recorded
+
+
+def run(pipe):
+    asyncio.run(asyncio.wait_for(pipe.run(), timeout=5))
+
+
+def test_actuator_runs_during_speech(monkeypatch):
+    """Test that Arduino RUN is sent while the acknowledgement is still playing."""
+    events = []
+    wait_for_ptt, recorded = make_presses(1)
+
+    def fake_record():
+        recorded.release()
+        return np.zeros(160, dtype=np.int16)
+
+    def fake_play(audio, sample_rate):
+        events.append(("play_start", time.monotonic()))
+        time.sleep(0.2)
+        events.append(("play_end", time.monotonic()))
+
+    monkeypatch.setattr(pipeline, "record_ptt", fake_record)
+    monkeypatch.setattr(pipeline, "asr_transcribe", lambda audio: "take me to the cafeteria")
+    monkeypatch.setattr(pipeline, "tts_speak", lambda text: np.zeros(10, dtype=np.int16))
+    monkeypatch.setattr(pipeline, "play_audio", fake_play)
+
+    pipe = VoicePipeline(
+        radio=FakeRadio(), arduino=FakeArduino(events), guard=FakeGuard(),
+        streaming_asr=False, streaming_tts=False, wait_for_ptt=wait_for_ptt
+    )
+    run(pipe)
+
+    times = dict(events)
+    assert set(times) == {"RUN", "play_start", "play_end"}
+    assert times["RUN"] < times["play_end"]
+
+
+def test_dance_cue_waits_for_song_start(monkeypatch, tmp_path):
+    """Test that DANCE is sent once the song is actually playing, not after a fixed delay."""
+    events = []
+    wait_for_ptt, recorded = make_presses(1)
+    song = tmp_path / "dance.wav"
+    song.write_bytes(b"")
+
+    def fake_record():
+        recorded.release()
+        return np.zeros(160, dtype=np.int16)
+
+    def fake_play_local(path, max_seconds=None, source=None):
+        time.sleep(0.3)  # decoder and prefill
+        events.append(("song_start", time.monotonic()))
+        source.playback_started.set()
+        time.sleep(0.1)
+
+    monkeypatch.setenv("DANCE_SONG", str(song))
+    monkeypatch.setattr(pipeline, "record_ptt", fake_record)
+    monkeypatch.setattr(pipeline, "asr_transcribe", lambda audio: "show me your moves")
+    monkeypatch.setattr(pipeline, "tts_speak", lambda text: np.zeros(10, dtype=np.int16))
+    monkeypatch.setattr(pipeline, "play_audio", lambda audio, sr: None)
+    monkeypatch.setattr(pipeline, "play_local_audio", fake_play_local)
+
+    pipe = VoicePipeline(
+        radio=FakeRadio(), arduino=FakeArduino(events), guard=FakeGuard(),
+        streaming_asr=False, streaming_tts=False, wait_for_ptt=wait_for_ptt, choreography=False
+    )
+    run(pipe)
+
+    times = dict(events)
+    assert set(times) == {"song_start", "DANCE"}
+    assert times["song_start"] <= times["DANCE"] < times["song_start"] + 0.1
+
+
+def test_choreography_needs_framed_protocol(monkeypatch):
+    """Test that beat-cued moves are off by default and never sent over the legacy protocol."""
+    monkeypatch.delenv("DANCE_CHOREOGRAPHY", raising=False)
+    arduino = FakeArduino([])
+    assert VoicePipeline(radio=FakeRadio(), arduino=arduino, guard=FakeGuard()).choreographer is None
+
+    arduino.protocol = "legacy"
+    pipe = VoicePipeline(radio=FakeRadio(), arduino=arduino, guard=FakeGuard(), choreography=True)
+    assert pipe.choreographer is None
+
+    arduino.protocol = "framed"
+    pipe = VoicePipeline(radio=FakeRadio(), arduino=arduino, guard=FakeGuard(), choreography=True)
+    assert pipe.choreographer is not None
+
+
+def test_radio_turn_starts_radio(monkeypatch):
+    """Test that the radio starts once the reply to 'play the radio' has played."""
+    played = []
+    wait_for_ptt, recorded = make_presses(1)
+
+    def fake_record():
+        recorded.release()
+        return np.zeros(160, dtype=np.int16)
+
+    monkeypatch.setattr(pipeline, "record_ptt", fake_record)
+    monkeypatch.setattr(pipeline, "asr_transcribe", lambda audio: "play the radio")
+    monkeypatch.setattr(pipeline, "tts_speak", lambda text: np.zeros(10, dtype=np.int16))
+    monkeypatch.setattr(pipeline, "play_audio", lambda audio, sr: played.append(audio))
+
+    radio = FakeRadio()
+    pipe = VoicePipeline(
+        radio=radio, arduino=FakeArduino([]), guard=FakeGuard(),
+        streaming_asr=False, streaming_tts=False, wait_for_ptt=wait_for_ptt
+    )
+    run(pipe)
+
+    assert len(played) == 1
+    assert radio.events == ["play"]
+
+
+def test_empty_transcript_resumes_radio(monkeypatch):
+    """Test that a turn without speech restores the radio and speaks nothing."""
+    wait_for_ptt, recorded = make_presses(1)
+    played = []
+
+    def fake_record():
+        recorded.release()
+        return np.zeros(160, dtype=np.int16)
+
+    monkeypatch.setattr(pipeline, "record_ptt", fake_record)
+    monkeypatch.setattr(pipeline, "asr_transcribe", lambda audio: "")
+    monkeypatch.setattr(pipeline, "play_audio", lambda audio, sr: played.append(audio))
+
+    radio = FakeRadio(playing=True)
+    pipe = VoicePipeline(
+        radio=radio, arduino=FakeArduino([]), guard=FakeGuard(),
+        streaming_asr=False, streaming_tts=False, wait_for_ptt=wait_for_ptt
+    )
+    run(pipe)
+
+    # The stream stays connected: muted while recording, then restored
+    assert radio.events == ["mute", "duck", "restore"]
+    assert played == []
+
+
+def test_barge_in_cancels_previous_speech(monkeypatch):
+    """Test that a new PTT press stops the reply of the previous turn."""
+    transcripts = iter(["pause", "stop the car"])
+    stopped = threading.Event()
+    played = []
+    second_press = threading.Event()
+    presses = [0]
+
+    def wait_for_ptt():
+        presses[0] += 1
+        if presses[0] == 2:
+            second_press.wait(2)
+        elif presses[0] > 2:
+            raise EOFError
+
+    def fake_play(audio, sample_rate):
+        played.append(len(audio))
+        if len(played) == 1:
+            # First reply is long; the user presses PTT while it plays
+            second_press.set()
+            stopped.wait(2)
+
+    monkeypatch.setattr(pipeline, "record_ptt", lambda: np.zeros(160, dtype=np.int16))
+    monkeypatch.setattr(pipeline, "asr_transcribe", lambda audio: next(transcripts))
+    monkeypatch.setattr(pipeline, "tts_speak", lambda text: np.zeros(len(text), dtype=np.int16))
+    monkeypatch.setattr(pipeline, "play_audio", fake_play)
+    monkeypatch.setattr(pipeline, "stop_playback", stopped.set)
+
+    pipe = VoicePipeline(
+        radio=FakeRadio(), arduino=FakeArduino([]), guard=FakeGuard(),
+        streaming_asr=False, streaming_tts=False, wait_for_ptt=wait_for_ptt
+    )
+    run(pipe)
+
+    assert stopped.is_set()
+    assert len(played) == 2
+
+
+def test_stop_transcript_takes_fast_path(monkeypatch):
+    """Test that a stop transcript triggers the guard before dispatch, keeping its acknowledgement."""
+    wait_for_ptt, recorded = make_presses(1)
+    played = []
+    guard = FakeGuard()
+
+    def fake_record():
+        recorded.release()
+        return np.zeros(160, dtype=np.int16)
+
+    def fake_dispatch(intent, car):
+        # The guard has already fired by the time the handler runs
+        assert guard.triggers == ["transcript"]
+        return {"status": "acknowledged", "action": "estop", "message": "Emergency stop activated"}
+
+    monkeypatch.setattr(pipeline, "record_ptt", fake_record)
+    monkeypatch.setattr(pipeline, "asr_transcribe", lambda audio: "stop")
+    monkeypatch.setattr(pipeline, "dispatch", fake_dispatch)
+    monkeypatch.setattr(pipeline, "tts_speak", lambda text: np.zeros(10, dtype=np.int16))
+    monkeypatch.setattr(pipeline, "play_audio", lambda audio, sr: played.append(audio))
+
+    radio = FakeRadio(playing=True)
+    pipe = VoicePipeline(
+        radio=radio, arduino=FakeArduino([]), guard=guard,
+        streaming_asr=False, streaming_tts=False, wait_for_ptt=wait_for_ptt
+    )
+    run(pipe)
+
+    assert guard.triggers == ["transcript"]
+    assert len(played) == 1
+    # The radio stays off after an emergency stop
+    assert radio.events == ["mute", "duck", "stop"]
+
+
+def test_no_run_after_stop_during_dispatch(monkeypatch):
+    """Test that a turn stopped while its handler runs never starts the car."""
+    wait_for_ptt, recorded = make_presses(1)
+    events = []
+    guard = FakeGuard()
+
+    def fake_record():
+        recorded.release()
+        return np.zeros(160, dtype=np.int16)
+
+    def slow_dispatch(intent, car):
+        # "stop" is heard by the keyword spotter during a slow LLM round-trip
+        guard.trigger("keyword")
+        time.sleep(0.1)
+        return {"status": "acknowledged", "message": "Heading out", "send_arduino_run": True}
+
+    monkeypatch.setattr(pipeline, "record_ptt", fake_record)
+    monkeypatch.setattr(pipeline, "asr_transcribe", lambda audio: "i could eat")
+    monkeypatch.setattr(pipeline, "dispatch", slow_dispatch)
+    monkeypatch.setattr(pipeline, "tts_speak", lambda text: np.zeros(10, dtype=np.int16))
+    monkeypatch.setattr(pipeline, "play_audio", lambda audio, sr: None)
+
+    pipe = VoicePipeline(
+        radio=FakeRadio(), arduino=FakeArduino(events), guard=guard,
+        streaming_asr=False, streaming_tts=False, wait_for_ptt=wait_for_ptt
+    )
+    run(pipe)
+
+    assert guard.triggers == ["keyword"]
+    assert events == []
+
+if __name__ == "__main__":
+    print("Run the pipeline tests with pytest (they use monkeypatch).")
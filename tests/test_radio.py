@@ -0,0 +1,73 @@
+"""
+Test Radio Player
+Unit tests for ducking and muting the in-process radio output.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.mixer import AudioMixer, PRIORITY_RADIO
+from app.radio_player import RadioPlayer
+
+
+class FakeStream:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def start(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_player(samples=48000):
+    mixer = AudioMixer(sample_rate=48000, blocksize=480, duck_gain=0.5, ramp_ms=10,
+                       stream_factory=FakeStream)
+    player = RadioPlayer(duck_gain=0.25, mixer=mixer)
+    player._source = mixer.source("radio", PRIORITY_RADIO, interruptible=False)
+    player._source.write(np.full(samples, 10000, dtype=np.int16))
+    return player, mixer
+
+
+def pull(mixer, frames=960):
+    out = np.zeros(frames, dtype=np.float32)
+    mixer.mix(out)
+    return np.round(out * 32768).astype(np.int32)
+
+
+def test_full_volume_passes_samples_through():
+    """Test that the radio is untouched at full volume."""
+    player, mixer = make_player()
+    assert np.all(pull(mixer) == 10000)
+
+
+def test_duck_ramps_down_then_holds():
+    """Test that ducking ramps to the duck gain without clicks and then holds it."""
+    player, mixer = make_player()
+    player.duck()
+
+    first = pull(mixer, 240)  # 5ms: half way down the 10ms ramp
+    assert first[0] == 10000
+    assert 2500 < first[-1] < 10000
+    assert np.all(np.diff(first) <= 0)
+
+    pull(mixer, 480)
+    assert np.all(pull(mixer) == 2500)
+
+
+def test_mute_and_restore_keep_the_buffer():
+    """Test that muting consumes the live stream silently and restore brings it back."""
+    player, mixer = make_player()
+    player.mute()
+    pull(mixer)
+    assert np.all(pull(mixer) == 0)
+
+    player.restore()
+    pull(mixer)
+    assert np.all(pull(mixer) == 10000)
@@ -4,12 +4,17 @@ Unit tests for intent matching.
 """
 
 import sys
+from dataclasses import FrozenInstanceError
 from pathlib import Path
 
 # Add parent directory to path to import app modules
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+import pytest
+
 from app.intents import match_intent
+from app.intents.gazetteer import Gazetteer
+from app.intents.rules import RuleEngine, normalize_text
 
 
 def test_navigate_intent():
@@ -71,6 +76,81 @@ def test_intent_priority():
     assert intent.name == "ESTOP"
 
 
+def test_intent_priority_over_position():
+    """Test that rule order wins even when a lower rule matches earlier in the text."""
+    assert match_intent("play the radio and stop the car").name == "ESTOP"
+    assert match_intent("the music is great but pause").name == "PAUSE_RADIO"
+
+
+def test_normalize_text():
+    """Test casefolding, punctuation and filler-word stripping."""
+    assert normalize_text("Um, PAUSE!") == "pause"
+    assert normalize_text("  uh  stop the car.  ") == "stop the car"
+    assert normalize_text("What's the e-stop?") == "what's the e-stop"
+    assert normalize_text("dance for 1.5 minutes") == "dance for 1.5 minutes"
+
+
+def test_intent_cache():
+    """Test that repeated commands are served from the cache."""
+    engine = RuleEngine(cache_size=2)
+    
+    first = engine.match("play the radio")
+    assert engine.match("play the radio") is first
+    
+    # Same normalized key, but the caller's text is kept
+    variant = engine.match("Uh, play the radio!")
+    assert variant.name == "PLAY_RADIO"
+    assert variant.raw_text == "Uh, play the radio!"
+    assert engine.cache_stats()["hits"] == 2
+    assert engine.cache_stats()["misses"] == 1
+    
+    # Bounded: least recently used entry is evicted
+    engine.match("pause")
+    engine.match("stop the car")
+    assert engine.cache_stats()["entries"] == 2
+    engine.match("play the radio")
+    assert engine.cache_stats()["misses"] == 4
+
+
+def test_intent_is_immutable():
+    """Test that cached intents cannot be modified by callers."""
+    intent = RuleEngine().match("take me to the cafeteria")
+    
+    with pytest.raises(FrozenInstanceError):
+        intent.name = "ESTOP"
+    with pytest.raises(TypeError):
+        intent.slots["destination"] = "library"
+
+
+def test_reload_clears_cache():
+    """Test that reloading rules invalidates cached results."""
+    engine = RuleEngine()
+    engine.match("pause")
+    assert engine.cache_stats()["entries"] == 1
+    
+    engine.reload()
+    assert engine.cache_stats()["entries"] == 0
+    assert engine.match("pause").name == "PAUSE_RADIO"
+
+
+def test_reload_with_new_destinations():
+    """Test that reloading with a new gazetteer replaces the destinations too."""
+    engine = RuleEngine()
+    destinations = Gazetteer({"gym": ["gym", "fitness center"]})
+    engine.reload(destinations=destinations)
+    assert engine.destinations is destinations
+    assert engine.match("take me to the fitness center").slots.get("destination") == "gym"
+
+
+def test_resolve_does_not_touch_the_cache():
+    """Test that checking a phrase gives its intent without caching it."""
+    engine = RuleEngine()
+    assert engine.resolve("Stop the car") == "ESTOP"
+    assert engine.resolve("take me to the cafeteria") == "NAVIGATE"
+    assert engine.resolve("what's the weather like") is None
+    assert engine.cache_stats()["entries"] == 0
+
+
 if __name__ == "__main__":
     print("Running intent tests...")
     
@@ -92,4 +172,25 @@ if __name__ == "__main__":
     test_intent_priority()
     print("✓ Intent priority tests passed")
     
+    test_intent_priority_over_position()
+    print("✓ Intent priority over position tests passed")
+    
+    test_normalize_text()
+    print("✓ Text normalization tests passed")
+    
+    test_intent_cache()
+    print("✓ Intent cache tests passed")
+    
+    test_intent_is_immutable()
+    print("✓ Intent immutability tests passed")
+    
+    test_reload_clears_cache()
+    print("✓ Cache invalidation tests passed")
+    
+    test_reload_with_new_destinations()
+    print("✓ Destination reload tests passed")
+    
+    test_resolve_does_not_touch_the_cache()
+    print("✓ Phrase resolution tests passed")
+    
     print("\nAll tests passed! ✓")
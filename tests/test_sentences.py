@@ -0,0 +1,57 @@
+"""
+Test Sentence Splitting
+Unit tests for splitting streamed LLM output into speakable sentences.
+"""
+
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.intents.fallback_llm import iter_sentences
+
+
+def test_sentences_split_across_deltas():
+    """Test that sentences are emitted as soon as they end."""
+    deltas = ["Hel", "lo there! I'm", " doing great. How", " about you?"]
+    assert list(iter_sentences(deltas)) == ["Hello there!", "I'm doing great.", "How about you?"]
+
+
+def test_no_early_split():
+    """Test that decimals and abbreviations don't end a sentence."""
+    deltas = ["It's 3.", "5 km to Dr. Smith's office. Let's go"]
+    assert list(iter_sentences(deltas)) == ["It's 3.5 km to Dr. Smith's office.", "Let's go"]
+
+
+def test_think_blocks_removed():
+    """Test that <think> blocks never reach TTS, even when split across deltas."""
+    deltas = ["<thi", "nk>Let me think. Hmm.</th", "ink>Sure thing! ", "On my way."]
+    assert list(iter_sentences(deltas)) == ["Sure thing!", "On my way."]
+
+
+def test_sentences_are_lazy():
+    """Test that the first sentence is available before the stream ends."""
+    def deltas():
+        yield "First one. "
+        raise AssertionError("stream consumed too early")
+
+    assert next(iter_sentences(deltas())) == "First one."
+
+
+if __name__ == "__main__":
+    print("Running sentence splitting tests...")
+
+    test_sentences_split_across_deltas()
+    print("✓ Split tests passed")
+
+    test_no_early_split()
+    print("✓ Early split tests passed")
+
+    test_think_blocks_removed()
+    print("✓ Think block tests passed")
+
+    test_sentences_are_lazy()
+    print("✓ Laziness tests passed")
+
+    print("\nAll sentence splitting tests passed! ✓")
@@ -0,0 +1,157 @@
+"""
+Test Slot Extraction
+Unit tests for the gazetteer, slot converters and captured slots.
+"""
+
+import re
+import sys
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.intents.gazetteer import Gazetteer
+from app.intents.slots import SlotType, convert_slot, parse_number, parse_duration
+from app.intents.rules import RuleEngine
+
+
+ROUTES = {
+    "cafeteria": ["canteen", "food court", "cafe"],
+    "library": ["the library", "book room"],
+    "parking lot": ["car park", "parking"],
+}
+
+RULES_YAML = r"""
+intents:
+  - name: NAVIGATE
+    patterns:
+      - '\b(take|go)\s+(me\s+)?to\s+(the\s+)?(?P<destination>{destination})'
+      - '\b(?P<destination>{destination})\b'
+    slots:
+      destination: cafeteria
+  - name: SET_VOLUME
+    patterns:
+      - '\bvolume\s+(to\s+)?(?P<level>{number})'
+    slot_types:
+      level: number
+  - name: WAIT
+    patterns:
+      - '\bwait\s+(for\s+)?(?P<duration>{duration})'
+      - '\bwait\s+(?P<what>\w+)'
+"""
+
+
+def test_gazetteer_lookup():
+    """Test that aliases resolve to canonical names."""
+    gazetteer = Gazetteer(ROUTES)
+
+    assert gazetteer.lookup("Food  Court") == "cafeteria"
+    assert gazetteer.lookup("the canteen") == "cafeteria"
+    assert gazetteer.lookup("library") == "library"
+    assert gazetteer.lookup("car park") == "parking lot"
+    assert gazetteer.lookup("moon") is None
+    assert gazetteer.names() == ["cafeteria", "library", "parking lot"]
+
+
+def test_gazetteer_find_longest_match():
+    """Test scanning free text with the token trie."""
+    gazetteer = Gazetteer(ROUTES)
+
+    found = gazetteer.find("from the parking lot to the food court please")
+    assert found == [("parking lot", "parking lot"), ("food court", "cafeteria")]
+    assert gazetteer.find("nothing here") == []
+
+
+def test_gazetteer_pattern():
+    """Test that the compiled pattern matches whole aliases only."""
+    pattern = re.compile(Gazetteer(ROUTES).pattern())
+
+    assert pattern.fullmatch("parking lot")
+    assert pattern.fullmatch("parking")
+    assert pattern.fullmatch("cafe")
+    assert pattern.fullmatch("cafeteria")
+    assert pattern.match("cafes") is None
+    assert re.fullmatch(Gazetteer({}).pattern(), "") is None
+
+
+def test_parse_number():
+    """Test digit and word number conversion."""
+    assert parse_number("42") == 42
+    assert parse_number("2.5") == 2.5
+    assert parse_number("seven") == 7
+    assert parse_number("twenty-five") == 25
+    assert parse_number("one hundred and five") == 105
+    assert parse_number("loud") is None
+
+
+def test_parse_duration():
+    """Test spoken duration conversion to seconds."""
+    assert parse_duration("10 seconds") == 10.0
+    assert parse_duration("two minutes") == 120.0
+    assert parse_duration("half an hour") == 1800.0
+    assert parse_duration("a minute") == 60.0
+    assert parse_duration("soon") is None
+
+
+def test_convert_slot():
+    """Test converted values, the raw-text fallback and slot types without a converter."""
+    assert convert_slot(SlotType("number", r"\d+", parse_number), " 12 ") == 12
+    assert convert_slot(SlotType("number", r"\w+", parse_number), "lots") == "lots"
+    assert convert_slot(SlotType("name", r"\w+", None), " Ada ") == "Ada"
+    assert convert_slot(None, " Ada ") == "Ada"
+
+
+def test_rule_slots(tmp_path):
+    """Test captured, typed and static slots from rule patterns."""
+    rules_path = tmp_path / "rules.yaml"
+    rules_path.write_text(RULES_YAML)
+    engine = RuleEngine(str(rules_path), destinations=Gazetteer(ROUTES))
+
+    intent = engine.match("take me to the book room")
+    assert intent.name == "NAVIGATE"
+    assert intent.slots == {"destination": "library"}
+
+    # Second pattern captures the same slot name
+    assert engine.match("is the car park open").slots == {"destination": "parking lot"}
+
+    assert engine.match("set the volume to twenty").slots == {"level": 20}
+    assert engine.match("wait for 5 minutes").slots == {"duration": 300.0}
+
+    # Untyped slots keep the captured text
+    assert engine.match("wait here").slots == {"what": "here"}
+
+
+def test_default_rules_capture_slots():
+    """Test slots captured by the shipped rules.yaml."""
+    engine = RuleEngine()
+
+    assert engine.match("take me to the food court").slots == {"destination": "cafeteria"}
+    assert engine.match("dance for thirty seconds").slots == {"duration": 30.0}
+    assert engine.match("dance").slots == {}
+
+
+if __name__ == "__main__":
+    print("Running slot extraction tests...")
+
+    test_gazetteer_lookup()
+    print("✓ Gazetteer lookup tests passed")
+
+    test_gazetteer_find_longest_match()
+    print("✓ Gazetteer scan tests passed")
+
+    test_gazetteer_pattern()
+    print("✓ Gazetteer pattern tests passed")
+
+    test_parse_number()
+    print("✓ Number conversion tests passed")
+
+    test_parse_duration()
+    print("✓ Duration conversion tests passed")
+
+    test_convert_slot()
+    print("✓ Slot conversion tests passed")
+
+    test_default_rules_capture_slots()
+    print("✓ Default rule slot tests passed")
+
+    print("\nRun the full suite with pytest for the custom rules test.")
@@ -0,0 +1,90 @@
+"""
+Test Latency Tracing
+Unit tests for per-turn spans, their export and the percentile summary.
+"""
+
+import sys
+import json
+import threading
+from pathlib import Path
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.tracing import Tracer, activate, bind, current_trace, mark, span
+
+
+def test_spans_are_exported_as_json_lines(tmp_path):
+    """Test that a finished trace is written as one JSON line with its spans."""
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(path=str(path))
+    trace = tracer.start_trace(1)
+
+    with activate(trace):
+        with span("asr"):
+            pass
+        with span("dispatch", intent="HELP"):
+            pass
+    tracer.finish(trace)
+    tracer.close()
+
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert record["trace_id"] == trace.trace_id
+    assert record["turn"] == 1
+    assert [s["name"] for s in record["spans"]] == ["asr", "dispatch"]
+    assert record["spans"][1]["intent"] == "HELP"
+
+
+def test_span_outside_a_turn_is_a_no_op():
+    """Test that spans without a current trace record nothing."""
+    tracer = Tracer(path="")
+    with span("asr"):
+        pass
+    assert current_trace() is None
+    assert tracer.summary() == {}
+
+
+def test_bind_carries_trace_to_threads():
+    """Test that work handed to another thread records into the caller's trace."""
+    tracer = Tracer(path="")
+    trace = tracer.start_trace(1)
+
+    def work():
+        with span("tts_request"):
+            pass
+
+    with activate(trace):
+        thread = threading.Thread(target=bind(work))
+    thread.start()
+    thread.join()
+
+    assert [s["name"] for s in trace.spans] == ["tts_request"]
+
+
+def test_mark_counts_once_from_previous_span():
+    """Test that time-to-first-audio starts at the end of capture and is recorded once."""
+    tracer = Tracer(path="")
+    trace = tracer.start_trace(1)
+    trace.record("capture", trace.start, trace.start + 1.0)
+
+    mark("first_audio", since="capture", trace=trace)
+    mark("first_audio", since="capture", trace=trace)
+
+    first_audio = [s for s in trace.spans if s["name"] == "first_audio"]
+    assert len(first_audio) == 1
+    assert first_audio[0]["start"] == trace.start + 1.0
+
+
+def test_summary_percentiles():
+    """Test that the summary reports p50/p95/p99 per span name."""
+    tracer = Tracer(path="")
+    for ms in range(1, 101):
+        tracer.observe("asr", ms / 1000)
+
+    stats = tracer.summary()["asr"]
+    assert stats["count"] == 100
+    assert stats["p50_ms"] == 50.5
+    assert stats["p99_ms"] > stats["p95_ms"] > stats["p50_ms"]
+    assert stats["max_ms"] == 100.0
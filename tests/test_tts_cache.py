@@ -0,0 +1,88 @@
+"""
+Test TTS Cache
+Unit tests for the on-disk TTS cache.
+"""
+
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.tts_cache import TTSCache
+
+
+def test_round_trip(tmp_path):
+    """Test that cached audio is returned memory-mapped and unchanged."""
+    cache = TTSCache(cache_dir=str(tmp_path), max_bytes=1024 * 1024)
+    samples = np.arange(-500, 500, dtype=np.int16)
+
+    assert cache.get("Radio paused.", "belinda", "tts-model") is None
+    cache.put("Radio paused.", "belinda", "tts-model", samples)
+
+    cached = cache.get("Radio paused.", "belinda", "tts-model")
+    assert isinstance(cached, np.memmap)
+    assert np.array_equal(cached, samples)
+
+    # Voice and model are part of the key
+    assert cache.get("Radio paused.", "other", "tts-model") is None
+    assert cache.get("Radio paused.", "belinda", "other-model") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+
+
+def test_lru_eviction(tmp_path):
+    """Test that least recently used entries are evicted over the size cap."""
+    cache = TTSCache(cache_dir=str(tmp_path), max_bytes=2500)
+    audio = np.zeros(500, dtype=np.int16)  # 1000 bytes each
+
+    cache.put("one", "v", "m", audio)
+    cache.put("two", "v", "m", audio)
+    cache.get("one", "v", "m")  # "two" is now least recently used
+    cache.put("three", "v", "m", audio)
+
+    assert cache.contains("one", "v", "m")
+    assert not cache.contains("two", "v", "m")
+    assert cache.contains("three", "v", "m")
+    assert len(list(tmp_path.glob("*.pcm"))) == 2
+
+
+def test_index_survives_restart(tmp_path):
+    """Test that a new cache instance picks up existing entries in LRU order."""
+    cache = TTSCache(cache_dir=str(tmp_path), max_bytes=1024 * 1024)
+    cache.put("old", "v", "m", np.ones(10, dtype=np.int16))
+    cache.put("new", "v", "m", np.ones(10, dtype=np.int16))
+
+    old_path = tmp_path / f"{TTSCache.make_key('old', 'v', 'm')}.pcm"
+    past = time.time() - 100
+    os.utime(old_path, (past, past))
+
+    reopened = TTSCache(cache_dir=str(tmp_path), max_bytes=25)
+    assert not reopened.contains("old", "v", "m")
+    assert reopened.contains("new", "v", "m")
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    print("Running TTS cache tests...")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_round_trip(Path(tmp))
+    print("✓ Round trip tests passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_lru_eviction(Path(tmp))
+    print("✓ LRU eviction tests passed")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        test_index_survives_restart(Path(tmp))
+    print("✓ Restart tests passed")
+
+    print("\nAll TTS cache tests passed! ✓")
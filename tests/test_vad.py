@@ -0,0 +1,137 @@
+"""
+Test VAD Endpointing
+Unit tests for the energy-based voice activity endpointer.
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add parent directory to path to import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.audio_io import VadEndpointer, frame_levels_db
+
+
+SAMPLE_RATE = 16000
+FRAME = 480  # 30ms
+
+
+def make_frame(amplitude: float, seed: int = 0) -> np.ndarray:
+    """Create a 30ms frame of noise at the given amplitude (0-1)."""
+    rng = np.random.default_rng(seed)
+    return (rng.standard_normal(FRAME) * amplitude * 32767).clip(-32768, 32767).astype(np.int16)
+
+
+def run(endpointer: VadEndpointer, frames) -> list:
+    """Feed frames until the endpointer is done, returning kept frames."""
+    kept = []
+    for frame in frames:
+        kept.extend(endpointer.process(frame))
+        if endpointer.done:
+            break
+    return kept
+
+
+def test_frame_levels_db():
+    """Test dBFS level computation for single and batched frames."""
+    assert float(frame_levels_db(np.zeros(FRAME, dtype=np.int16))) < -100
+    levels = frame_levels_db(np.stack([make_frame(0.001), make_frame(0.3)]))
+    assert levels.shape == (2,)
+    assert levels[1] > levels[0] + 40
+
+
+def test_endpoint_after_hangover():
+    """Test that capture stops shortly after speech ends, keeping pre-roll."""
+    endpointer = VadEndpointer(SAMPLE_RATE, frame_ms=30, preroll_ms=90, hangover_ms=300,
+                               onset_ms=60, max_seconds=10, no_speech_timeout=5)
+
+    silence = [make_frame(0.001, i) for i in range(20)]
+    speech = [make_frame(0.3, 100 + i) for i in range(20)]
+    trailing = [make_frame(0.001, 200 + i) for i in range(100)]
+
+    kept = run(endpointer, silence + speech + trailing)
+
+    assert endpointer.done
+    assert endpointer.speech_detected
+    # pre-roll (3 frames incl. onset) + rest of speech + 10 hangover frames
+    assert len(kept) == 3 + 18 + 10
+
+
+def test_speech_from_the_first_frame():
+    """Test that speech already under way when the stream opens is detected."""
+    speech = [make_frame(0.3, 100 + i) for i in range(20)]
+    trailing = [make_frame(0.001, 200 + i) for i in range(100)]
+
+    for lead in (0, 3):
+        endpointer = VadEndpointer(SAMPLE_RATE, frame_ms=30, hangover_ms=300, onset_ms=60,
+                                   max_seconds=10, no_speech_timeout=4)
+        quiet = [make_frame(0.001, i) for i in range(lead)]
+        kept = run(endpointer, quiet + speech + trailing)
+
+        assert endpointer.speech_detected
+        assert len(kept) >= len(speech)
+
+
+def test_endpoint_in_cabin_noise():
+    """Test that steady noise louder than the minimum speech level doesn't keep capture open."""
+    noise = 10 ** (-40 / 20)  # -40 dBFS road noise, throughout
+    for lead in (0, 50):
+        endpointer = VadEndpointer(SAMPLE_RATE, frame_ms=30, hangover_ms=500, onset_ms=60,
+                                   max_seconds=8, no_speech_timeout=4)
+        frames = [make_frame(noise, i) for i in range(lead)]
+        frames += [
+            (make_frame(noise, i).astype(np.int32) + make_frame(0.3, 1000 + i)).clip(-32768, 32767).astype(np.int16)
+            for i in range(lead, lead + 33)
+        ]
+        frames += [make_frame(noise, i) for i in range(lead + 33, lead + 300)]
+
+        fed = 0
+        for frame in frames:
+            endpointer.process(frame)
+            fed += 1
+            if endpointer.done:
+                break
+
+        assert endpointer.speech_detected
+        # Ends within the hangover (~17 frames) plus a little after the speech
+        assert fed <= lead + 33 + 25
+
+
+def test_no_speech_timeout():
+    """Test that silence alone ends capture without keeping any audio."""
+    endpointer = VadEndpointer(SAMPLE_RATE, frame_ms=30, no_speech_timeout=0.6, max_seconds=10)
+    kept = run(endpointer, [make_frame(0.001, i) for i in range(100)])
+
+    assert endpointer.done
+    assert not endpointer.speech_detected
+    assert kept == []
+
+
+def test_max_duration():
+    """Test that continuous speech is cut at the hard maximum."""
+    endpointer = VadEndpointer(SAMPLE_RATE, frame_ms=30, max_seconds=0.9, onset_ms=30)
+    frames = [make_frame(0.001)] + [make_frame(0.3, i) for i in range(100)]
+    kept = run(endpointer, frames)
+
+    assert endpointer.done
+    assert len(kept) <= 30
+
+
+if __name__ == "__main__":
+    print("Running VAD tests...")
+
+    test_frame_levels_db()
+    print("✓ Level tests passed")
+
+    test_endpoint_after_hangover()
+    print("✓ Hangover endpoint tests passed")
+
+    test_no_speech_timeout()
+    print("✓ No-speech timeout tests passed")
+
+    test_max_duration()
+    print("✓ Max duration tests passed")
+
+    print("\nAll VAD tests passed! ✓")